@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark boto3 clients against the S3 REST and SQS JSON endpoints.
+
+Needs boto3 (``pip install boto3``). The server runs in a separate
+process so client and server don't share an interpreter.
+"""
+
+import asyncio
+import multiprocessing
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import boto3
+import httpx
+from botocore.config import Config
+
+PORT = 4599
+ENDPOINT = f"http://127.0.0.1:{PORT}"
+ITERATIONS = 2_000
+LIST_KEYS = 1_000
+PAYLOAD = b"x" * 1024
+
+
+def serve(snapshot_dir: str) -> None:
+    from starward.server import StarwardServer
+
+    server = StarwardServer(port=PORT, snapshot_dir=snapshot_dir, namespace_dir=snapshot_dir)
+    import uvicorn
+
+    uvicorn.run(server.app, host="127.0.0.1", port=PORT, log_level="warning")
+
+
+def wait_ready() -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{ENDPOINT}/health")
+            return
+        except httpx.TransportError:
+            time.sleep(0.05)
+    raise RuntimeError("Server did not start")
+
+
+def measure(operation: Callable[[int], object], iterations: int = ITERATIONS) -> List[float]:
+    """Per-call latencies in milliseconds."""
+    for i in range(min(iterations, 50)):
+        operation(i)  # warm up connections
+    timings = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        operation(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run_suite() -> Dict[str, List[float]]:
+    options = {
+        "endpoint_url": ENDPOINT,
+        "region_name": "us-east-1",
+        "aws_access_key_id": "test",
+        "aws_secret_access_key": "test",
+    }
+    s3 = boto3.client("s3", config=Config(s3={"addressing_style": "path"}), **options)
+    sqs = boto3.client("sqs", **options)
+    native = httpx.Client(base_url=ENDPOINT)
+
+    s3.create_bucket(Bucket="bench")
+    for i in range(LIST_KEYS):
+        s3.put_object(Bucket="bench", Key=f"list/{i:05d}", Body=b"")
+    url = sqs.create_queue(QueueName="bench")["QueueUrl"]
+
+    results = {
+        "S3 PutObject (1 KiB)": measure(
+            lambda i: s3.put_object(Bucket="bench", Key=f"k{i}", Body=PAYLOAD)
+        ),
+        "S3 GetObject (1 KiB)": measure(
+            lambda i: s3.get_object(Bucket="bench", Key=f"k{i}")["Body"].read()
+        ),
+        "S3 HeadObject": measure(lambda i: s3.head_object(Bucket="bench", Key=f"k{i}")),
+        f"S3 ListObjectsV2 ({LIST_KEYS} keys)": measure(
+            lambda i: s3.list_objects_v2(Bucket="bench", Prefix="list/"), 200
+        ),
+        "SQS SendMessage": measure(lambda i: sqs.send_message(QueueUrl=url, MessageBody=str(i))),
+        "SQS ReceiveMessage + Delete": measure(
+            lambda i: [
+                sqs.delete_message(QueueUrl=url, ReceiptHandle=m["ReceiptHandle"])
+                for m in sqs.receive_message(QueueUrl=url).get("Messages", [])
+            ]
+        ),
+        # The bespoke JSON API, for comparison.
+        "native PUT object (1 KiB)": measure(
+            lambda i: native.put(f"/s3/buckets/bench/objects/n{i}", content=PAYLOAD)
+        ),
+        "native POST message": measure(
+            lambda i: native.post(
+                "/sqs/messages", json={"queue_name": "bench", "message_body": str(i)}
+            )
+        ),
+    }
+    native.close()
+    return results
+
+
+async def run_benchmarks() -> None:
+    """Start the server in another process and time SDK calls against it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        process = multiprocessing.Process(target=serve, args=(tmp,), daemon=True)
+        process.start()
+        try:
+            wait_ready()
+            results = run_suite()
+        finally:
+            process.terminate()
+            process.join()
+
+    print("\n" + "=" * 78)
+    print("AWS SDK BENCHMARK (boto3, one client, sequential calls)")
+    print("=" * 78)
+    print(f"{'Operation':<34} | {'Mean ms':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'Ops/sec':>8}")
+    print("-" * 78)
+    for name, timings in results.items():
+        ordered = sorted(timings)
+        mean = statistics.mean(timings)
+        print(
+            f"{name:<34} | {mean:>8.3f} | {ordered[len(ordered) // 2]:>8.3f} "
+            f"| {ordered[int(len(ordered) * 0.99)]:>8.3f} | {1000 / mean:>8.0f}"
+        )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
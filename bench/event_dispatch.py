@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark EventBus.publish latency as subscribers are added.
+
+Every subscriber is slow (it sleeps for a millisecond per event). With
+serial dispatch the publisher waits for all of them; with asynchronous
+dispatch it only queues the event.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import List
+
+from starward.core.event_bus import Event, EventBus
+
+SUBSCRIBERS = [0, 1, 10, 100]
+EVENTS = 2_000
+SERIAL_EVENTS = 20
+HANDLER_DELAY = 0.001
+
+
+async def slow_handler(event: Event) -> None:
+    await asyncio.sleep(HANDLER_DELAY)
+
+
+async def publish_latency(subscribers: int, asynchronous: bool, events: int) -> float:
+    """Mean publish latency in microseconds."""
+    bus = EventBus(asynchronous=asynchronous, queue_size=events)
+    for _ in range(subscribers):
+        bus.subscribe("bucket.*", slow_handler)
+    timings: List[float] = []
+    for i in range(events):
+        event = Event("bucket.created", "s3", {"bucket": f"b{i}"})
+        start = time.perf_counter()
+        await bus.publish(event)
+        timings.append(time.perf_counter() - start)
+    await bus.close()
+    return statistics.mean(timings) * 1e6
+
+
+async def run_benchmarks() -> None:
+    """Compare serial and asynchronous dispatch."""
+    print("\n" + "=" * 60)
+    print(f"EVENT DISPATCH BENCHMARK (handlers sleep {HANDLER_DELAY * 1000:.0f} ms, mean us/publish)")
+    print("=" * 60)
+    print(f"{'Subscribers':>12} | {'Serial':>14} | {'Asynchronous':>14}")
+    print("-" * 60)
+    for subscribers in SUBSCRIBERS:
+        serial = await publish_latency(subscribers, False, SERIAL_EVENTS)
+        queued = await publish_latency(subscribers, True, EVENTS)
+        print(f"{subscribers:>12} | {serial:>14,.1f} | {queued:>14,.1f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
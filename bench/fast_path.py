@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Compare requests/sec of the data-plane fast path with the FastAPI routes.
+
+Requests are fed straight into the ASGI app, so the numbers measure the
+server's per-request CPU without any HTTP parsing or client overhead.
+"""
+
+import asyncio
+import json
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from starlette.types import Message
+
+from starward.server import StarwardServer
+
+REQUESTS = 10_000
+PAYLOAD = "x" * 256
+
+Request = Tuple[str, str, bytes, bytes, List[Tuple[bytes, bytes]]]
+
+
+def json_request(method: str, path: str, body: Dict[str, Any]) -> Request:
+    return method, path, b"", json.dumps(body).encode(), [(b"content-type", b"application/json")]
+
+
+ROUTES: Dict[str, Callable[[int], Request]] = {
+    "POST /s3/objects": lambda i: json_request(
+        "POST", "/s3/objects", {"bucket_name": "bench", "key": f"k{i}", "data": PAYLOAD}
+    ),
+    "PUT object": lambda i: (
+        "PUT", f"/s3/buckets/bench/objects/p{i}", b"", PAYLOAD.encode(), []
+    ),
+    "GET object": lambda i: ("GET", f"/s3/buckets/bench/objects/k{i}", b"", b"", []),
+    "POST /sqs/messages": lambda i: json_request(
+        "POST", "/sqs/messages", {"queue_name": "bench", "message_body": PAYLOAD}
+    ),
+    "GET /sqs/messages": lambda i: (
+        "GET", "/sqs/messages", b"queue_name=bench&max_messages=1", b"", []
+    ),
+}
+
+
+async def call(app: Any, request: Request) -> int:
+    """Send one request through the ASGI app and return its status."""
+    method, path, query, body, headers = request
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query,
+        "headers": [(b"host", b"bench"), (b"content-length", str(len(body)).encode()), *headers],
+        "client": ("127.0.0.1", 1),
+        "server": ("127.0.0.1", 4566),
+    }
+    status = 0
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            await asyncio.Future()  # the client never disconnects
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def requests_per_second(fast_path: bool) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        server = StarwardServer(snapshot_dir=tmp, fast_path=fast_path)
+        await server.startup()
+        await server.s3_service.create_bucket("bench")
+        await server.sqs_service.create_queue("bench")
+        results = {}
+        for name, make in ROUTES.items():
+            requests = [make(i) for i in range(REQUESTS)]
+            start = time.perf_counter()
+            for request in requests:
+                status = await call(server.app, request)
+                assert status == 200, (name, status)
+            results[name] = REQUESTS / (time.perf_counter() - start)
+        await server.shutdown()
+    return results
+
+
+async def run_benchmarks() -> None:
+    """Measure each hot route with and without the fast path."""
+    baseline = await requests_per_second(fast_path=False)
+    fast = await requests_per_second(fast_path=True)
+
+    print("\n" + "=" * 66)
+    print(f"DATA-PLANE FAST PATH ({REQUESTS:,} requests per route, requests/sec)")
+    print("=" * 66)
+    print(f"{'Route':<22} | {'FastAPI':>10} | {'Fast path':>10} | {'Speedup':>8}")
+    print("-" * 66)
+    for name in ROUTES:
+        print(
+            f"{name:<22} | {baseline[name]:>10,.0f} | {fast[name]:>10,.0f} "
+            f"| {fast[name] / baseline[name]:>7.1f}x"
+        )
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark copy-on-write forks of a large baseline snapshot."""
+
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+
+BASELINE_BYTES = 1024 * 1024 * 1024
+OBJECT_SIZE = 1024 * 1024
+BUCKET_COUNT = 16
+FORK_COUNT = 1_000
+
+
+def rss_mib() -> float:
+    """Current resident set size in MiB (Linux), or peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def build_baseline(engine: StateEngine) -> None:
+    """Fill the engine with BASELINE_BYTES of objects and snapshot it in memory."""
+    s3 = MockS3Service(engine)
+    for b in range(BUCKET_COUNT):
+        await s3.create_bucket(f"bucket-{b:02d}")
+    for i in range(BASELINE_BYTES // OBJECT_SIZE):
+        await s3.put_object(f"bucket-{i % BUCKET_COUNT:02d}", f"key-{i:06d}", os.urandom(OBJECT_SIZE))
+    await engine.create_snapshot("baseline", persist=False)
+
+
+async def run_benchmarks() -> None:
+    """Fork FORK_COUNT environments, then write one object into each."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = StateEngine(os.path.join(tmp, "baseline"))
+        print(f"Building {BASELINE_BYTES / (1024 ** 3):.1f} GiB baseline...")
+        await build_baseline(engine)
+        baseline_rss = rss_mib()
+
+        start = time.perf_counter()
+        forks: List[StateEngine] = []
+        for i in range(FORK_COUNT):
+            forks.append(await engine.fork("baseline", os.path.join(tmp, f"fork-{i:04d}")))
+        fork_seconds = time.perf_counter() - start
+        forked_rss = rss_mib()
+
+        start = time.perf_counter()
+        for i, fork in enumerate(forks):
+            await MockS3Service(fork).put_object("bucket-00", f"fork-{i:04d}", b"x" * 1024)
+        write_seconds = time.perf_counter() - start
+        written_rss = rss_mib()
+
+        print("\n" + "=" * 78)
+        print(f"FORK BENCHMARK ({FORK_COUNT:,} forks of a {BASELINE_BYTES // (1024 ** 2):,} MiB baseline)")
+        print("=" * 78)
+        print(f"{'Phase':<28} | {'Total s':>9} | {'Per fork us':>11} | {'RSS delta MiB':>13}")
+        print("-" * 78)
+        print(
+            f"{'Fork':<28} | {fork_seconds:>9.3f} | {fork_seconds / FORK_COUNT * 1e6:>11.1f} "
+            f"| {forked_rss - baseline_rss:>13.1f}"
+        )
+        print(
+            f"{'First write in each fork':<28} | {write_seconds:>9.3f} "
+            f"| {write_seconds / FORK_COUNT * 1e6:>11.1f} | {written_rss - forked_rss:>13.1f}"
+        )
+        print("-" * 78)
+        print(f"Baseline RSS: {baseline_rss:,.0f} MiB; full copies would need {FORK_COUNT:,}x that.")
+        print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Benchmark journaled mutations and journal replay throughput."""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from starward.core.journal import OperationJournal
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+OPERATION_COUNTS = [10_000, 100_000]
+PAYLOAD = b"x" * 512
+
+
+async def write_journal(path: Path, operations: int, journaled: bool) -> float:
+    """Run a mixed S3/SQS workload and return ops/sec including the final fsync."""
+    engine = StateEngine(str(path.parent / "snapshots"))
+    journal = OperationJournal(path) if journaled else None
+    engine.attach_journal(journal)
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    await s3.create_bucket("bench")
+    await sqs.create_queue("bench")
+
+    start = time.perf_counter()
+    for i in range(operations // 4):
+        await s3.put_object("bench", f"key-{i:08d}", PAYLOAD)
+        await sqs.send_message("bench", f"message {i}")
+        received = await sqs.receive_messages("bench")
+        await sqs.delete_message("bench", received[0]["receipt_handle"])
+    if journal is not None:
+        await journal.close()
+    return operations / (time.perf_counter() - start)
+
+
+async def replay(path: Path) -> Tuple[int, float]:
+    """Replay a journal into a fresh engine and return (operations, ops/sec)."""
+    engine = StateEngine(str(path.parent / "replay"))
+    MockS3Service(engine)
+    MockSQSService(engine)
+
+    start = time.perf_counter()
+    count = await engine.replay(OperationJournal(path).read())
+    return count, count / (time.perf_counter() - start)
+
+
+async def run_benchmarks() -> None:
+    """Compare workload throughput with and without the journal, then replay."""
+    print("\n" + "=" * 78)
+    print("OPERATION JOURNAL BENCHMARK (ops/sec)")
+    print("=" * 78)
+    print(
+        f"{'Operations':>10} | {'No journal':>12} | {'Journaled':>12} "
+        f"| {'Replay':>12} | {'Journal MiB':>11}"
+    )
+    print("-" * 78)
+
+    for operations in OPERATION_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "journal.log"
+            baseline = await write_journal(Path(tmp) / "unused.log", operations, journaled=False)
+            journaled = await write_journal(path, operations, journaled=True)
+            count, replay_rate = await replay(path)
+            size = path.stat().st_size / (1024 * 1024)
+            print(
+                f"{count:>10,} | {baseline:>12,.0f} | {journaled:>12,.0f} "
+                f"| {replay_rate:>12,.0f} | {size:>11.1f}"
+            )
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
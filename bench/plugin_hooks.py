@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark the overhead of plugin hooks on cheap service operations.
+
+"Compiled" calls the hooked operation, which looks up the precompiled
+pipeline for (service, action). "Per-call loop" wraps the unhooked
+operation in the previous approach: iterate every plugin, check that it
+is enabled and await both of its hooks. In the last row every plugin
+hooks only SQS actions, so the S3 operation has no pipeline.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from starward.core.plugins import Plugin, PluginManager
+from starward.services.s3 import MockS3Service
+
+CALLS = 50_000
+ROUNDS = 5
+# (label, plugins, actions hooked by each plugin, use a plugin manager)
+SCENARIOS = [
+    ("no plugin manager", 0, None, False),
+    ("0 plugins", 0, None, True),
+    ("1 plugin", 1, None, True),
+    ("20 plugins", 20, None, True),
+    ("20 plugins, sqs only", 20, ["sqs.*"], True),
+]
+
+
+class NoOpPlugin(Plugin):
+    """Hooks every action and does nothing."""
+
+    def __init__(self, name: str, actions: Optional[List[str]]) -> None:
+        self.name = name
+        self.actions = actions
+
+    async def on_pre_action(self, service: str, action: str, params: Dict[str, Any]) -> None:
+        pass
+
+    async def on_post_action(self, service: str, action: str, params: Dict[str, Any], result: Any) -> None:
+        pass
+
+
+async def per_call_loop(manager: PluginManager, service: MockS3Service) -> Any:
+    """One head_object call with hooks dispatched the uncompiled way."""
+    params = {"bucket_name": "bench-bucket", "key": "key"}
+    for name, plugin in manager._plugins.items():
+        if manager._enabled.get(name, False):
+            await plugin.on_pre_action("s3", "head_object", params)
+    result = await MockS3Service.head_object.__wrapped__(service, "bench-bucket", "key")  # type: ignore[attr-defined]
+    for name, plugin in manager._plugins.items():
+        if manager._enabled.get(name, False):
+            await plugin.on_post_action("s3", "head_object", params, result)
+    return result
+
+
+async def benchmark_scenario(plugins: int, actions: Optional[List[str]], managed: bool) -> Dict[str, float]:
+    """Mean nanoseconds per head_object call, compiled and per-call loop."""
+    manager = PluginManager()
+    for i in range(plugins):
+        await manager.register_plugin(NoOpPlugin(f"plugin-{i}", actions))
+    service = MockS3Service(plugins=manager if managed else None)
+    await service.create_bucket("bench-bucket")
+    await service.put_object("bench-bucket", "key", b"x")
+
+    compiled: List[float] = []
+    looped: List[float] = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            await service.head_object("bench-bucket", "key")
+        compiled.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            await per_call_loop(manager, service)
+        looped.append(time.perf_counter() - start)
+    return {
+        "compiled": statistics.median(compiled) / CALLS * 1e9,
+        "looped": statistics.median(looped) / CALLS * 1e9,
+    }
+
+
+async def run_benchmarks() -> None:
+    """Measure hook overhead across plugin counts."""
+    print("\n" + "=" * 66)
+    print(f"PLUGIN HOOK BENCHMARK (s3.head_object, {CALLS:,} calls, median ns/op)")
+    print("=" * 66)
+    print(f"{'Scenario':>22} | {'Compiled':>12} | {'Per-call loop':>14}")
+    print("-" * 66)
+    for label, plugins, actions, managed in SCENARIOS:
+        stats = await benchmark_scenario(plugins, actions, managed)
+        print(f"{label:>22} | {stats['compiled']:>12,.0f} | {stats['looped']:>14,.0f}")
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark S3 list latency against bucket size and object size."""
+
+import asyncio
+import time
+import statistics
+from typing import List
+
+from starward.services.s3 import MockS3Service
+
+BUCKET_SIZES = [1_000, 10_000, 50_000]
+OBJECT_SIZES = [1024, 64 * 1024, 4 * 1024 * 1024]
+ITERATIONS = 5
+
+
+async def benchmark_list(bucket_size: int, object_size: int, iterations: int = ITERATIONS) -> float:
+    """Return median list_objects latency in milliseconds."""
+    # Keep every payload in memory so the benchmark measures listing only.
+    service = MockS3Service(spool_threshold=object_size)
+    await service.create_bucket("bench-bucket")
+
+    # Hash the payload once and copy it, so large buckets stay cheap to build.
+    await service.put_object("bench-bucket", "key-00000000", b"x" * object_size)
+    for i in range(1, bucket_size):
+        await service.copy_object("bench-bucket", "key-00000000", "bench-bucket", f"key-{i:08d}")
+
+    timings: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await service.list_objects("bench-bucket")
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
+
+
+async def run_benchmarks() -> None:
+    """Run the list benchmark across bucket and object sizes."""
+    print("\n" + "=" * 70)
+    print("S3 LIST BENCHMARK (median ms per list_objects call)")
+    print("=" * 70)
+    header = f"{'Objects':>10} | " + " | ".join(f"{size // 1024:>8} KiB" for size in OBJECT_SIZES)
+    print(header)
+    print("-" * 70)
+
+    for bucket_size in BUCKET_SIZES:
+        cells = []
+        for object_size in OBJECT_SIZES:
+            cells.append(f"{await benchmark_list(bucket_size, object_size):>12.2f}")
+        print(f"{bucket_size:>10,} | " + " | ".join(cells))
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
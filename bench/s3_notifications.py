@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark S3 object writes fanning out into SQS queues as notifications.
+
+Concurrent writers put small objects into one bucket; its notification
+configuration routes them to one or more queues. "Write" is the time
+until every put returned, "Total" until every notification was
+enqueued. A delivery batch of 1 takes the queue lock once per message.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+from starward.services.s3_notifications import DELIVERY_BATCH_SIZE, BucketNotifier
+from starward.services.sqs import MockSQSService
+
+OBJECTS = 100_000
+WRITERS = 16
+# (label, queues, delivery batch size); no queues means no notifications.
+SCENARIOS = [
+    ("no notifications", 0, DELIVERY_BATCH_SIZE),
+    ("1 queue, unbatched", 1, 1),
+    ("1 queue", 1, DELIVERY_BATCH_SIZE),
+    ("4 queues", 4, DELIVERY_BATCH_SIZE),
+]
+
+
+async def benchmark_scenario(queues: int, batch_size: int, objects: int = OBJECTS) -> Dict[str, float]:
+    """Write ``objects`` objects and wait for their notifications."""
+    engine = StateEngine()
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    notifier: Optional[BucketNotifier] = None
+    await s3.create_bucket("bench-bucket")
+    if queues:
+        notifier = s3.notifier = BucketNotifier(sqs, batch_size)
+        configurations = []
+        for i in range(queues):
+            await sqs.create_queue(f"bench-queue-{i}")
+            configurations.append({"queue": f"bench-queue-{i}", "events": ["s3:ObjectCreated:*"]})
+        await s3.put_bucket_notification("bench-bucket", configurations)
+
+    async def writer(n: int) -> None:
+        for i in range(n, objects, WRITERS):
+            await s3.put_object("bench-bucket", f"data/{i:08d}.json", b"{}")
+            if i % 64 < WRITERS:
+                await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(n) for n in range(WRITERS)))
+    written = time.perf_counter() - start
+    if notifier is not None:
+        await notifier.drain()
+    total = time.perf_counter() - start
+
+    enqueued = 0
+    for name in sqs.queues:
+        enqueued += (await sqs.get_queue_attributes(name))["ApproximateNumberOfMessages"]
+    assert enqueued == objects * queues, (enqueued, objects * queues)
+    return {"write": written, "total": total, "enqueued": enqueued}
+
+
+async def run_benchmarks() -> None:
+    """Compare notification fan-out configurations."""
+    print("\n" + "=" * 78)
+    print(f"S3 NOTIFICATION BENCHMARK ({OBJECTS:,} objects, {WRITERS} writers)")
+    print("=" * 78)
+    print(f"{'Scenario':>20} | {'Write (s)':>10} | {'Total (s)':>10} | {'Objects/s':>10} | {'Messages':>10}")
+    print("-" * 78)
+    for label, queues, batch_size in SCENARIOS:
+        stats = await benchmark_scenario(queues, batch_size)
+        print(
+            f"{label:>20} | {stats['write']:>10.2f} | {stats['total']:>10.2f} | "
+            f"{OBJECTS / stats['total']:>10,.0f} | {stats['enqueued']:>10,.0f}"
+        )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
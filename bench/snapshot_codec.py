@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Benchmark snapshot codecs: write/read throughput and size."""
+
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, Tuple
+
+from starward.core.codec import get_codec, list_codecs
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+OBJECT_COUNT = 100_000
+BUCKET_COUNT = 10
+OBJECT_SIZE = 256
+QUEUE_COUNT = 10
+MESSAGES_PER_QUEUE = 1_000
+
+
+async def build_state(engine: StateEngine) -> None:
+    """Fill the engine with a synthetic S3/SQS environment."""
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    per_bucket = OBJECT_COUNT // BUCKET_COUNT
+    for b in range(BUCKET_COUNT):
+        bucket = f"bucket-{b:02d}"
+        await s3.create_bucket(bucket)
+        for i in range(per_bucket):
+            payload = os.urandom(OBJECT_SIZE // 2) * 2
+            await s3.put_object(bucket, f"data/{i:08d}.bin", payload, metadata={"index": str(i)})
+    for q in range(QUEUE_COUNT):
+        queue = f"queue-{q:02d}"
+        await sqs.create_queue(queue)
+        for i in range(MESSAGES_PER_QUEUE):
+            await sqs.send_message(queue, f'{{"event": "put", "seq": {i}}}')
+
+
+def benchmark_codec(name: str, engine: StateEngine) -> Tuple[float, float, int]:
+    """Return (encode seconds, decode seconds, encoded bytes) for every page."""
+    codec = get_codec(name)
+    pages = {key: engine.get_state(key) for key in engine.state_keys()}
+
+    start = time.perf_counter()
+    encoded: Dict[str, bytes] = {key: codec.encode(page) for key, page in pages.items()}
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in encoded.values():
+        codec.decode(data)
+    decode_time = time.perf_counter() - start
+
+    return encode_time, decode_time, sum(len(data) for data in encoded.values())
+
+
+async def benchmark_roundtrip(name: str, engine: StateEngine) -> Tuple[float, float]:
+    """Return (create_snapshot seconds, restore seconds) through the chunk store."""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = StateEngine(tmp, codec=name)
+        for key in engine.state_keys():
+            writer.set_state(key, engine.get_state(key))
+
+        start = time.perf_counter()
+        await writer.create_snapshot("bench")
+        write_time = time.perf_counter() - start
+
+        reader = StateEngine(tmp, codec=name)
+        start = time.perf_counter()
+        await reader.restore_snapshot("bench")
+        read_time = time.perf_counter() - start
+
+    return write_time, read_time
+
+
+async def run_benchmarks() -> None:
+    """Compare every registered codec on the same synthetic state."""
+    engine = StateEngine()
+    print(f"Building state: {OBJECT_COUNT:,} objects, {QUEUE_COUNT * MESSAGES_PER_QUEUE:,} messages...")
+    await build_state(engine)
+
+    print("\n" + "=" * 78)
+    print(f"SNAPSHOT CODEC BENCHMARK ({OBJECT_COUNT:,} objects)")
+    print("=" * 78)
+    print(
+        f"{'Codec':<14} | {'Size MiB':>9} | {'Enc MiB/s':>9} | {'Dec MiB/s':>9} "
+        f"| {'Snapshot s':>10} | {'Restore s':>9}"
+    )
+    print("-" * 78)
+
+    for name in list_codecs():
+        encode_time, decode_time, size = benchmark_codec(name, engine)
+        write_time, read_time = await benchmark_roundtrip(name, engine)
+        mib = size / (1024 * 1024)
+        print(
+            f"{name:<14} | {mib:>9.1f} | {mib / encode_time:>9.1f} | {mib / decode_time:>9.1f} "
+            f"| {write_time:>10.2f} | {read_time:>9.2f}"
+        )
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
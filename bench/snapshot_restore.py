@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark eager vs lazy snapshot restore: latency and resident memory."""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+
+BUCKET_COUNT = 50
+OBJECTS_PER_BUCKET = 4_000
+OBJECT_SIZE = 256
+
+
+def rss_mib() -> float:
+    """Current resident set size in MiB (Linux), or peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def build_snapshot(snapshot_dir: str) -> None:
+    """Persist a snapshot with many buckets of small objects."""
+    engine = StateEngine(snapshot_dir)
+    s3 = MockS3Service(engine)
+    payload = os.urandom(OBJECT_SIZE)
+    for b in range(BUCKET_COUNT):
+        bucket = f"bucket-{b:02d}"
+        await s3.create_bucket(bucket)
+        await s3.put_object(bucket, "key-00000000", payload)
+        for i in range(1, OBJECTS_PER_BUCKET):
+            await s3.copy_object(bucket, "key-00000000", bucket, f"key-{i:08d}")
+    await engine.create_snapshot("large")
+    await engine.close()
+
+
+async def measure_restore(snapshot_dir: str, lazy: bool) -> Dict[str, float]:
+    """Restore in this process and report timings and memory."""
+    baseline = rss_mib()
+    engine = StateEngine(snapshot_dir)
+    s3 = MockS3Service(engine)
+
+    start = time.perf_counter()
+    await engine.restore_snapshot("large", lazy=lazy)
+    restore_ms = (time.perf_counter() - start) * 1000
+    restored_rss = rss_mib() - baseline
+
+    start = time.perf_counter()
+    await s3.get_object("bucket-00", "key-00000001")
+    first_access_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "restore_ms": restore_ms,
+        "first_access_ms": first_access_ms,
+        "rss_mib": restored_rss,
+        "rss_after_access_mib": rss_mib() - baseline,
+    }
+
+
+async def run_benchmarks() -> None:
+    """Build one snapshot and restore it eagerly and lazily in fresh processes."""
+    objects = BUCKET_COUNT * OBJECTS_PER_BUCKET
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        print(f"Building snapshot: {BUCKET_COUNT} buckets, {objects:,} objects...")
+        await build_snapshot(snapshot_dir)
+
+        print("\n" + "=" * 78)
+        print(f"SNAPSHOT RESTORE BENCHMARK ({objects:,} objects)")
+        print("=" * 78)
+        print(f"{'Mode':<8} | {'Restore ms':>11} | {'1st get ms':>11} | {'RSS MiB':>9} | {'RSS after get':>13}")
+        print("-" * 78)
+        for mode in ("eager", "lazy"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", mode, snapshot_dir],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(output)
+            print(
+                f"{mode:<8} | {r['restore_ms']:>11.1f} | {r['first_access_ms']:>11.1f} "
+                f"| {r['rss_mib']:>9.1f} | {r['rss_after_access_mib']:>13.1f}"
+            )
+        print("=" * 78)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        result = asyncio.run(measure_restore(sys.argv[3], lazy=sys.argv[2] == "lazy"))
+        print(json.dumps(result))
+    else:
+        asyncio.run(run_benchmarks())
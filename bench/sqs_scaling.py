@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark SQS per-operation latency as queue depth grows."""
+
+import asyncio
+import time
+import statistics
+from typing import Dict, List
+
+from starward.services.sqs import MockSQSService
+
+QUEUE_DEPTHS = [1_000, 10_000, 100_000, 1_000_000]
+OPERATIONS = 2_000
+
+
+async def benchmark_depth(depth: int, operations: int = OPERATIONS) -> Dict[str, float]:
+    """Measure mean send/receive/delete latency (microseconds) at a given depth."""
+    service = MockSQSService()
+    await service.create_queue("bench-queue")
+    for i in range(depth):
+        await service.send_message("bench-queue", f"message-{i}")
+
+    send: List[float] = []
+    receive: List[float] = []
+    delete: List[float] = []
+
+    for i in range(operations):
+        start = time.perf_counter()
+        await service.send_message("bench-queue", f"extra-{i}")
+        send.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        messages = await service.receive_messages("bench-queue")
+        receive.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await service.delete_message("bench-queue", messages[0]["receipt_handle"])
+        delete.append(time.perf_counter() - start)
+
+    return {
+        "send": statistics.mean(send) * 1e6,
+        "receive": statistics.mean(receive) * 1e6,
+        "delete": statistics.mean(delete) * 1e6,
+    }
+
+
+async def run_benchmarks() -> None:
+    """Run the scaling benchmark across all queue depths."""
+    print("\n" + "=" * 70)
+    print(f"SQS SCALING BENCHMARK ({OPERATIONS} ops per depth, mean us/op)")
+    print("=" * 70)
+    print(f"{'Depth':>12} | {'Send':>10} | {'Receive':>10} | {'Delete':>10}")
+    print("-" * 70)
+
+    for depth in QUEUE_DEPTHS:
+        stats = await benchmark_depth(depth)
+        print(
+            f"{depth:>12,} | {stats['send']:>10.2f} | "
+            f"{stats['receive']:>10.2f} | {stats['delete']:>10.2f}"
+        )
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark time-travel restore: worst-case seek time against journal length."""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from starward.core.journal import OperationJournal
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+LOG_LENGTHS = [10_000, 50_000, 200_000]
+CHECKPOINT_INTERVAL = 2_000
+BUCKET_COUNT = 20
+# Writes cycle over a fixed key space, so the state size stays constant as the log grows.
+KEY_SPACE = 5_000
+PAYLOAD = b"x" * 256
+
+
+async def build_journal(root: Path, operations: int) -> None:
+    """Write a journal of S3 overwrites and SQS traffic with periodic checkpoints."""
+    engine = StateEngine(str(root / "snapshots"))
+    journal = OperationJournal(root / "journal.log")
+    engine.attach_journal(journal, checkpoint_interval=CHECKPOINT_INTERVAL)
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    for b in range(BUCKET_COUNT):
+        await s3.create_bucket(f"bucket-{b:02d}")
+    await sqs.create_queue("events")
+
+    for i in range(operations - BUCKET_COUNT - 1):
+        if i % 4 == 3:
+            await sqs.send_message("events", f"event {i}")
+        elif i % 4 == 2 and i > 8:
+            messages = await sqs.receive_messages("events")
+            await sqs.delete_message("events", messages[0]["receipt_handle"])
+        else:
+            key = i % KEY_SPACE
+            await s3.put_object(f"bucket-{key % BUCKET_COUNT:02d}", f"key-{key:08d}", PAYLOAD)
+    await engine.close()
+    await journal.close()
+
+
+async def seek(root: Path, seq: int, checkpoints: bool) -> Tuple[float, float, int]:
+    """Restore journal position ``seq`` in a fresh engine.
+
+    Returns the time to open (index) the journal, the seek time in
+    milliseconds and the number of records replayed.
+    """
+    # Without checkpoints, point the engine at an empty snapshot directory.
+    snapshot_dir = root / ("snapshots" if checkpoints else "empty")
+    engine = StateEngine(str(snapshot_dir))
+    MockS3Service(engine)
+    MockSQSService(engine)
+
+    start = time.perf_counter()
+    engine.attach_journal(OperationJournal(root / "journal.log", read_only=True))
+    open_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    point = await engine.restore_at(seq=seq)
+    seek_ms = (time.perf_counter() - start) * 1000
+    await engine.close()
+    return open_ms, seek_ms, point.replayed
+
+
+async def run_benchmarks() -> None:
+    """Seek to the position just before the last checkpoint, with and without checkpoints."""
+    print("\n" + "=" * 78)
+    print(f"TIME-TRAVEL SEEK BENCHMARK (checkpoint every {CHECKPOINT_INTERVAL:,} ops)")
+    print("=" * 78)
+    print(
+        f"{'Log length':>10} | {'Open ms':>8} | {'Seek ms':>8} | {'Replayed':>8} "
+        f"| {'No checkpoints ms':>17} | {'Replayed':>8}"
+    )
+    print("-" * 78)
+
+    for operations in LOG_LENGTHS:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            await build_journal(root, operations)
+            # Worst case: one record short of the next checkpoint.
+            target = operations - operations % CHECKPOINT_INTERVAL - 1
+            open_ms, seek_ms, replayed = await seek(root, target, checkpoints=True)
+            _, full_ms, full_replayed = await seek(root, target, checkpoints=False)
+            print(
+                f"{operations:>10,} | {open_ms:>8.1f} | {seek_ms:>8.1f} | {replayed:>8,} "
+                f"| {full_ms:>17.1f} | {full_replayed:>8,}"
+            )
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmarks())
@@ -6,7 +6,7 @@ import time
 import random
 from typing import List
 
-from starward.core.plugins import Plugin
+from starward.core.plugins import Plugin, PluginManager
 from starward.services.s3 import MockS3Service
 from starward.core.state_engine import StateEngine
 
@@ -34,14 +34,13 @@ async def run_chaos_test() -> None:
     print("CHAOS ENGINEERING TEST - Latency Injection")
     print("=" * 70)
 
-    # Setup
+    # Setup: the plugin's hooks run around every S3 operation
+    plugins = PluginManager()
+    await plugins.register_plugin(LatencyInjectorPlugin(min_delay=0.01, max_delay=0.05))
     engine = StateEngine()
-    service = MockS3Service(engine)
+    service = MockS3Service(engine, plugins=plugins)
     await service.start()
 
-    plugin = LatencyInjectorPlugin(min_delay=0.01, max_delay=0.05)
-    await plugin.on_register()
-
     # Test operations with latency injection
     timings: List[float] = []
     errors = 0
@@ -53,9 +52,6 @@ async def run_chaos_test() -> None:
         bucket_name = f"chaos-bucket-{i}"
 
         try:
-            # Simulate pre-action hook
-            await plugin.on_pre_action("s3", "create_bucket", {"bucket": bucket_name})
-
             start = time.perf_counter()
             await service.create_bucket(bucket_name)
             end = time.perf_counter()
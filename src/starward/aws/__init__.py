@@ -0,0 +1 @@
+"""AWS wire protocols served on top of the mock services."""
@@ -0,0 +1,57 @@
+"""Routes requests made by AWS SDKs to the AWS protocol handlers."""
+
+from typing import Callable
+
+from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from starward.aws.s3 import S3RestApi
+from starward.aws.sqs import SqsJsonApi
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+# Headers only present on requests signed (or targeted) the AWS way.
+_AWS_HEADERS = frozenset({b"x-amz-target", b"x-amz-date", b"x-amz-content-sha256"})
+
+
+def is_aws_request(scope: Scope) -> bool:
+    """Whether a request comes from an AWS SDK rather than the native JSON API."""
+    for name, value in scope["headers"]:
+        if name in _AWS_HEADERS:
+            return True
+        if name == b"authorization" and value.startswith(b"AWS4-HMAC-SHA256"):
+            return True
+    # Presigned URLs carry the signature in the query string.
+    return b"X-Amz-Signature=" in scope["query_string"]
+
+
+class AwsGateway:
+    """Serves the S3 REST and SQS JSON protocols next to the native API.
+
+    AWS SDK requests are recognized by their SigV4 signing headers (or an
+    ``X-Amz-Target``), so SDKs and the CLI can use the server as an
+    endpoint URL while every other request reaches the native routes.
+    Requests with an ``X-Amz-Target`` header go to SQS, all others to S3.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        s3: Callable[[], MockS3Service],
+        sqs: Callable[[], MockSQSService],
+    ) -> None:
+        self.app = app
+        self.s3 = S3RestApi(s3)
+        self.sqs = SqsJsonApi(sqs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not is_aws_request(scope):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        if "x-amz-target" in request.headers:
+            response = await self.sqs.handle(request)
+        else:
+            response = await self.s3.handle(request)
+        await response(scope, receive, send)
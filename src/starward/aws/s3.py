@@ -0,0 +1,433 @@
+"""S3 REST API: path-style requests with raw bodies and XML responses."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+import uuid
+import xml.etree.ElementTree as ElementTree
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from starward.aws.sqs import ACCOUNT_ID, REGION
+from starward.aws.xml import CHUNK_SIZE, XmlWriter, timestamp
+from starward.services.blob_store import READ_CHUNK_SIZE
+from starward.services.s3 import DEFAULT_CONTENT_TYPE, InvalidRangeError, MockS3Service
+
+XML_MEDIA_TYPE = "application/xml"
+# Service error message prefix -> (HTTP status, S3 error code).
+_ERRORS: List[Tuple[str, int, str]] = [
+    ("Bucket not found", 404, "NoSuchBucket"),
+    ("Object not found", 404, "NoSuchKey"),
+    ("Bucket already exists", 409, "BucketAlreadyOwnedByYou"),
+    ("Bucket not empty", 409, "BucketNotEmpty"),
+]
+# Notification destinations other than SQS queues.
+_UNSUPPORTED_NOTIFICATIONS = (
+    "TopicConfiguration", "CloudFunctionConfiguration", "LambdaFunctionConfiguration",
+    "EventBridgeConfiguration",
+)
+# Bucket and object sub-resources this emulator does not implement.
+_UNSUPPORTED = {
+    "acl", "cors", "encryption", "lifecycle", "logging", "object-lock",
+    "policy", "replication", "tagging", "uploadId", "uploads", "versioning", "versions", "website",
+}
+
+
+class S3Error(Exception):
+    """An S3 error response."""
+
+    def __init__(self, status: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class S3RestApi:
+    """Serves the S3 REST API from the S3 service of the current namespace.
+
+    Requests are path-style (``/<bucket>/<key>``). Signatures are not
+    verified. ``aws-chunked`` uploads are decoded; their checksums are not
+    checked.
+    """
+
+    def __init__(self, service: Callable[[], MockS3Service]) -> None:
+        self._service = service
+
+    async def handle(self, request: Request) -> Response:
+        """Answer one S3 request."""
+        path: str = request.scope["path"]
+        bucket, _, key = path.lstrip("/").partition("/")
+        try:
+            unsupported = _UNSUPPORTED.intersection(request.query_params)
+            if unsupported:
+                raise S3Error(501, "NotImplemented", f"Not implemented: {sorted(unsupported)[0]}")
+            if not bucket:
+                return await self._service_request(request)
+            if not key:
+                return await self._bucket_request(request, bucket)
+            return await self._object_request(request, bucket, key)
+        except S3Error as e:
+            return error_response(e, path)
+        except InvalidRangeError as e:
+            return error_response(S3Error(416, "InvalidRange", str(e)), path)
+        except ValueError as e:
+            return error_response(_classify(e), path)
+
+    async def _service_request(self, request: Request) -> Response:
+        if request.method != "GET":
+            raise S3Error(405, "MethodNotAllowed", f"Method not allowed: {request.method}")
+        buckets = await self._service().list_buckets()
+        xml = XmlWriter("ListAllMyBucketsResult")
+        xml.start("Owner")
+        xml.element("ID", "starward")
+        xml.element("DisplayName", "starward")
+        xml.end("Owner")
+        xml.start("Buckets")
+        for bucket in buckets:
+            xml.start("Bucket")
+            xml.element("Name", bucket["name"])
+            xml.element("CreationDate", timestamp(bucket["created_at"]))
+            xml.end("Bucket")
+        xml.end("Buckets")
+        return _xml_response(xml.finish("ListAllMyBucketsResult"))
+
+    async def _bucket_request(self, request: Request, bucket: str) -> Response:
+        service = self._service()
+        method = request.method
+        query = request.query_params
+        if "notification" in query:
+            return await self._notification_request(request, bucket)
+        if method == "PUT":
+            await service.create_bucket(bucket)
+            return Response(headers={"Location": f"/{bucket}"})
+        if method == "DELETE":
+            await service.delete_bucket(bucket)
+            return Response(status_code=204)
+        if method == "HEAD":
+            if bucket not in service.buckets:
+                return Response(status_code=404)
+            return Response()
+        if method == "POST" and "delete" in query:
+            return await self._delete_objects(request, bucket)
+        if method != "GET":
+            raise S3Error(405, "MethodNotAllowed", f"Method not allowed: {method}")
+
+        if "location" in query:
+            if bucket not in service.buckets:
+                raise S3Error(404, "NoSuchBucket", f"Bucket not found: {bucket}")
+            xml = XmlWriter("LocationConstraint")
+            return _xml_response(xml.finish("LocationConstraint"))
+        max_keys = _int_param(query.get("max-keys"), 1000)
+        if query.get("list-type") == "2":
+            result = await service.list_objects_v2(
+                bucket,
+                query.get("prefix", ""),
+                query.get("delimiter") or None,
+                max_keys,
+                query.get("start-after"),
+                query.get("continuation-token"),
+            )
+            return _stream_xml(_list_objects_xml(result, version=2))
+        result = await service.list_objects_v2(
+            bucket,
+            query.get("prefix", ""),
+            query.get("delimiter") or None,
+            max_keys,
+            query.get("marker") or None,
+        )
+        result["marker"] = query.get("marker", "")
+        return _stream_xml(_list_objects_xml(result, version=1))
+
+    async def _delete_objects(self, request: Request, bucket: str) -> Response:
+        root, namespace = _parse_xml(await request.body())
+        keys = [node.findtext(f"{namespace}Key") or "" for node in root.iter(f"{namespace}Object")]
+        quiet = (root.findtext(f"{namespace}Quiet") or "").lower() == "true"
+
+        service = self._service()
+        xml = XmlWriter("DeleteResult")
+        for key in keys:
+            await service.delete_object(bucket, key)
+            if not quiet:
+                xml.start("Deleted")
+                xml.element("Key", key)
+                xml.end("Deleted")
+        return _xml_response(xml.finish("DeleteResult"))
+
+    async def _notification_request(self, request: Request, bucket: str) -> Response:
+        service = self._service()
+        if request.method == "GET":
+            rules = await service.get_bucket_notification(bucket)
+            return _xml_response(_notification_xml(rules))
+        if request.method != "PUT":
+            raise S3Error(405, "MethodNotAllowed", f"Method not allowed: {request.method}")
+
+        root, namespace = _parse_xml(await request.body())
+        for tag in _UNSUPPORTED_NOTIFICATIONS:
+            if root.find(namespace + tag) is not None:
+                raise S3Error(501, "NotImplemented", f"Not implemented: {tag}")
+        configurations = []
+        for node in root.iter(f"{namespace}QueueConfiguration"):
+            filters = {
+                (rule.findtext(f"{namespace}Name") or "").lower(): rule.findtext(f"{namespace}Value") or ""
+                for rule in node.iter(f"{namespace}FilterRule")
+            }
+            configurations.append(
+                {
+                    "id": node.findtext(f"{namespace}Id"),
+                    "queue": node.findtext(f"{namespace}Queue"),
+                    "events": [event.text for event in node.findall(f"{namespace}Event")],
+                    "prefix": filters.get("prefix"),
+                    "suffix": filters.get("suffix"),
+                }
+            )
+        await service.put_bucket_notification(bucket, configurations)
+        return Response()
+
+    async def _object_request(self, request: Request, bucket: str, key: str) -> Response:
+        service = self._service()
+        method = request.method
+        if method == "PUT":
+            copy_source = request.headers.get("x-amz-copy-source")
+            if copy_source is not None:
+                return await self._copy_object(bucket, key, copy_source)
+            headers = request.headers
+            metadata = {
+                name[len("x-amz-meta-") :]: value
+                for name, value in headers.items()
+                if name.startswith("x-amz-meta-")
+            }
+            chunks = request.stream()
+            encoding = headers.get("content-encoding", "")
+            if "aws-chunked" in encoding or headers.get("x-amz-content-sha256", "").startswith(
+                "STREAMING-"
+            ):
+                chunks = decode_aws_chunked(chunks)
+            info = await service.put_object_stream(
+                bucket, key, chunks, metadata, headers.get("content-type", DEFAULT_CONTENT_TYPE)
+            )
+            return Response(headers={"ETag": f'"{info["etag"]}"'})
+        if method == "GET":
+            byte_range = request.headers.get("range")
+            info, chunks = await service.open_object(bucket, key, byte_range)
+            headers = _payload_headers(info)
+            length = info["end"] - info["start"] + 1 if info["size"] else 0
+            status_code = 200
+            if byte_range:
+                status_code = 206
+                headers["Content-Range"] = f"bytes {info['start']}-{info['end']}/{info['size']}"
+            if length <= READ_CHUNK_SIZE:
+                return Response(b"".join(chunks), status_code, headers)
+            headers["Content-Length"] = str(length)
+            return StreamingResponse(chunks, status_code, headers)
+        if method == "HEAD":
+            try:
+                info = await service.head_object(bucket, key)
+            except ValueError:
+                return Response(status_code=404)
+            headers = _payload_headers(info)
+            headers["Content-Length"] = str(info["size"])
+            return Response(headers=headers)
+        if method == "DELETE":
+            await service.delete_object(bucket, key)
+            return Response(status_code=204)
+        raise S3Error(405, "MethodNotAllowed", f"Method not allowed: {method}")
+
+    async def _copy_object(self, bucket: str, key: str, copy_source: str) -> Response:
+        source_bucket, _, source_key = unquote(copy_source).lstrip("/").partition("/")
+        source_key = source_key.partition("?versionId=")[0]
+        if not source_bucket or not source_key:
+            raise S3Error(400, "InvalidArgument", f"Invalid copy source: {copy_source}")
+        info = await self._service().copy_object(source_bucket, source_key, bucket, key)
+        xml = XmlWriter("CopyObjectResult")
+        xml.element("LastModified", timestamp(info["last_modified"]))
+        xml.element("ETag", f'"{info["etag"]}"')
+        return _xml_response(xml.finish("CopyObjectResult"))
+
+
+def object_headers(info: Dict[str, Any]) -> Dict[str, str]:
+    """Build S3-style response headers from an object description."""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{info["etag"]}"',
+        "Last-Modified": format_datetime(
+            datetime.fromisoformat(info["last_modified"]).replace(tzinfo=timezone.utc),
+            usegmt=True,
+        ),
+    }
+    for name, value in info["metadata"].items():
+        headers[f"x-amz-meta-{name}"] = value
+    return headers
+
+
+def _payload_headers(info: Dict[str, Any]) -> Dict[str, str]:
+    # Content-Type is passed as a header so it is returned exactly as stored.
+    headers = object_headers(info)
+    headers["Content-Type"] = info["content_type"]
+    return headers
+
+
+def error_response(error: S3Error, resource: str) -> Response:
+    """Render an S3 error document."""
+    xml = XmlWriter("Error", namespace=None)
+    xml.element("Code", error.code)
+    xml.element("Message", error.message)
+    xml.element("Resource", resource)
+    request_id = uuid.uuid4().hex
+    xml.element("RequestId", request_id)
+    return _xml_response(
+        xml.finish("Error"), error.status, headers={"x-amz-request-id": request_id}
+    )
+
+
+async def decode_aws_chunked(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Strip ``aws-chunked`` framing from a streamed request body.
+
+    Each chunk is ``<hex size>[;extensions]\\r\\n<data>\\r\\n``; a zero-size
+    chunk ends the payload and is followed only by trailers.
+    """
+    buffer = bytearray()
+    # Bytes of chunk data still to come; -1 while expecting a chunk header,
+    # 0 while expecting the CRLF that ends a chunk's data.
+    remaining = -1
+    async for piece in chunks:
+        buffer += piece
+        while buffer:
+            if remaining > 0:
+                data = bytes(buffer[:remaining])
+                del buffer[: len(data)]
+                remaining -= len(data)
+                yield data
+            elif remaining == 0:
+                if len(buffer) < 2:
+                    break
+                del buffer[:2]
+                remaining = -1
+            else:
+                end = buffer.find(b"\r\n")
+                if end < 0:
+                    break
+                try:
+                    size = int(bytes(buffer[:end]).split(b";", 1)[0], 16)
+                except ValueError:
+                    raise S3Error(400, "IncompleteBody", "Malformed aws-chunked body")
+                if size == 0:
+                    return
+                del buffer[: end + 2]
+                remaining = size
+    raise S3Error(400, "IncompleteBody", "The request body ended before the final chunk")
+
+
+def _list_objects_xml(result: Dict[str, Any], version: int) -> Iterator[bytes]:
+    """Write a ListObjects (V1 or V2) result, yielding it in chunks."""
+    xml = XmlWriter("ListBucketResult")
+    xml.element("Name", result["name"])
+    xml.element("Prefix", result["prefix"])
+    if result["delimiter"]:
+        xml.element("Delimiter", result["delimiter"])
+    xml.element("MaxKeys", str(result["max_keys"]))
+    xml.element("IsTruncated", "true" if result["is_truncated"] else "false")
+    if version == 2:
+        xml.element("KeyCount", str(result["key_count"]))
+        if result["continuation_token"]:
+            xml.element("ContinuationToken", result["continuation_token"])
+        if result.get("next_continuation_token"):
+            xml.element("NextContinuationToken", result["next_continuation_token"])
+        if result["start_after"]:
+            xml.element("StartAfter", result["start_after"])
+    else:
+        xml.element("Marker", result["marker"])
+        if result["is_truncated"]:
+            last = [entry["key"] for entry in result["contents"][-1:]] + result["common_prefixes"][-1:]
+            xml.element("NextMarker", max(last))
+
+    for entry in result["contents"]:
+        xml.start("Contents")
+        xml.element("Key", entry["key"])
+        xml.element("LastModified", timestamp(entry["last_modified"]))
+        xml.element("ETag", f'"{entry["etag"]}"')
+        xml.element("Size", str(entry["size"]))
+        xml.element("StorageClass", "STANDARD")
+        xml.end("Contents")
+        if xml.pending >= CHUNK_SIZE:
+            yield xml.drain()
+    for prefix in result["common_prefixes"]:
+        xml.start("CommonPrefixes")
+        xml.element("Prefix", prefix)
+        xml.end("CommonPrefixes")
+    yield xml.finish("ListBucketResult")
+
+
+def _notification_xml(rules: List[Dict[str, Any]]) -> bytes:
+    xml = XmlWriter("NotificationConfiguration")
+    for rule in rules:
+        xml.start("QueueConfiguration")
+        xml.element("Id", rule["id"])
+        xml.element("Queue", f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{rule['queue']}")
+        for event in rule["events"]:
+            xml.element("Event", event)
+        filters = [(name, rule[name]) for name in ("prefix", "suffix") if rule[name]]
+        if filters:
+            xml.start("Filter")
+            xml.start("S3Key")
+            for name, value in filters:
+                xml.start("FilterRule")
+                xml.element("Name", name)
+                xml.element("Value", value)
+                xml.end("FilterRule")
+            xml.end("S3Key")
+            xml.end("Filter")
+        xml.end("QueueConfiguration")
+    return xml.finish("NotificationConfiguration")
+
+
+def _parse_xml(body: bytes) -> Tuple[ElementTree.Element, str]:
+    """Parse a request document; also return its ``{namespace}`` tag prefix."""
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        raise S3Error(400, "MalformedXML", "The XML you provided was not well-formed")
+    namespace = root.tag[: root.tag.index("}") + 1] if root.tag.startswith("{") else ""
+    return root, namespace
+
+
+def _stream_xml(chunks: Iterator[bytes]) -> Response:
+    """Send a document in one response body if it fits in one chunk, else stream it."""
+    first = next(chunks)
+    second = next(chunks, None)
+    if second is None:
+        return _xml_response(first)
+
+    async def body() -> AsyncIterator[bytes]:
+        yield first
+        yield second
+        for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type=XML_MEDIA_TYPE)
+
+
+def _xml_response(
+    body: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    return Response(body, status_code, headers, media_type=XML_MEDIA_TYPE)
+
+
+def _int_param(value: Optional[str], default: int) -> int:
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise S3Error(400, "InvalidArgument", f"Invalid integer: {value}")
+
+
+def _classify(error: ValueError) -> S3Error:
+    """Map a service error to its S3 error code."""
+    message = str(error)
+    for prefix, status, code in _ERRORS:
+        if message.startswith(prefix):
+            return S3Error(status, code, message)
+    return S3Error(400, "InvalidArgument", message)
@@ -0,0 +1,282 @@
+"""SQS JSON protocol: ``X-Amz-Target: AmazonSQS.<Action>`` requests."""
+
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from starward.services.sqs import MockSQSService
+
+JSON_MEDIA_TYPE = "application/x-amz-json-1.0"
+TARGET_PREFIX = "AmazonSQS."
+ACCOUNT_ID = "000000000000"
+REGION = "us-east-1"
+# Service error message prefix -> (error code, AWS query error code).
+_ERRORS: List[Tuple[str, str, str]] = [
+    ("Queue not found", "QueueDoesNotExist", "AWS.SimpleQueueService.NonExistentQueue"),
+    ("Queue already exists", "QueueNameExists", "QueueAlreadyExists"),
+    ("Message not in flight", "MessageNotInflight", "AWS.SimpleQueueService.MessageNotInflight"),
+    ("Batch request contains no entries", "EmptyBatchRequest", "AWS.SimpleQueueService.EmptyBatchRequest"),
+    (
+        "Too many entries in batch request",
+        "TooManyEntriesInBatchRequest",
+        "AWS.SimpleQueueService.TooManyEntriesInBatchRequest",
+    ),
+    ("Invalid batch entry id", "InvalidBatchEntryId", "AWS.SimpleQueueService.InvalidBatchEntryId"),
+    (
+        "Batch entry ids not distinct",
+        "BatchEntryIdsNotDistinct",
+        "AWS.SimpleQueueService.BatchEntryIdsNotDistinct",
+    ),
+]
+
+Action = Callable[[MockSQSService, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class SqsError(Exception):
+    """An SQS error response."""
+
+    def __init__(self, code: str, message: str, query_code: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.query_code = query_code or code
+
+
+class SqsJsonApi:
+    """Serves the SQS JSON protocol from the SQS service of the current namespace.
+
+    Queues are addressed by URL; only the last path segment (the queue
+    name) is used, so URLs returned by any host work. Signatures are not
+    verified.
+    """
+
+    def __init__(self, service: Callable[[], MockSQSService]) -> None:
+        self._service = service
+        self._actions: Dict[str, Action] = {
+            "CreateQueue": _create_queue,
+            "GetQueueUrl": _get_queue_url,
+            "ListQueues": _list_queues,
+            "DeleteQueue": _delete_queue,
+            "GetQueueAttributes": _get_queue_attributes,
+            "SendMessage": _send_message,
+            "SendMessageBatch": _send_message_batch,
+            "ReceiveMessage": _receive_message,
+            "DeleteMessage": _delete_message,
+            "DeleteMessageBatch": _delete_message_batch,
+            "ChangeMessageVisibility": _change_message_visibility,
+        }
+
+    async def handle(self, request: Request) -> Response:
+        """Answer one SQS request."""
+        target = request.headers.get("x-amz-target", "")
+        action: Optional[Action] = None
+        if target.startswith(TARGET_PREFIX):
+            action = self._actions.get(target[len(TARGET_PREFIX) :])
+        try:
+            if action is None:
+                raise SqsError("UnknownOperationException", f"Unknown operation: {target}")
+            try:
+                params = json.loads(await request.body() or b"{}")
+            except ValueError:
+                raise SqsError("SerializationException", "Request body is not valid JSON")
+            if not isinstance(params, dict):
+                raise SqsError("SerializationException", "Request body must be a JSON object")
+            result = await action(self._service(), params)
+        except SqsError as e:
+            return error_response(e)
+        except ValueError as e:
+            return error_response(_classify(e))
+        return Response(json.dumps(result), media_type=JSON_MEDIA_TYPE)
+
+
+def error_response(error: SqsError) -> Response:
+    """Render an SQS JSON error."""
+    body = {"__type": f"com.amazonaws.sqs#{error.code}", "message": error.message}
+    return Response(
+        json.dumps(body),
+        status_code=400,
+        headers={"x-amzn-query-error": f"{error.query_code};Sender"},
+        media_type=JSON_MEDIA_TYPE,
+    )
+
+
+def queue_url(queue_name: str) -> str:
+    """URL of a queue as reported to clients."""
+    return f"http://localhost:4566/{ACCOUNT_ID}/{queue_name}"
+
+
+async def _create_queue(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    name = _required(params, "QueueName")
+    attributes = {k: str(v) for k, v in (params.get("Attributes") or {}).items()}
+    existing = service.queues.get(name)
+    if existing is not None and existing["attributes"] == attributes:
+        # CreateQueue is idempotent for identical attributes.
+        return {"QueueUrl": queue_url(name)}
+    await service.create_queue(name, attributes)
+    return {"QueueUrl": queue_url(name)}
+
+
+async def _get_queue_url(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    name = _required(params, "QueueName")
+    if name not in service.queues:
+        raise ValueError(f"Queue not found: {name}")
+    return {"QueueUrl": queue_url(name)}
+
+
+async def _list_queues(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    prefix = params.get("QueueNamePrefix") or ""
+    names = sorted(name for name in service.queues if name.startswith(prefix))
+    if params.get("MaxResults"):
+        names = names[: int(params["MaxResults"])]
+    return {"QueueUrls": [queue_url(name) for name in names]}
+
+
+async def _delete_queue(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    await service.delete_queue(_queue_name(params))
+    return {}
+
+
+async def _get_queue_attributes(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    name = _queue_name(params)
+    attributes = {k: str(v) for k, v in (await service.get_queue_attributes(name)).items()}
+    created = datetime.fromisoformat(attributes["CreatedTimestamp"]).replace(tzinfo=timezone.utc)
+    attributes["CreatedTimestamp"] = str(int(created.timestamp()))
+    attributes["QueueArn"] = f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{name}"
+    wanted = params.get("AttributeNames") or []
+    if "All" not in wanted:
+        attributes = {k: v for k, v in attributes.items() if k in wanted}
+    return {"Attributes": attributes}
+
+
+async def _send_message(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    body = _required(params, "MessageBody")
+    result = await service.send_message(
+        _queue_name(params), body, _message_attributes(params.get("MessageAttributes"))
+    )
+    return {"MessageId": result["message_id"], "MD5OfMessageBody": _md5(body)}
+
+
+async def _send_message_batch(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    entries = params.get("Entries") or []
+    bodies = {entry.get("Id"): entry.get("MessageBody") for entry in entries}
+    result = await service.send_message_batch(
+        _queue_name(params),
+        [
+            {
+                "id": entry.get("Id"),
+                "message_body": entry.get("MessageBody"),
+                "attributes": _message_attributes(entry.get("MessageAttributes")),
+            }
+            for entry in entries
+        ],
+    )
+    return {
+        "Successful": [
+            {"Id": s["id"], "MessageId": s["message_id"], "MD5OfMessageBody": _md5(bodies[s["id"]])}
+            for s in result["successful"]
+        ],
+        "Failed": [_batch_failure(f) for f in result["failed"]],
+    }
+
+
+async def _receive_message(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    messages = await service.receive_messages(
+        _queue_name(params),
+        int(params.get("MaxNumberOfMessages") or 1),
+        float(params.get("WaitTimeSeconds") or 0),
+        params.get("VisibilityTimeout"),
+    )
+    wanted = set(params.get("MessageAttributeNames") or [])
+    every = bool(wanted & {"All", ".*"})
+    result = []
+    for message in messages:
+        entry = {
+            "MessageId": message["message_id"],
+            "ReceiptHandle": message["receipt_handle"],
+            "MD5OfBody": _md5(message["body"]),
+            "Body": message["body"],
+        }
+        attributes = {
+            name: {"DataType": "String", "StringValue": value}
+            for name, value in message["attributes"].items()
+            if every or name in wanted
+        }
+        if attributes:
+            entry["MessageAttributes"] = attributes
+        result.append(entry)
+    return {"Messages": result} if result else {}
+
+
+async def _delete_message(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    await service.delete_message(_queue_name(params), _required(params, "ReceiptHandle"))
+    return {}
+
+
+async def _delete_message_batch(service: MockSQSService, params: Dict[str, Any]) -> Dict[str, Any]:
+    result = await service.delete_message_batch(
+        _queue_name(params),
+        [
+            {"id": entry.get("Id"), "receipt_handle": entry.get("ReceiptHandle")}
+            for entry in params.get("Entries") or []
+        ],
+    )
+    return {
+        "Successful": [{"Id": s["id"]} for s in result["successful"]],
+        "Failed": [_batch_failure(f) for f in result["failed"]],
+    }
+
+
+async def _change_message_visibility(
+    service: MockSQSService, params: Dict[str, Any]
+) -> Dict[str, Any]:
+    await service.change_message_visibility(
+        _queue_name(params),
+        _required(params, "ReceiptHandle"),
+        _required(params, "VisibilityTimeout"),
+    )
+    return {}
+
+
+def _required(params: Dict[str, Any], name: str) -> Any:
+    value = params.get(name)
+    if value is None or value == "":
+        raise SqsError("MissingParameter", f"The request must contain the parameter {name}")
+    return value
+
+
+def _queue_name(params: Dict[str, Any]) -> str:
+    url: str = _required(params, "QueueUrl")
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _message_attributes(attributes: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """Flatten typed message attributes to the service's string values."""
+    if not attributes:
+        return None
+    return {name: str(value.get("StringValue", "")) for name, value in attributes.items()}
+
+
+def _batch_failure(failure: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "Id": failure["id"],
+        "SenderFault": failure["sender_fault"],
+        "Code": failure["code"],
+        "Message": failure["message"],
+    }
+
+
+def _md5(body: str) -> str:
+    return hashlib.md5(body.encode()).hexdigest()
+
+
+def _classify(error: ValueError) -> SqsError:
+    """Map a service error to its SQS error code."""
+    message = str(error)
+    for prefix, code, query_code in _ERRORS:
+        if message.startswith(prefix):
+            return SqsError(code, message, query_code)
+    return SqsError("InvalidParameterValue", message)
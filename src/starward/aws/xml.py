@@ -0,0 +1,75 @@
+"""Streaming writer for the XML documents of the AWS REST protocols."""
+
+from datetime import datetime
+from typing import List, Optional
+
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+# Written output is handed to the transport in pieces about this big.
+CHUNK_SIZE = 64 * 1024
+
+
+class XmlWriter:
+    """Builds an XML document as UTF-8 bytes.
+
+    Elements are appended as string fragments and encoded in one pass when
+    drained. :meth:`drain` returns the output written so far, so a large
+    listing can be sent in chunks while it is still being written.
+    """
+
+    __slots__ = ("_parts", "_size")
+
+    def __init__(self, root: str, namespace: Optional[str] = S3_NAMESPACE) -> None:
+        opening = f'<{root} xmlns="{namespace}">' if namespace else f"<{root}>"
+        self._parts: List[str] = [_DECLARATION, opening]
+        self._size = 0
+
+    @property
+    def pending(self) -> int:
+        """Rough size of the output not drained yet."""
+        return self._size
+
+    def start(self, tag: str) -> None:
+        """Open an element."""
+        self._parts.append(f"<{tag}>")
+        self._size += len(tag) + 2
+
+    def end(self, tag: str) -> None:
+        """Close an element."""
+        self._parts.append(f"</{tag}>")
+        self._size += len(tag) + 3
+
+    def element(self, tag: str, text: str) -> None:
+        """Write an element holding escaped text."""
+        text = escape(text)
+        self._parts.append(f"<{tag}>{text}</{tag}>")
+        self._size += len(text) + 2 * len(tag) + 5
+
+    def drain(self) -> bytes:
+        """Return the output written since the last drain."""
+        data = "".join(self._parts).encode()
+        self._parts.clear()
+        self._size = 0
+        return data
+
+    def finish(self, root: str) -> bytes:
+        """Close the root element and return the remaining output."""
+        self.end(root)
+        return self.drain()
+
+
+def escape(text: str) -> str:
+    """Escape character data; text without markup characters is returned as is."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def timestamp(value: str) -> str:
+    """Format an ISO timestamp stored by a service as an AWS ``...T...Z`` timestamp."""
+    moment = datetime.fromisoformat(value)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
@@ -5,8 +5,9 @@ import asyncio
 import subprocess
 import sys
 import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 from starward.core.state_engine import StateEngine
 
@@ -22,8 +23,40 @@ def main() -> None:
 @click.option("--host", default="127.0.0.1", help="Server host")
 @click.option("--port", default=4566, help="Server port")
 @click.option("--detach", "-d", is_flag=True, help="Run in background")
-def up(host: str, port: int, detach: bool) -> None:
+@click.option("--journal", "journal_path", help="Write-ahead journal file; replayed on startup")
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=(
+        "Worker processes, each owning a hash partition of buckets and queues; "
+        "bucket notifications and /events need a single worker"
+    ),
+)
+@click.option(
+    "--namespace-idle-timeout",
+    default=600.0,
+    show_default=True,
+    help="Seconds before an idle namespace is evicted",
+)
+@click.option(
+    "--fast-path",
+    is_flag=True,
+    help="Serve object and message routes from the lean data-plane handlers",
+)
+def up(
+    host: str,
+    port: int,
+    detach: bool,
+    journal_path: Optional[str],
+    workers: int,
+    namespace_idle_timeout: float,
+    fast_path: bool,
+) -> None:
     """Start the Starward server."""
+    if detach and (journal_path or workers > 1):
+        raise click.UsageError("--journal and --workers are only supported in the foreground")
     click.echo(f"Starting Starward server on {host}:{port}...")
 
     if detach:
@@ -34,11 +67,29 @@ def up(host: str, port: int, detach: bool) -> None:
             stderr=subprocess.DEVNULL,
         )
         click.echo("Server started in background.")
+    elif workers > 1:
+        from starward.sharding import run_sharded
+
+        click.echo(f"Sharding buckets and queues across {workers} workers.")
+        run_sharded(
+            host,
+            port,
+            workers,
+            journal_path=journal_path,
+            namespace_idle_timeout=namespace_idle_timeout,
+            fast_path=fast_path,
+        )
     else:
         # Run in foreground
         from starward.server import StarwardServer
 
-        server = StarwardServer(host, port)
+        server = StarwardServer(
+            host,
+            port,
+            journal_path=journal_path,
+            namespace_idle_timeout=namespace_idle_timeout,
+            fast_path=fast_path,
+        )
         server.run()
 
 
@@ -53,13 +104,17 @@ def down() -> None:
 
 @main.command()
 @click.option("--id", "snapshot_id", help="Snapshot ID")
-def snapshot(snapshot_id: Optional[str]) -> None:
+@click.option("--tag", "tags", multiple=True, help="Tag to attach (repeatable)")
+def snapshot(snapshot_id: Optional[str], tags: Tuple[str, ...]) -> None:
     """Create a state snapshot."""
     click.echo("Creating snapshot...")
 
     async def _create() -> None:
         engine = StateEngine()
-        snap = await engine.create_snapshot(snapshot_id)
+        try:
+            snap = await engine.create_snapshot(snapshot_id, tags=list(tags))
+        finally:
+            await engine.close()
         click.echo(f"Snapshot created: {snap.id}")
 
     asyncio.run(_create())
@@ -73,27 +128,90 @@ def restore(snapshot_id: str) -> None:
 
     async def _restore() -> None:
         engine = StateEngine()
-        await engine.restore_snapshot(snapshot_id)
+        try:
+            await engine.restore_snapshot(snapshot_id)
+        finally:
+            await engine.close()
         click.echo("Snapshot restored.")
 
     asyncio.run(_restore())
 
 
-@main.command()
-def snapshots() -> None:
-    """List all snapshots."""
-
-    async def _list() -> None:
+@main.command("restore-at")
+@click.option("--journal", "journal_path", required=True, help="Journal to read history from")
+@click.option("--seq", type=int, help="Journal position to restore")
+@click.option("--at", "timestamp", type=click.DateTime(), help="Point in time (UTC) to restore")
+@click.option("--snapshot", "snapshot_id", help="Save the restored state as this snapshot")
+def restore_at(
+    journal_path: str,
+    seq: Optional[int],
+    timestamp: Optional[datetime],
+    snapshot_id: Optional[str],
+) -> None:
+    """Rebuild the state as of a journal position or point in time."""
+    from starward.core.journal import OperationJournal
+    from starward.services.s3 import MockS3Service
+    from starward.services.sqs import MockSQSService
+
+    async def _restore_at() -> None:
         engine = StateEngine()
-        snaps = engine.list_snapshots()
-        if snaps:
-            click.echo("Available snapshots:")
-            for snap in snaps:
-                click.echo(f"  - {snap}")
-        else:
-            click.echo("No snapshots found.")
+        MockS3Service(engine)
+        MockSQSService(engine)
+        # Read-only, so a running server's journal is never written to.
+        engine.attach_journal(OperationJournal(journal_path, read_only=True))
+        try:
+            point = await engine.restore_at(seq, timestamp)
+            click.echo(
+                f"Restored journal position {point.seq} from "
+                f"{point.checkpoint or 'empty state'} ({point.replayed} operations replayed)."
+            )
+            if snapshot_id:
+                snap = await engine.create_snapshot(snapshot_id)
+                click.echo(f"Snapshot created: {snap.id}")
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        finally:
+            await engine.close()
+
+    asyncio.run(_restore_at())
 
-    asyncio.run(_list())
+
+@main.command()
+@click.option("--tag", help="Only snapshots with this tag")
+@click.option("--parent", help="Only children of this snapshot")
+@click.option("--since", type=click.DateTime(), help="Only snapshots taken at or after this time")
+@click.option("--until", type=click.DateTime(), help="Only snapshots taken at or before this time")
+@click.option("--limit", default=50, show_default=True, help="Maximum snapshots to show")
+@click.option("--offset", default=0, help="Number of matching snapshots to skip")
+def snapshots(
+    tag: Optional[str],
+    parent: Optional[str],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    limit: int,
+    offset: int,
+) -> None:
+    """List snapshots."""
+    engine = StateEngine()
+    try:
+        entries, total = engine.query_snapshots(tag, parent, since, until, limit, offset)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    finally:
+        asyncio.run(engine.close())
+
+    if not entries:
+        click.echo("No snapshots found.")
+        return
+
+    click.echo(f"{'ID':<32} {'TIMESTAMP':<26} {'SIZE':>10}  {'PARENT':<24} TAGS")
+    for entry in entries:
+        click.echo(
+            f"{entry.id:<32} {entry.timestamp:<26} {entry.size:>10}  "
+            f"{entry.parent or '-':<24} {','.join(entry.tags)}"
+        )
+    if offset + len(entries) < total:
+        click.echo(f"Showing {offset + 1}-{offset + len(entries)} of {total}; use --offset {offset + len(entries)} for more.")
 
 
 @main.command()
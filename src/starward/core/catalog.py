@@ -0,0 +1,203 @@
+"""Persistent catalog of snapshot metadata backed by sqlite3."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    parent TEXT,
+    seed TEXT,
+    journal_seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshots_timestamp ON snapshots (timestamp, id);
+CREATE INDEX IF NOT EXISTS snapshots_parent ON snapshots (parent);
+CREATE TABLE IF NOT EXISTS snapshot_tags (
+    snapshot_id TEXT NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, tag)
+);
+CREATE INDEX IF NOT EXISTS snapshot_tags_tag ON snapshot_tags (tag);
+"""
+
+# Applied after _SCHEMA so catalogs created before the column existed get it too.
+_JOURNAL_SEQ_INDEX = "CREATE INDEX IF NOT EXISTS snapshots_journal_seq ON snapshots (journal_seq)"
+
+
+@dataclass
+class CatalogEntry:
+    """Catalog row describing one persisted snapshot."""
+
+    id: str
+    timestamp: str
+    size: int = 0
+    parent: Optional[str] = None
+    seed: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    journal_seq: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert entry to dictionary."""
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "size": self.size,
+            "parent": self.parent,
+            "seed": self.seed,
+            "tags": self.tags,
+            "journal_seq": self.journal_seq,
+        }
+
+
+class SnapshotCatalog:
+    """Index of persisted snapshots, so listing never scans the snapshot directory.
+
+    The manifests remain the source of truth. When the catalog file is
+    first created, ``bootstrap`` is called to index snapshots written before
+    the catalog existed. The connection is shared across threads and
+    guarded by a lock.
+    """
+
+    def __init__(self, path: str | Path, bootstrap: Callable[[], Iterable[CatalogEntry]]) -> None:
+        self.path = Path(path)
+        self._bootstrap = bootstrap
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def upsert(self, entries: Iterable[CatalogEntry]) -> None:
+        """Add or replace entries in one transaction."""
+        with self._lock:
+            conn = self._connect(create=True)
+            assert conn is not None
+            with conn:
+                self._upsert(conn, entries)
+
+    def delete(self, snapshot_id: str) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return
+            with conn:
+                conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+
+    def get(self, snapshot_id: str) -> Optional[CatalogEntry]:
+        """Look up one entry."""
+        entries, _ = self.query(snapshot_id=snapshot_id, limit=1)
+        return entries[0] if entries else None
+
+    def nearest(self, journal_seq: int, tag: Optional[str] = None) -> Optional[CatalogEntry]:
+        """Entry with the highest journal position at or before ``journal_seq``."""
+        entries, _ = self.query(tag=tag, max_journal_seq=journal_seq, limit=1)
+        return entries[0] if entries else None
+
+    def query(
+        self,
+        snapshot_id: Optional[str] = None,
+        tag: Optional[str] = None,
+        parent: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        max_journal_seq: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[CatalogEntry], int]:
+        """Return matching entries ordered by timestamp, and the total match count.
+
+        ``since`` and ``until`` are ISO-8601 timestamps (inclusive). With
+        ``max_journal_seq`` only entries at or before that journal position
+        match, ordered from the latest position down.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if snapshot_id is not None:
+            clauses.append("s.id = ?")
+            params.append(snapshot_id)
+        if tag is not None:
+            clauses.append("EXISTS (SELECT 1 FROM snapshot_tags t WHERE t.snapshot_id = s.id AND t.tag = ?)")
+            params.append(tag)
+        if parent is not None:
+            clauses.append("s.parent = ?")
+            params.append(parent)
+        if since is not None:
+            clauses.append("s.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("s.timestamp <= ?")
+            params.append(until)
+        order = "s.timestamp, s.id"
+        if max_journal_seq is not None:
+            clauses.append("s.journal_seq <= ?")
+            params.append(max_journal_seq)
+            order = "s.journal_seq DESC, s.timestamp DESC, s.id DESC"
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            conn = self._connect(create=False)
+            if conn is None:
+                return [], 0
+            (total,) = conn.execute(f"SELECT COUNT(*) FROM snapshots s {where}", params).fetchone()
+            rows = conn.execute(
+                f"SELECT s.id, s.timestamp, s.size, s.parent, s.seed, s.journal_seq, "
+                f"(SELECT group_concat(tag, char(0)) FROM snapshot_tags t WHERE t.snapshot_id = s.id) "
+                f"FROM snapshots s {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                [*params, -1 if limit is None else limit, offset],
+            ).fetchall()
+
+        entries = [
+            CatalogEntry(
+                id, timestamp, size, parent, seed, sorted(tags.split("\0")) if tags else [], journal_seq
+            )
+            for id, timestamp, size, parent, seed, journal_seq, tags in rows
+        ]
+        return entries, total
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        if self._conn is not None:
+            return self._conn
+        exists = self.path.exists()
+        if not exists and not create and not self.path.parent.exists():
+            return None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        with conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(snapshots)")}
+            migrated = "journal_seq" not in columns
+            if migrated:
+                # Re-index below so existing rows pick up their journal position.
+                conn.execute("ALTER TABLE snapshots ADD COLUMN journal_seq INTEGER")
+            conn.execute(_JOURNAL_SEQ_INDEX)
+            if not exists or migrated:
+                self._upsert(conn, self._bootstrap())
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, entries: Iterable[CatalogEntry]) -> None:
+        for entry in entries:
+            conn.execute("DELETE FROM snapshots WHERE id = ?", (entry.id,))
+            conn.execute(
+                "INSERT INTO snapshots (id, timestamp, size, parent, seed, journal_seq) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entry.id, entry.timestamp, entry.size, entry.parent, entry.seed, entry.journal_seq),
+            )
+            conn.executemany(
+                "INSERT INTO snapshot_tags (snapshot_id, tag) VALUES (?, ?)",
+                [(entry.id, tag) for tag in sorted(set(entry.tags))],
+            )
@@ -0,0 +1,131 @@
+"""Content-addressed chunk store for snapshot pages."""
+
+from typing import Iterable, Iterator, List, Optional, Set
+from pathlib import Path
+import hashlib
+import mmap
+import os
+import uuid
+
+
+class ChunkStore:
+    """Stores immutable chunks on disk keyed by their SHA-256 digest.
+
+    Identical chunks are written once no matter how many snapshots refer
+    to them. Writes are not fsynced individually; call :meth:`sync` once a
+    batch of chunks has been written.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self._unsynced: List[Path] = []
+
+    def path_for(self, digest: str) -> Path:
+        """Return the on-disk location of a chunk."""
+        return self.root / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        """Check whether a chunk is stored."""
+        return self.path_for(digest).exists()
+
+    def put(self, data: bytes) -> str:
+        """Store a chunk and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        self.put_verified(digest, data)
+        return digest
+
+    def put_verified(self, digest: str, data: bytes) -> None:
+        """Store a chunk under a known digest, checking it matches."""
+        path = self.path_for(digest)
+        if path.exists():
+            return
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Chunk digest mismatch: {digest}")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{digest}.{uuid.uuid4().hex}.tmp"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        self._unsynced.append(path)
+
+    def sync(self) -> None:
+        """Flush every chunk written since the last sync to stable storage."""
+        paths, self._unsynced = self._unsynced, []
+        if paths:
+            # New fan-out directories are entries in the root directory.
+            fsync_paths(paths + [self.root])
+
+    def get(self, digest: str) -> bytes:
+        """Read a chunk."""
+        path = self.path_for(digest)
+        if not path.exists():
+            raise ValueError(f"Chunk not found: {digest}")
+        return path.read_bytes()
+
+    def size(self, digest: str) -> int:
+        """Size of a stored chunk in bytes."""
+        try:
+            return self.path_for(digest).stat().st_size
+        except FileNotFoundError:
+            raise ValueError(f"Chunk not found: {digest}") from None
+
+    def open(self, digest: str) -> "mmap.mmap | bytes":
+        """Memory-map a chunk for reading; the caller closes the map."""
+        path = self.path_for(digest)
+        try:
+            with path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise ValueError(f"Chunk not found: {digest}") from None
+
+    def digests(self) -> Iterator[str]:
+        """Iterate over all stored chunk digests."""
+        if not self.root.exists():
+            return
+        for path in self.root.glob("??/*"):
+            if not path.name.startswith("."):
+                yield path.name
+
+    def collect_garbage(self, live: Set[str], older_than: Optional[float] = None) -> int:
+        """Delete every chunk not in ``live`` and return how many were removed.
+
+        With ``older_than`` (seconds since the epoch), chunks modified at or
+        after that time are kept as well.
+        """
+        removed = 0
+        for digest in list(self.digests()):
+            if digest in live:
+                continue
+            path = self.path_for(digest)
+            try:
+                if older_than is not None and path.stat().st_mtime >= older_than:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        return removed
+
+
+def fsync_paths(paths: Iterable[Path]) -> None:
+    """Fsync files, then each distinct parent directory once."""
+    directories: Set[Path] = set()
+    for path in paths:
+        _fsync(path, os.O_RDONLY)
+        directories.add(path.parent)
+    for directory in directories:
+        _fsync(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+
+
+def _fsync(path: Path, flags: int) -> None:
+    try:
+        fd = os.open(path, flags)
+    except (FileNotFoundError, IsADirectoryError, PermissionError):
+        # Removed meanwhile, or a platform that cannot open directories.
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
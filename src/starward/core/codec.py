@@ -0,0 +1,312 @@
+"""Snapshot codecs for serializing state pages.
+
+Every snapshot chunk is one state page encoded with a codec. The binary
+codec is the default: a compact tagged format with length-prefixed records
+that stores ``bytes`` payloads raw. JSON is kept as a human-readable debug
+format. Codecs register by name with :func:`register_codec`; the name used
+is recorded in each snapshot manifest so chunks can be read back with the
+codec that wrote them.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+import base64
+import json
+import struct
+import zlib
+
+from starward.core.pages import get_page_type
+
+try:  # Python 3.14+
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on interpreter version
+    zstd = None
+
+DEFAULT_CODEC = "binary"
+
+
+class SnapshotCodec(Protocol):
+    """Protocol for snapshot page codecs.
+
+    ``decode`` accepts any readable buffer, including a memory map.
+    """
+
+    name: str
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value to bytes."""
+        ...
+
+    def decode(self, data: bytes) -> Any:
+        """Deserialize a value from bytes."""
+        ...
+
+
+_CODECS: Dict[str, SnapshotCodec] = {}
+
+
+def register_codec(codec: SnapshotCodec) -> SnapshotCodec:
+    """Make a codec available by name."""
+    _CODECS[codec.name] = codec
+    return codec
+
+
+def get_codec(name: str) -> SnapshotCodec:
+    """Look up a registered codec by name."""
+    if name not in _CODECS:
+        raise ValueError(f"Unknown snapshot codec: {name}")
+    return _CODECS[name]
+
+
+def list_codecs() -> List[str]:
+    """List registered codec names."""
+    return sorted(_CODECS)
+
+
+# JSON
+
+
+def encode_json_value(value: Any) -> Any:
+    """JSON fallback for pages and raw bytes."""
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    page_type = getattr(value, "page_type", None)
+    if page_type is not None:
+        return {"__page__": page_type, "state": value.to_state()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def decode_json_value(obj: Dict[str, Any]) -> Any:
+    """JSON object hook reversing :func:`encode_json_value`."""
+    if "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    if "__page__" in obj:
+        return get_page_type(obj["__page__"]).from_state(obj["state"])
+    return obj
+
+
+class JsonCodec:
+    """Indented JSON; bytes are base64-encoded. Slow, but easy to inspect."""
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value to bytes."""
+        return json.dumps(value, indent=2, default=encode_json_value).encode()
+
+    def decode(self, data: bytes) -> Any:
+        """Deserialize a value from bytes."""
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        return json.loads(data, object_hook=decode_json_value)
+
+
+# Binary
+#
+# Each value is a one-byte tag followed by its payload. Strings, bytes and
+# big integers carry a little-endian u32 length; lists and dicts a u32 item
+# count followed by their items (dicts as key, value pairs).
+#
+# Dicts whose keys are all strings are written as records: the first time a
+# key tuple (a "shape") appears it is defined inline, and later dicts with
+# the same keys refer to it by index and store only their values. Pages hold
+# many records with identical keys, so this keeps both size and decode work
+# down.
+
+_NONE = ord("N")
+_TRUE = ord("T")
+_FALSE = ord("F")
+_INT = ord("I")
+_BIGINT = ord("J")
+_FLOAT = ord("D")
+_STR = ord("S")
+_BYTES = ord("B")
+_LIST = ord("L")
+_DICT = ord("M")
+_SHAPE = ord("K")
+_RECORD = ord("R")
+_PAGE = ord("P")
+
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _encode_binary(root: Any) -> bytes:
+    out: List[bytes] = []
+    append = out.append
+    pack_u32 = _U32.pack
+    shapes: Dict[Tuple[str, ...], int] = {}
+
+    def encode(value: Any) -> None:
+        kind = type(value)
+        if kind is str:
+            data = value.encode()
+            append(b"S" + pack_u32(len(data)))
+            append(data)
+        elif kind is dict:
+            shape = tuple(value)
+            index = shapes.get(shape)
+            if index is not None:
+                append(b"R" + pack_u32(index))
+            elif all(type(key) is str for key in shape):
+                shapes[shape] = len(shapes)
+                append(b"K" + pack_u32(len(shape)))
+                for key in shape:
+                    encode(key)
+            else:
+                append(b"M" + pack_u32(len(value)))
+                for key, item in value.items():
+                    encode(key)
+                    encode(item)
+                return
+            for item in value.values():
+                encode(item)
+        elif kind is list or kind is tuple:
+            append(b"L" + pack_u32(len(value)))
+            for item in value:
+                encode(item)
+        elif kind is int:
+            if _INT64_MIN <= value <= _INT64_MAX:
+                append(b"I" + _I64.pack(value))
+            else:
+                data = str(value).encode()
+                append(b"J" + pack_u32(len(data)))
+                append(data)
+        elif kind is bytes or kind is bytearray or kind is memoryview:
+            append(b"B" + pack_u32(len(value)))
+            append(bytes(value))
+        elif value is None:
+            append(b"N")
+        elif kind is bool:
+            append(b"T" if value else b"F")
+        elif kind is float:
+            append(b"D" + _F64.pack(value))
+        elif getattr(value, "page_type", None) is not None:
+            page_type = value.page_type.encode()
+            append(b"P" + pack_u32(len(page_type)))
+            append(page_type)
+            encode(value.to_state())
+        elif isinstance(value, str):
+            encode(str(value))
+        elif isinstance(value, int):
+            encode(int(value))
+        elif isinstance(value, dict):
+            encode(dict(value))
+        else:
+            raise TypeError(f"Cannot serialize {kind.__name__}")
+
+    encode(root)
+    return b"".join(out)
+
+
+def _decode_binary(data: bytes) -> Any:
+    unpack_u32 = _U32.unpack_from
+    shapes: List[Tuple[str, ...]] = []
+
+    def decode(pos: int) -> Tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+        if tag == _STR:
+            (size,) = unpack_u32(data, pos)
+            pos += 4
+            return data[pos : pos + size].decode(), pos + size
+        if tag == _RECORD or tag == _SHAPE:
+            (index,) = unpack_u32(data, pos)
+            pos += 4
+            if tag == _SHAPE:
+                keys = []
+                for _ in range(index):
+                    key, pos = decode(pos)
+                    keys.append(key)
+                shape = tuple(keys)
+                shapes.append(shape)
+            else:
+                shape = shapes[index]
+            values = []
+            for _ in shape:
+                value, pos = decode(pos)
+                values.append(value)
+            return dict(zip(shape, values)), pos
+        if tag == _LIST:
+            (count,) = unpack_u32(data, pos)
+            pos += 4
+            items = []
+            for _ in range(count):
+                item, pos = decode(pos)
+                items.append(item)
+            return items, pos
+        if tag == _INT:
+            return _I64.unpack_from(data, pos)[0], pos + 8
+        if tag == _BYTES:
+            (size,) = unpack_u32(data, pos)
+            pos += 4
+            return data[pos : pos + size], pos + size
+        if tag == _NONE:
+            return None, pos
+        if tag == _TRUE:
+            return True, pos
+        if tag == _FALSE:
+            return False, pos
+        if tag == _DICT:
+            (count,) = unpack_u32(data, pos)
+            pos += 4
+            result: Dict[Any, Any] = {}
+            for _ in range(count):
+                key, pos = decode(pos)
+                result[key], pos = decode(pos)
+            return result, pos
+        if tag == _FLOAT:
+            return _F64.unpack_from(data, pos)[0], pos + 8
+        if tag == _BIGINT:
+            (size,) = unpack_u32(data, pos)
+            pos += 4
+            return int(data[pos : pos + size]), pos + size
+        if tag == _PAGE:
+            (size,) = unpack_u32(data, pos)
+            pos += 4
+            page_type = data[pos : pos + size].decode()
+            state, pos = decode(pos + size)
+            return get_page_type(page_type).from_state(state), pos
+        raise ValueError(f"Corrupt snapshot data: unknown tag {tag!r} at offset {pos - 1}")
+
+    try:
+        value, pos = decode(0)
+    except (IndexError, struct.error) as e:
+        raise ValueError("Corrupt snapshot data: truncated") from e
+    if pos != len(data):
+        raise ValueError("Corrupt snapshot data: trailing bytes")
+    return value
+
+
+class BinaryCodec:
+    """Compact tagged binary format with optional compression."""
+
+    def __init__(
+        self,
+        name: str = "binary",
+        compress: Optional[Callable[[bytes], bytes]] = None,
+        decompress: Optional[Callable[[bytes], bytes]] = None,
+    ) -> None:
+        self.name = name
+        self._compress = compress
+        self._decompress = decompress
+
+    def encode(self, value: Any) -> bytes:
+        """Serialize a value to bytes."""
+        data = _encode_binary(value)
+        return self._compress(data) if self._compress else data
+
+    def decode(self, data: bytes) -> Any:
+        """Deserialize a value from bytes."""
+        if self._decompress:
+            data = self._decompress(data)
+        return _decode_binary(data)
+
+
+register_codec(JsonCodec())
+register_codec(BinaryCodec())
+register_codec(BinaryCodec("binary+zlib", lambda data: zlib.compress(data, 1), zlib.decompress))
+if zstd is not None:  # pragma: no cover - depends on interpreter version
+    register_codec(BinaryCodec("binary+zstd", zstd.compress, zstd.decompress))
@@ -1,56 +1,637 @@
 """Event bus for inter-service communication."""
 
 import asyncio
-from typing import Any, Callable, Dict, List
-from dataclasses import dataclass, field
-from datetime import datetime
+import time
+from collections import deque
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional
+
+# Retained events when no limit is given.
+DEFAULT_MAX_EVENTS = 100_000
+# Rough per-event bookkeeping cost counted against ``max_bytes``.
+_EVENT_OVERHEAD = 200
+# Per-subscription queue bound in asynchronous mode.
+DEFAULT_QUEUE_SIZE = 10_000
+
+# What a full subscription queue does with a new event.
+DROP = "drop"
+BLOCK = "block"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (DROP, BLOCK, COALESCE)
 
 
-@dataclass
 class Event:
-    """Represents a system event."""
+    """Represents a system event.
 
-    type: str
-    service: str
-    data: Dict[str, Any]
-    timestamp: datetime = field(default_factory=datetime.utcnow)
-    trace_id: str = ""
+    ``sequence`` is assigned when the event is published; ``created`` is
+    the publication time in seconds since the epoch. ``namespace`` names
+    the state namespace whose service published the event.
+    """
 
+    __slots__ = ("type", "service", "data", "created", "trace_id", "sequence", "namespace")
 
-EventHandler = Callable[[Event], None]
+    def __init__(
+        self,
+        type: str,
+        service: str,
+        data: Dict[str, Any],
+        timestamp: Optional[datetime] = None,
+        trace_id: str = "",
+        namespace: str = "",
+    ) -> None:
+        self.type = type
+        self.service = service
+        self.data = data
+        self.created = time.time() if timestamp is None else _epoch(timestamp)
+        self.trace_id = trace_id
+        self.namespace = namespace
+        self.sequence = 0
 
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time as a naive UTC datetime."""
+        return datetime.fromtimestamp(self.created, timezone.utc).replace(tzinfo=None)
+
+    def size(self) -> int:
+        """Approximate memory held by the event, in bytes."""
+        size = _EVENT_OVERHEAD + len(self.type) + len(self.service)
+        size += len(self.trace_id) + len(self.namespace)
+        for key, value in self.data.items():
+            size += len(key) + (len(value) if isinstance(value, (str, bytes)) else 16)
+        return size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert event to dictionary."""
+        return {
+            "sequence": self.sequence,
+            "type": self.type,
+            "service": self.service,
+            "namespace": self.namespace,
+            "data": self.data,
+            "timestamp": self.timestamp.isoformat(),
+            "trace_id": self.trace_id,
+        }
+
+    def __repr__(self) -> str:
+        return f"Event(#{self.sequence} {self.service}:{self.type} {self.data!r})"
+
+
+EventHandler = Callable[[Event], Any]
+
+
+def _default_coalesce_key(event: Event) -> Hashable:
+    return (event.service, event.type)
 
-class EventBus:
-    """Central event bus for service communication and observability."""
+
+class _Index:
+    """Ascending sequence numbers of the retained events with one key.
+
+    Evicted entries are skipped by advancing ``start`` and compacted away
+    once they make up half the list.
+    """
+
+    __slots__ = ("sequences", "start")
 
     def __init__(self) -> None:
-        self._handlers: Dict[str, List[EventHandler]] = {}
-        self._events: List[Event] = []
+        self.sequences: List[int] = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.sequences) - self.start
+
+    def evict(self) -> None:
+        self.start += 1
+        if self.start > 64 and self.start * 2 > len(self.sequences):
+            del self.sequences[: self.start]
+            self.start = 0
+
+    def after(self, sequence: int) -> Iterator[int]:
+        """Indexed sequence numbers above ``sequence``."""
+        sequences = self.sequences
+        for position in range(bisect_right(sequences, sequence, self.start), len(sequences)):
+            yield sequences[position]
+
+
+class EventLog:
+    """Bounded store of published events.
+
+    Events live in a ring buffer addressed by sequence number, so a reader
+    holding a cursor gets the ``k`` newer events in O(k). Per-type,
+    per-service and per-namespace indexes make filtered reads independent
+    of the other traffic. The oldest events are evicted once ``max_events``,
+    ``max_bytes`` (approximate) or ``max_age`` seconds is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_events < 1:
+            raise ValueError("max_events must be at least 1")
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._ring: List[Optional[Event]] = [None] * max_events
+        self._sizes: List[int] = [0] * max_events if max_bytes is not None else []
+        self._bytes = 0
+        # Sequence numbers of the oldest retained event and of the next one.
+        self._first = 1
+        self._next = 1
+        self._by_type: Dict[str, _Index] = {}
+        self._by_service: Dict[str, _Index] = {}
+        self._by_namespace: Dict[str, _Index] = {}
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    @property
+    def first_sequence(self) -> int:
+        """Sequence number of the oldest retained event."""
+        return self._first
+
+    @property
+    def last_sequence(self) -> int:
+        """Sequence number of the newest event; 0 before the first one."""
+        return self._next - 1
+
+    @property
+    def bytes(self) -> int:
+        """Approximate size of the retained events (tracked with ``max_bytes``)."""
+        return self._bytes
+
+    def append(self, event: Event) -> int:
+        """Store an event and return its sequence number."""
+        if self._next - self._first == self.max_events:
+            self._evict()
+        sequence = event.sequence = self._next
+        self._next += 1
+        slot = sequence % self.max_events
+        self._ring[slot] = event
+        _index(self._by_type, event.type).sequences.append(sequence)
+        _index(self._by_service, event.service).sequences.append(sequence)
+        _index(self._by_namespace, event.namespace).sequences.append(sequence)
+        if self.max_bytes is not None:
+            size = self._sizes[slot] = event.size()
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self) > 1:
+                self._evict()
+        if self.max_age is not None:
+            self.expire()
+        return sequence
+
+    def expire(self) -> None:
+        """Evict the events older than ``max_age``."""
+        if self.max_age is None:
+            return
+        cutoff = self._clock() - self.max_age
+        while self._first < self._next and self._event(self._first).created < cutoff:
+            self._evict()
+
+    def read(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        event_type: Optional[str] = None,
+        service: Optional[str] = None,
+        namespace: Optional[str] = None,
+    ) -> List[Event]:
+        """Retained events with a sequence number above ``after``, oldest first.
+
+        Pass the sequence number of the last event seen as ``after`` to
+        tail the log. Events evicted before being read are skipped.
+        """
+        self.expire()
+        if event_type is None and service is None and namespace is None:
+            start = max(after + 1, self._first)
+            stop = self._next if limit is None else min(self._next, start + limit)
+            return [self._event(sequence) for sequence in range(start, stop)]
+
+        indexes = []
+        if event_type is not None:
+            indexes.append(self._by_type.get(event_type))
+        if service is not None:
+            indexes.append(self._by_service.get(service))
+        if namespace is not None:
+            indexes.append(self._by_namespace.get(namespace))
+        if None in indexes:
+            return []
+        # Walk the smallest index and check the other conditions per event.
+        index = min(indexes, key=len)  # type: ignore[arg-type]
+        events = []
+        for sequence in index.after(max(after, self._first - 1)):  # type: ignore[union-attr]
+            event = self._event(sequence)
+            if (
+                (event_type is not None and event.type != event_type)
+                or (service is not None and event.service != service)
+                or (namespace is not None and event.namespace != namespace)
+            ):
+                continue
+            events.append(event)
+            if limit is not None and len(events) == limit:
+                break
+        return events
+
+    def count(self, event_type: Optional[str] = None, service: Optional[str] = None) -> int:
+        """Number of retained events of a type or service."""
+        self.expire()
+        if event_type is None and service is None:
+            return len(self)
+        if service is None or event_type is None:
+            index = self._by_type.get(event_type) if service is None else self._by_service.get(service)  # type: ignore[arg-type]
+            return len(index) if index is not None else 0
+        return len(self.read(event_type=event_type, service=service))
+
+    def clear(self) -> None:
+        """Drop every retained event; sequence numbers keep counting."""
+        self._ring = [None] * self.max_events
+        if self.max_bytes is not None:
+            self._sizes = [0] * self.max_events
+        self._bytes = 0
+        self._first = self._next
+        self._by_type.clear()
+        self._by_service.clear()
+        self._by_namespace.clear()
+
+    def _event(self, sequence: int) -> Event:
+        return self._ring[sequence % self.max_events]  # type: ignore[return-value]
+
+    def _evict(self) -> None:
+        slot = self._first % self.max_events
+        event = self._ring[slot]
+        assert event is not None
+        self._ring[slot] = None
+        self._first += 1
+        _drop(self._by_type, event.type)
+        _drop(self._by_service, event.service)
+        _drop(self._by_namespace, event.namespace)
+        if self.max_bytes is not None:
+            self._bytes -= self._sizes[slot]
+
+
+class Subscription:
+    """One handler subscribed to an event pattern.
+
+    In asynchronous mode events wait in a bounded per-subscription queue
+    drained by a worker task, so a slow handler only delays itself. When
+    the queue is full, ``overflow`` decides what happens:
+
+    - ``drop``: the new event is discarded;
+    - ``block``: the publisher waits until the worker makes room;
+    - ``coalesce``: a queued event with the same ``coalesce_key`` is
+      replaced in place, or else the oldest queued event is discarded.
+    """
+
+    def __init__(
+        self,
+        pattern: str,
+        handler: EventHandler,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: str = DROP,
+        coalesce_key: Callable[[Event], Hashable] = _default_coalesce_key,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.pattern = pattern
+        self.handler = handler
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.coalesce_key = coalesce_key
+        self._queue: Deque[Event] = deque()
+        # Queued events by coalesce key, oldest first (coalesce policy only).
+        self._pending: Dict[Hashable, Event] = {}
+        self._worker: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional["asyncio.Future[None]"] = None
+        self._space: Deque["asyncio.Future[None]"] = deque()
+        self._idle: List["asyncio.Future[None]"] = []
+        self._busy = False
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
 
-    def subscribe(self, event_type: str, handler: EventHandler) -> None:
-        """Subscribe to events of a specific type."""
-        if event_type not in self._handlers:
-            self._handlers[event_type] = []
-        self._handlers[event_type].append(handler)
+    @property
+    def depth(self) -> int:
+        """Events waiting for the handler."""
+        return len(self._pending) if self.overflow == COALESCE else len(self._queue)
+
+    def matches(self, event_type: str) -> bool:
+        """Whether events of ``event_type`` are delivered to this subscription."""
+        if self.pattern.endswith("*"):
+            return event_type.startswith(self.pattern[:-1])
+        return event_type == self.pattern
+
+    def offer(self, event: Event, force: bool = False) -> bool:
+        """Queue an event without waiting; ``False`` means a blocking publisher must wait.
+
+        With ``force`` a full ``block`` queue takes the event past its bound.
+        """
+        if self.overflow == COALESCE:
+            pending = self._pending
+            key = self.coalesce_key(event)
+            if key in pending:
+                pending[key] = event
+                self.coalesced += 1
+                return True
+            if len(pending) >= self.queue_size:
+                del pending[next(iter(pending))]
+                self.dropped += 1
+            pending[key] = event
+            depth = len(pending)
+        else:
+            queue = self._queue
+            if len(queue) >= self.queue_size:
+                if self.overflow != BLOCK:
+                    self.dropped += 1
+                    return True
+                if not force:
+                    return False
+            queue.append(event)
+            depth = len(queue)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        elif self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+        return True
+
+    async def put(self, event: Event) -> None:
+        """Queue an event, waiting for room under the ``block`` policy."""
+        while not self.offer(event):
+            space = asyncio.get_running_loop().create_future()
+            self._space.append(space)
+            try:
+                await space
+            except asyncio.CancelledError:
+                if space in self._space:
+                    self._space.remove(space)
+                elif self._space:
+                    self._space.popleft().set_result(None)  # pass on the slot we were given
+                raise
+
+    async def deliver(self, event: Event) -> None:
+        """Run the handler for one event and record the outcome."""
+        start = time.perf_counter()
+        try:
+            result = self.handler(event)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            self.errors += 1
+            print(f"Error in event handler: {e}")
+        elapsed = time.perf_counter() - start
+        self.delivered += 1
+        self._latency_total += elapsed
+        if elapsed > self._latency_max:
+            self._latency_max = elapsed
+
+    async def join(self) -> None:
+        """Wait until every queued event has been handled."""
+        if self.depth or self._busy:
+            idle = asyncio.get_running_loop().create_future()
+            self._idle.append(idle)
+            await idle
+
+    async def close(self) -> None:
+        """Stop the worker; events still queued are discarded."""
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._queue.clear()
+        self._pending.clear()
+        self._release_idle()
+        while self._space:
+            space = self._space.popleft()
+            if not space.done():
+                space.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and handler metrics."""
+        return {
+            "pattern": self.pattern,
+            "overflow": self.overflow,
+            "queue_size": self.queue_size,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "mean_latency_ms": (
+                self._latency_total / self.delivered * 1000 if self.delivered else 0.0
+            ),
+            "max_latency_ms": self._latency_max * 1000,
+        }
+
+    def _pop(self) -> Event:
+        if self.overflow == COALESCE:
+            return self._pending.pop(next(iter(self._pending)))
+        return self._queue.popleft()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.depth:
+                self._release_idle()
+                self._wakeup = loop.create_future()
+                await self._wakeup
+                self._wakeup = None
+                continue
+            event = self._pop()
+            while self._space:
+                space = self._space.popleft()
+                if not space.done():
+                    space.set_result(None)
+                    break
+            self._busy = True
+            try:
+                await self.deliver(event)
+            finally:
+                self._busy = False
+
+    def _release_idle(self) -> None:
+        idle, self._idle = self._idle, []
+        for waiter in idle:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class EventBus:
+    """Central event bus for service communication and observability.
+
+    Handlers subscribe to an event type, a prefix pattern such as
+    ``bucket.*``, or ``*`` for everything. By default :meth:`publish`
+    awaits each handler in turn. With ``asynchronous=True`` every
+    subscription gets its own queue and worker task instead, and
+    publishing only queues the event (see :class:`Subscription`).
+    """
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        asynchronous: bool = False,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: str = DROP,
+    ) -> None:
+        self.log = EventLog(max_events, max_bytes, max_age)
+        self.asynchronous = asynchronous
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self._subscriptions: List[Subscription] = []
+        # Matching subscriptions per event type, rebuilt when subscriptions change.
+        self._routes: Dict[str, List[Subscription]] = {}
+        # Readers waiting in wait() for the next event.
+        self._waiters: List["asyncio.Future[None]"] = []
+
+    def subscribe(
+        self,
+        event_type: str,
+        handler: EventHandler,
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+        coalesce_key: Callable[[Event], Hashable] = _default_coalesce_key,
+    ) -> Subscription:
+        """Subscribe to events of a type or pattern (``prefix.*``, ``*``)."""
+        subscription = Subscription(
+            event_type,
+            handler,
+            self.queue_size if queue_size is None else queue_size,
+            overflow or self.overflow,
+            coalesce_key,
+        )
+        self._subscriptions.append(subscription)
+        self._routes.clear()
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription and stop its worker."""
+        self._subscriptions.remove(subscription)
+        self._routes.clear()
+        await subscription.close()
 
     async def publish(self, event: Event) -> None:
         """Publish an event to all subscribers."""
-        self._events.append(event)
-        handlers = self._handlers.get(event.type, [])
-        for handler in handlers:
-            try:
-                result = handler(event)
-                if asyncio.iscoroutine(result):
-                    await result
-            except Exception as e:
-                print(f"Error in event handler: {e}")
-
-    def get_events(self, event_type: str | None = None) -> List[Event]:
-        """Get all events, optionally filtered by type."""
-        if event_type is None:
-            return self._events.copy()
-        return [e for e in self._events if e.type == event_type]
+        subscriptions = self._append(event)
+        if self.asynchronous:
+            for subscription in subscriptions:
+                if not subscription.offer(event):
+                    await subscription.put(event)
+        else:
+            for subscription in subscriptions:
+                await subscription.deliver(event)
+
+    def emit(self, event: Event) -> None:
+        """Publish from synchronous code, without waiting for anything.
+
+        The event is queued for every matching subscription as in
+        asynchronous mode. The caller cannot be held back, so a full
+        ``block`` subscription takes the event past its bound.
+        """
+        for subscription in self._append(event):
+            subscription.offer(event, force=True)
+
+    async def wait(self, after: int, timeout: Optional[float] = None) -> bool:
+        """Wait until an event newer than sequence number ``after`` is published.
+
+        Returns ``False`` if ``timeout`` seconds pass first.
+        """
+        if self.log.last_sequence > after:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return True
+
+    def _append(self, event: Event) -> List[Subscription]:
+        """Log an event, wake readers waiting for it and return the matching subscriptions."""
+        self.log.append(event)
+        if self._waiters:
+            waiters, self._waiters = self._waiters, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        subscriptions = self._routes.get(event.type)
+        if subscriptions is None:
+            subscriptions = self._routes[event.type] = [
+                s for s in self._subscriptions if s.matches(event.type)
+            ]
+        return subscriptions
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been handled."""
+        for subscription in list(self._subscriptions):
+            await subscription.join()
+
+    async def close(self) -> None:
+        """Stop every subscription worker."""
+        for subscription in self._subscriptions:
+            await subscription.close()
+
+    def subscription_stats(self) -> List[Dict[str, Any]]:
+        """Queue depth and handler latency of every subscription."""
+        return [subscription.stats() for subscription in self._subscriptions]
+
+    def get_events(
+        self, event_type: str | None = None, service: str | None = None
+    ) -> List[Event]:
+        """Get retained events, optionally filtered by type and service."""
+        return self.log.read(event_type=event_type, service=service)
+
+    def read(
+        self,
+        after: int = 0,
+        limit: Optional[int] = None,
+        event_type: Optional[str] = None,
+        service: Optional[str] = None,
+        namespace: Optional[str] = None,
+    ) -> List[Event]:
+        """Events published after the sequence number ``after``; see :meth:`EventLog.read`."""
+        return self.log.read(after, limit, event_type, service, namespace)
 
     def clear(self) -> None:
         """Clear all events (useful for testing)."""
-        self._events.clear()
+        self.log.clear()
+
+
+def _index(indexes: Dict[str, _Index], key: str) -> _Index:
+    index = indexes.get(key)
+    if index is None:
+        index = indexes[key] = _Index()
+    return index
+
+
+def _drop(indexes: Dict[str, _Index], key: str) -> None:
+    """Forget the oldest sequence number under ``key``."""
+    index = indexes[key]
+    index.evict()
+    if not index:
+        del indexes[key]
+
+
+def _epoch(moment: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
@@ -0,0 +1,158 @@
+"""Filtered, batched tailing of the event log for remote observers."""
+
+from fnmatch import translate
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import json
+import re
+
+from starward.core.event_bus import Event, EventBus
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 0.05
+KEEPALIVE_INTERVAL = 15.0
+
+_TERM = re.compile(r"^\s*(type|service|data\.[A-Za-z0-9_.-]+)\s*(!=|=)\s*(.*?)\s*$")
+_OR = re.compile(r"\s+or\b\s*", re.IGNORECASE)
+_AND = re.compile(r"\s+and\b\s*", re.IGNORECASE)
+
+Predicate = Callable[[Event], bool]
+
+
+class EventFilter:
+    """A compiled filter expression.
+
+    Expressions are ``field=value`` or ``field!=value`` terms joined by
+    ``and``, with ``or`` between groups (``and`` binds tighter). Fields
+    are ``type``, ``service`` and ``data.<name>``; values may use ``*``
+    and ``?`` wildcards. For example::
+
+        type=object.* and data.bucket=logs or type=queue.deleted
+
+    Exact ``type``/``service`` terms of a single group are exposed as
+    ``event_type``/``service`` so the event log indexes can do the work.
+    A ``namespace`` restricts every group to that namespace's events.
+    """
+
+    def __init__(self, expression: str = "", namespace: Optional[str] = None) -> None:
+        self.expression = expression.strip()
+        self.namespace = namespace
+        self.event_type: Optional[str] = None
+        self.service: Optional[str] = None
+        groups = []
+        if self.expression:
+            groups = [_compile_group(group) for group in _OR.split(self.expression)]
+        if len(groups) == 1:
+            _, exact = groups[0]
+            self.event_type = exact.get("type")
+            self.service = exact.get("service")
+        predicates = [predicate for predicate, _ in groups]
+        if not predicates:
+            self._matches: Predicate = lambda event: True
+        elif len(predicates) == 1:
+            self._matches = predicates[0]
+        else:
+            self._matches = lambda event: any(p(event) for p in predicates)
+        if namespace is not None:
+            matches = self._matches
+            self._matches = lambda event: event.namespace == namespace and matches(event)
+
+    def __call__(self, event: Event) -> bool:
+        return self._matches(event)
+
+
+def _compile_group(group: str) -> Tuple[Predicate, Dict[str, str]]:
+    """Compile ``and``-joined terms; also return the exact type/service terms."""
+    tests: List[Predicate] = []
+    exact: Dict[str, str] = {}
+    for term in _AND.split(group):
+        match = _TERM.match(term)
+        if match is None or not match.group(3):
+            raise ValueError(f"Invalid filter term: {term.strip()!r}")
+        field, operator, value = match.groups()
+        getter = _getter(field)
+        if "*" in value or "?" in value:
+            pattern = re.compile(translate(value))
+            test: Predicate = lambda e, g=getter, p=pattern: p.match(str(g(e))) is not None
+        else:
+            test = lambda e, g=getter, v=value: str(g(e)) == v
+            if operator == "=" and field in ("type", "service"):
+                exact[field] = value
+        if operator == "!=":
+            test = lambda e, t=test: not t(e)
+        tests.append(test)
+    if len(tests) == 1:
+        return tests[0], exact
+    return (lambda event: all(t(event) for t in tests)), exact
+
+
+def _getter(field: str) -> Callable[[Event], Any]:
+    if field == "type":
+        return lambda event: event.type
+    if field == "service":
+        return lambda event: event.service
+    name = field[len("data.") :]
+    return lambda event: event.data.get(name, "")
+
+
+class Batch(NamedTuple):
+    """Events matching a stream's filter, in publication order.
+
+    ``cursor`` is the sequence number to resume after; ``missed`` counts
+    events evicted from the log before the stream could read them. An
+    empty batch is a keepalive.
+    """
+
+    events: List[Event]
+    cursor: int
+    missed: int
+
+
+async def tail(
+    bus: EventBus,
+    event_filter: EventFilter,
+    after: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    interval: float = DEFAULT_INTERVAL,
+    keepalive: float = KEEPALIVE_INTERVAL,
+) -> AsyncIterator[Batch]:
+    """Follow the event log, yielding matching events in batches.
+
+    Starts after the sequence number ``after`` (default: only new events).
+    Once new events arrive, the stream waits ``interval`` seconds to let
+    more accumulate, so a busy log is sent as a few large batches rather
+    than one message per event.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    log = bus.log
+    cursor = log.last_sequence if after is None else after
+    while True:
+        if log.last_sequence <= cursor:
+            if not await bus.wait(cursor, keepalive):
+                yield Batch([], cursor, 0)
+                continue
+            if interval > 0:
+                await asyncio.sleep(interval)
+        missed = max(0, log.first_sequence - cursor - 1)
+        head = log.last_sequence
+        events = log.read(
+            cursor, batch_size, event_filter.event_type, event_filter.service, event_filter.namespace
+        )
+        # A full read may stop short of the head; resume from where it ended.
+        cursor = events[-1].sequence if len(events) == batch_size else head
+        matched = [event for event in events if event_filter(event)]
+        if matched or missed:
+            yield Batch(matched, cursor, missed)
+
+
+def encode_batch(batch: Batch) -> str:
+    """JSON message for a batch, as sent to stream clients."""
+    return json.dumps(
+        {
+            "cursor": batch.cursor,
+            "missed": batch.missed,
+            "events": [event.to_dict() for event in batch.events],
+        },
+        default=str,
+    )
@@ -0,0 +1,262 @@
+"""Append-only write-ahead journal of state mutations."""
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import os
+import struct
+import zlib
+
+from starward.core.codec import get_codec
+
+# Frame header: payload length and CRC-32 of the payload.
+_FRAME = struct.Struct("<II")
+# Payload prefix: sequence number and timestamp, readable without decoding the rest.
+_RECORD = struct.Struct("<Qd")
+
+DEFAULT_SYNC_INTERVAL = 0.005
+DEFAULT_SYNC_BYTES = 1 << 20
+# Records between entries of the in-memory seek index.
+INDEX_INTERVAL = 1024
+
+
+class JournalRecord:
+    """One journaled mutation."""
+
+    __slots__ = ("seq", "service", "action", "params", "timestamp")
+
+    def __init__(
+        self,
+        seq: int,
+        service: str,
+        action: str,
+        params: Dict[str, Any],
+        timestamp: float = 0.0,
+    ) -> None:
+        self.seq = seq
+        self.service = service
+        self.action = action
+        self.params = params
+        # Engine clock reading (seconds since the epoch) when the mutation happened.
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"JournalRecord(seq={self.seq}, service={self.service!r}, action={self.action!r})"
+
+
+class OperationJournal:
+    """Append-only log of mutations with group-committed fsync.
+
+    ``append`` only buffers the record; the buffer is written and fsynced
+    on a background thread every ``sync_interval`` seconds (or once it
+    reaches ``sync_bytes``), so a burst of mutations shares one fsync.
+    ``await flush()`` waits until everything appended so far is durable.
+
+    Each record is framed with its length and CRC-32. Opening a journal
+    drops a torn or corrupt tail left by a crash. A sparse index of file
+    offsets lets :meth:`read` and :meth:`seq_at` seek instead of scanning
+    the whole file. A ``read_only`` journal can be read while another
+    process appends to it.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        sync_bytes: int = DEFAULT_SYNC_BYTES,
+        read_only: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.sync_bytes = sync_bytes
+        self.read_only = read_only
+        self._codec = get_codec("binary")
+        self._buffer = bytearray()
+        self._file: Optional[BinaryIO] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: Optional["asyncio.Task[None]"] = None
+        self._error: Optional[BaseException] = None
+        # (seq, file offset, latest timestamp up to that record) every INDEX_INTERVAL records.
+        self._index: List[Tuple[int, int, float]] = []
+        self._max_timestamp = 0.0
+        self._last_seq, self._end = self._recover()
+        self._synced_seq = self._last_seq
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the last appended record (0 if none)."""
+        return self._last_seq
+
+    @property
+    def synced_seq(self) -> int:
+        """Sequence number of the last record known to be on stable storage."""
+        return self._synced_seq
+
+    def append(
+        self, service: str, action: str, params: Dict[str, Any], timestamp: float = 0.0
+    ) -> int:
+        """Buffer a record and return its sequence number."""
+        if self.read_only:
+            raise ValueError(f"Journal is read-only: {self.path}")
+        if self._error is not None:
+            raise RuntimeError(f"Journal write failed: {self._error}") from self._error
+
+        seq = self._last_seq + 1
+        payload = _RECORD.pack(seq, timestamp) + self._codec.encode([service, action, params])
+        self._note(seq, self._end, timestamp)
+        self._buffer += _FRAME.pack(len(payload), zlib.crc32(payload))
+        self._buffer += payload
+        self._end += _FRAME.size + len(payload)
+        self._last_seq = seq
+        self._schedule_sync()
+        return seq
+
+    async def flush(self) -> None:
+        """Wait until every appended record has been written and fsynced."""
+        target = self._last_seq
+        while self._synced_seq < target:
+            if self._error is not None:
+                raise RuntimeError(f"Journal write failed: {self._error}") from self._error
+            await asyncio.shield(self._start_sync())
+
+    def flush_sync(self) -> None:
+        """Write and fsync buffered records from synchronous code."""
+        if self._flushing is not None and not self._flushing.done():
+            raise RuntimeError("Journal is flushing in the background; use flush()")
+        data, seq = bytes(self._buffer), self._last_seq
+        self._buffer.clear()
+        self._write(data)
+        self._synced_seq = seq
+
+    async def close(self) -> None:
+        """Flush buffered records and close the file."""
+        await self.flush()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self, after_seq: int = 0, until_seq: Optional[int] = None) -> Iterator[JournalRecord]:
+        """Iterate over durable records with ``after_seq < seq <= until_seq``."""
+        if not self.path.exists():
+            return
+        i = bisect_right(self._index, after_seq + 1, key=lambda entry: entry[0])
+        offset = self._index[i - 1][1] if i else 0
+        with self.path.open("rb") as f:
+            for payload, _ in _frames(f, offset):
+                seq, timestamp = _RECORD.unpack_from(payload)
+                if until_seq is not None and seq > until_seq:
+                    return
+                if seq > after_seq:
+                    service, action, params = self._codec.decode(payload[_RECORD.size :])
+                    yield JournalRecord(seq, service, action, params, timestamp)
+
+    def seq_at(self, timestamp: float) -> int:
+        """Sequence number of the last durable record before the first one after ``timestamp``.
+
+        Timestamps are expected to be non-decreasing; a record stamped
+        earlier than one before it does not move the position back.
+        """
+        # The first record after ``timestamp`` lies in the last block whose
+        # running maximum has not yet passed it.
+        i = bisect_right(self._index, timestamp, key=lambda entry: entry[2])
+        if i == 0 or not self.path.exists():
+            return 0
+        seq, offset, _ = self._index[i - 1]
+        last = seq - 1
+        with self.path.open("rb") as f:
+            for payload, _ in _frames(f, offset):
+                seq, record_timestamp = _RECORD.unpack_from(payload)
+                if record_timestamp > timestamp:
+                    break
+                last = seq
+        return int(last)
+
+    def _note(self, seq: int, offset: int, timestamp: float) -> None:
+        """Add a record to the seek index."""
+        if timestamp > self._max_timestamp:
+            self._max_timestamp = timestamp
+        if (seq - 1) % INDEX_INTERVAL == 0:
+            self._index.append((seq, offset, self._max_timestamp))
+
+    def _recover(self) -> Tuple[int, int]:
+        """Index the file, truncate a torn tail and return (last seq, end offset)."""
+        if not self.path.exists():
+            return 0, 0
+        last_seq, start, end = 0, 0, 0
+        with self.path.open("rb") as f:
+            for payload, end in _frames(f):
+                seq, timestamp = _RECORD.unpack_from(payload)
+                self._note(seq, start, timestamp)
+                last_seq, start = seq, end
+        if end != self.path.stat().st_size and not self.read_only:
+            with self.path.open("r+b") as f:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+        return int(last_seq), end
+
+    def _schedule_sync(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # synchronous callers flush explicitly
+        if len(self._buffer) >= self.sync_bytes:
+            self._start_sync()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.sync_interval, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        if self._buffer:
+            self._start_sync()
+
+    def _start_sync(self) -> "asyncio.Task[None]":
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.get_running_loop().create_task(self._sync())
+        return self._flushing
+
+    async def _sync(self) -> None:
+        while self._buffer:
+            data, seq = bytes(self._buffer), self._last_seq
+            self._buffer.clear()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="starward-journal")
+            try:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._write, data)
+            except BaseException as e:
+                self._error = e
+                return
+            self._synced_seq = seq
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("ab")
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+
+def _frames(f: BinaryIO, offset: int = 0) -> Iterator[Tuple[bytes, int]]:
+    """Yield (payload, end offset) for each intact frame, stopping at the first bad one."""
+    f.seek(offset)
+    while True:
+        header = f.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            return
+        size, crc = _FRAME.unpack(header)
+        payload = f.read(size)
+        if len(payload) < size or zlib.crc32(payload) != crc:
+            return
+        offset += _FRAME.size + size
+        yield payload, offset
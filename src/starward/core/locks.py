@@ -0,0 +1,165 @@
+"""Per-resource locks and the barrier that keeps snapshots out of in-flight mutations."""
+
+from contextlib import asynccontextmanager
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+
+
+class ResourceLocks:
+    """Mutual exclusion keyed by resource name.
+
+    A key is present only while its lock is held, so the table stays as
+    small as the set of resources being mutated right now and an
+    uncontended acquire allocates nothing. Waiters are served in arrival
+    order; releasing hands the lock straight to the next one.
+    """
+
+    def __init__(self) -> None:
+        # Held keys, each with its waiters (created on first contention).
+        self._held: Dict[str, Optional[Deque["asyncio.Future[None]"]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._held)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of held locks and of tasks waiting for one."""
+        waiting = sum(len(waiters) for waiters in self._held.values() if waiters)
+        return {"held": len(self._held), "waiting": waiting}
+
+    def locked(self, key: str) -> bool:
+        """Whether a task currently holds the lock for ``key``."""
+        return key in self._held
+
+    def try_acquire(self, key: str) -> bool:
+        """Take the lock for ``key`` if it is free, without waiting."""
+        if key in self._held:
+            return False
+        self._held[key] = None
+        return True
+
+    async def acquire(self, key: str) -> None:
+        """Wait for and take the lock for ``key``."""
+        if self.try_acquire(key):
+            return
+        waiters = self._held[key]
+        if waiters is None:
+            waiters = self._held[key] = deque()
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(key)  # handed over just as we were cancelled
+            elif waiter in waiters:
+                waiters.remove(waiter)
+            raise
+
+    def release(self, key: str) -> None:
+        """Release the lock for ``key``, handing it to the longest waiter."""
+        waiters = self._held[key]
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        del self._held[key]
+
+
+class SnapshotBarrier:
+    """Admits any number of mutations at once, or one exclusive section.
+
+    Mutations call :meth:`enter` and :meth:`leave` around their critical
+    section. An exclusive section (taking or restoring a snapshot) stops
+    new mutations from entering, waits for those in flight to leave and
+    then runs alone, so it never observes a half-applied mutation.
+    ``on_idle`` is called whenever the last mutation in flight leaves.
+    """
+
+    def __init__(self, on_idle: Optional[Callable[[], None]] = None) -> None:
+        self.active = 0
+        self._on_idle = on_idle
+        self._lock = asyncio.Lock()
+        # Set while an exclusive section is waiting or running.
+        self._closed: Optional[asyncio.Event] = None
+        self._drained: Optional["asyncio.Future[None]"] = None
+
+    def try_enter(self) -> bool:
+        """Join the mutations in flight unless an exclusive section is pending."""
+        if self._closed is not None:
+            return False
+        self.active += 1
+        return True
+
+    async def enter(self) -> None:
+        """Wait until no exclusive section is pending, then join the mutations in flight."""
+        while self._closed is not None:
+            await self._closed.wait()
+        self.active += 1
+
+    def leave(self) -> None:
+        """Leave after :meth:`enter`."""
+        self.active -= 1
+        if self.active:
+            return
+        if self._drained is not None:
+            if not self._drained.done():
+                self._drained.set_result(None)
+        elif self._on_idle is not None:
+            self._on_idle()
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator[None]:
+        """Run the body with no mutation in flight.
+
+        Must not be entered from inside a mutation, which would wait for
+        itself.
+        """
+        async with self._lock:
+            closed = self._closed = asyncio.Event()
+            try:
+                if self.active:
+                    self._drained = asyncio.get_running_loop().create_future()
+                    await self._drained
+                yield
+            finally:
+                self._drained = None
+                self._closed = None
+                closed.set()
+
+
+class MutationGuard:
+    """Async context manager for one mutation: resource locks plus a place in the barrier.
+
+    Locks are taken in the order given (callers pass them sorted), before
+    entering the barrier, so a mutation queued behind another one on the
+    same resource never holds up a snapshot.
+    """
+
+    __slots__ = ("_locks", "_barrier", "_keys")
+
+    def __init__(self, locks: ResourceLocks, barrier: SnapshotBarrier, keys: Tuple[str, ...]) -> None:
+        self._locks = locks
+        self._barrier = barrier
+        self._keys = keys
+
+    async def __aenter__(self) -> None:
+        locks = self._locks
+        taken = 0
+        try:
+            for key in self._keys:
+                if not locks.try_acquire(key):
+                    await locks.acquire(key)
+                taken += 1
+            if not self._barrier.try_enter():
+                await self._barrier.enter()
+        except BaseException:
+            for key in reversed(self._keys[:taken]):
+                self._locks.release(key)
+            raise
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self._barrier.leave()
+        for key in reversed(self._keys):
+            self._locks.release(key)
@@ -0,0 +1,138 @@
+"""Isolated state namespaces served by one emulator process."""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import re
+import time
+
+from starward.core.registry import ServiceRegistry
+from starward.core.state_engine import StateEngine
+
+DEFAULT_NAMESPACE = "default"
+DEFAULT_IDLE_TIMEOUT = 600.0
+# Namespace names double as directory names.
+NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+@dataclass
+class Namespace:
+    """One tenant's state engine and service instances."""
+
+    name: str
+    state_engine: StateEngine
+    registry: ServiceRegistry
+    last_used: float = field(default_factory=time.monotonic)
+    # Requests currently being served; a busy namespace is never evicted.
+    active: int = 0
+
+    def service(self, name: str) -> Any:
+        """Get one of the namespace's services."""
+        return self.registry.get_service(name)
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """Convert namespace to dictionary."""
+        return {
+            "name": self.name,
+            "services": self.registry.list_services(),
+            "active_requests": self.active,
+            "idle_seconds": round(now - self.last_used, 3),
+        }
+
+
+class NamespaceManager:
+    """Creates namespaces on first use and evicts the ones left idle.
+
+    ``factory`` builds a namespace with its own state engine and services.
+    Pinned namespaces (such as the server's default one) are never
+    evicted. Evicting a namespace discards its live state; snapshots it
+    persisted stay on disk and can be restored after it is recreated.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Namespace],
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._factory = factory
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._namespaces: Dict[str, Namespace] = {}
+        self._pinned: set[str] = set()
+
+    def add(self, namespace: Namespace, pinned: bool = False) -> None:
+        """Register an existing namespace."""
+        self._namespaces[namespace.name] = namespace
+        if pinned:
+            self._pinned.add(namespace.name)
+
+    async def register(self, namespace: Namespace) -> None:
+        """Start and add a namespace built elsewhere, such as a fork."""
+        validate_name(namespace.name)
+        if namespace.name in self._namespaces:
+            raise ValueError(f"Namespace already exists: {namespace.name}")
+        self._namespaces[namespace.name] = namespace
+        await namespace.registry.start_all()
+
+    def get(self, name: str) -> Optional[Namespace]:
+        """Get a namespace if it is loaded."""
+        return self._namespaces.get(name)
+
+    async def acquire(self, name: str) -> Namespace:
+        """Get a namespace for a request, creating it if needed; pair with :meth:`release`."""
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            validate_name(name)
+            namespace = self._factory(name)
+            self._namespaces[name] = namespace
+            await namespace.registry.start_all()
+        namespace.active += 1
+        namespace.last_used = self._clock()
+        return namespace
+
+    def release(self, namespace: Namespace) -> None:
+        """Mark a request on ``namespace`` as finished."""
+        namespace.active -= 1
+        namespace.last_used = self._clock()
+
+    def list_namespaces(self) -> List[Dict[str, Any]]:
+        """Describe loaded namespaces."""
+        now = self._clock()
+        return [self._namespaces[name].to_dict(now) for name in sorted(self._namespaces)]
+
+    async def drop(self, name: str) -> None:
+        """Stop a namespace and discard its live state."""
+        if name in self._pinned:
+            raise ValueError(f"Namespace cannot be dropped: {name}")
+        namespace = self._namespaces.pop(name, None)
+        if namespace is None:
+            raise ValueError(f"Namespace not found: {name}")
+        await _close(namespace)
+
+    async def evict_idle(self) -> List[str]:
+        """Drop namespaces without requests for ``idle_timeout`` seconds."""
+        cutoff = self._clock() - self.idle_timeout
+        idle = [
+            name
+            for name, namespace in self._namespaces.items()
+            if name not in self._pinned and not namespace.active and namespace.last_used <= cutoff
+        ]
+        for name in idle:
+            await _close(self._namespaces.pop(name))
+        return idle
+
+    async def close(self) -> None:
+        """Stop every unpinned namespace."""
+        for name in [name for name in self._namespaces if name not in self._pinned]:
+            await _close(self._namespaces.pop(name))
+
+
+def validate_name(name: str) -> None:
+    """Raise ValueError unless ``name`` is a valid namespace name."""
+    if not NAMESPACE_PATTERN.match(name):
+        raise ValueError(f"Invalid namespace name: {name}")
+
+
+async def _close(namespace: Namespace) -> None:
+    await namespace.registry.stop_all()
+    await namespace.state_engine.close()
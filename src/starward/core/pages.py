@@ -0,0 +1,106 @@
+"""State page types for copy-on-write snapshots.
+
+The state engine stores service data as a flat mapping of pages (one per
+bucket, queue, etc.). A snapshot shares every page with the live state;
+a page is copied only when it is first written after the snapshot, so
+snapshots are O(1) and isolated from later mutations.
+
+Page values that need persisting register themselves with
+:func:`register_page_type` so snapshots can be written to and read back
+from disk. A lazily restored snapshot holds :class:`PageRef` placeholders
+that decode their page from disk on first access.
+
+Large payloads live outside the pages, as files in the engine's blob
+directories named by their SHA-256 digest. Values referring to such files
+list their digests from a ``blobs()`` method, which is how snapshots,
+bundles and garbage collection find them (see :func:`page_blobs`).
+"""
+
+from typing import Any, Callable, Dict, Optional, Protocol, Set, Type, TypeVar
+
+T = TypeVar("T")
+
+_PAGE_TYPES: Dict[str, Type[Any]] = {}
+
+
+class Page(Protocol):
+    """Protocol for values stored in the state engine."""
+
+    page_type: str
+
+    def copy(self) -> Any:
+        """Return an independent copy for copy-on-write."""
+        ...
+
+    def to_state(self) -> Any:
+        """Return a serializable representation."""
+        ...
+
+    @classmethod
+    def from_state(cls, state: Any) -> Any:
+        """Rebuild from a serializable representation."""
+        ...
+
+
+def register_page_type(cls: Type[T]) -> Type[T]:
+    """Class decorator making a page type persistable."""
+    _PAGE_TYPES[cls.page_type] = cls  # type: ignore[attr-defined]
+    return cls
+
+
+def get_page_type(name: str) -> Type[Any]:
+    """Look up a registered page type by name."""
+    if name not in _PAGE_TYPES:
+        raise ValueError(f"Unknown page type: {name}")
+    return _PAGE_TYPES[name]
+
+
+class PageRef:
+    """Placeholder for a persisted page, decoded the first time it is resolved.
+
+    Pages are immutable once persisted, so the decoded page is cached and
+    shared by every state mapping holding this reference.
+    """
+
+    __slots__ = ("digest", "codec", "_load", "_page")
+
+    def __init__(self, digest: str, codec: str, load: Callable[[str], Any]) -> None:
+        self.digest = digest
+        self.codec = codec
+        self._load: Optional[Callable[[str], Any]] = load
+        self._page: Any = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the page has been decoded."""
+        return self._load is None
+
+    def resolve(self) -> Any:
+        """Return the page, decoding it on first use."""
+        if self._load is not None:
+            self._page = self._load(self.digest)
+            self._load = None
+        return self._page
+
+
+def resolve_page(value: Any) -> Any:
+    """Return ``value``, decoding it first if it is a :class:`PageRef`."""
+    if type(value) is PageRef:
+        return value.resolve()
+    return value
+
+
+def page_blobs(value: Any) -> Set[str]:
+    """Digests of the blob files referred to by a page or a journaled value."""
+    digests: Set[str] = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        blobs = getattr(value, "blobs", None)
+        if blobs is not None:
+            digests.update(blobs())
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return digests
@@ -1,10 +1,18 @@
 """Plugin system for extensibility."""
 
-from typing import Any, Callable, Dict, List, Optional, Protocol
+from typing import (
+    Any, Awaitable, Callable, Collection, Dict, List, Optional, Protocol, Tuple, TypeVar, cast,
+)
 from pathlib import Path
+import functools
 import importlib.util
+import inspect
 import yaml
 
+PreHook = Callable[[str, str, Dict[str, Any]], Awaitable[None]]
+PostHook = Callable[[str, str, Dict[str, Any], Any], Awaitable[None]]
+Operation = TypeVar("Operation", bound=Callable[..., Awaitable[Any]])
+
 
 class PluginHook(Protocol):
     """Protocol for plugin hooks."""
@@ -33,6 +41,16 @@ class Plugin:
 
     name: str = "base_plugin"
     version: str = "0.1.0"
+    # Actions to hook, as "service.action", "service.*" or "*"; None hooks every action.
+    actions: Optional[Collection[str]] = None
+
+    def hooks_action(self, service: str, action: str) -> bool:
+        """Whether the plugin's hooks apply to an action."""
+        if self.actions is None:
+            return True
+        return any(
+            pattern in ("*", f"{service}.*", f"{service}.{action}") for pattern in self.actions
+        )
 
     async def on_register(self) -> None:
         """Called when plugin is registered."""
@@ -53,12 +71,51 @@ class Plugin:
         pass
 
 
+class HookPipeline:
+    """The enabled hooks of one (service, action), in registration order."""
+
+    __slots__ = ("pre", "post")
+
+    def __init__(self, pre: List[PreHook], post: List[PostHook]) -> None:
+        self.pre = pre
+        self.post = post
+
+    async def run(
+        self,
+        owner: Any,
+        method: Callable[..., Awaitable[Any]],
+        action: str,
+        params: Dict[str, Any],
+    ) -> Any:
+        """Run the pre hooks, ``method`` of the service ``owner`` and then the post hooks.
+
+        Pre hooks may change ``params`` before the action sees them, or
+        raise to fail the action.
+        """
+        service = owner.service_name
+        for hook in self.pre:
+            await hook(service, action, params)
+        result = await method(owner, **params)
+        for post in self.post:
+            await post(service, action, params, result)
+        return result
+
+
 class PluginManager:
-    """Manages plugin lifecycle and execution."""
+    """Manages plugin lifecycle and execution.
+
+    Hooks are compiled into a :class:`HookPipeline` per (service, action)
+    on first use and the pipelines are dropped whenever a plugin is
+    registered, unloaded, enabled or disabled. Actions no enabled plugin
+    hooks have no pipeline, so they run without any hook overhead.
+    """
 
     def __init__(self) -> None:
         self._plugins: Dict[str, Plugin] = {}
         self._enabled: Dict[str, bool] = {}
+        self._pipelines: Dict[Tuple[str, str], Optional[HookPipeline]] = {}
+        # Whether any enabled plugin has a hook at all.
+        self.hooking = False
 
     async def load_plugin(self, plugin_path: str) -> None:
         """Load a plugin from a Python file or YAML config."""
@@ -109,6 +166,7 @@ class PluginManager:
         """Register a plugin."""
         self._plugins[plugin.name] = plugin
         self._enabled[plugin.name] = True
+        self._invalidate()
         await plugin.on_register()
 
     async def unload_plugin(self, name: str) -> None:
@@ -117,32 +175,69 @@ class PluginManager:
             await self._plugins[name].on_teardown()
             del self._plugins[name]
             del self._enabled[name]
+            self._invalidate()
 
     def enable_plugin(self, name: str) -> None:
         """Enable a plugin."""
         if name in self._plugins:
             self._enabled[name] = True
+            self._invalidate()
 
     def disable_plugin(self, name: str) -> None:
         """Disable a plugin."""
         if name in self._plugins:
             self._enabled[name] = False
+            self._invalidate()
+
+    def _invalidate(self) -> None:
+        """Drop the compiled pipelines after the set of enabled plugins changed."""
+        self._pipelines.clear()
+        self.hooking = any(
+            self._enabled[name] and (_overrides(plugin, "on_pre_action") or _overrides(plugin, "on_post_action"))
+            for name, plugin in self._plugins.items()
+        )
+
+    def pipeline(self, service: str, action: str) -> Optional[HookPipeline]:
+        """Compiled hooks of an action; None if no enabled plugin hooks it."""
+        key = (service, action)
+        try:
+            return self._pipelines[key]
+        except KeyError:
+            pipeline = self._pipelines[key] = self._compile(service, action)
+            return pipeline
+
+    def _compile(self, service: str, action: str) -> Optional[HookPipeline]:
+        pre: List[PreHook] = []
+        post: List[PostHook] = []
+        for name, plugin in self._plugins.items():
+            if not self._enabled.get(name, False) or not plugin.hooks_action(service, action):
+                continue
+            # Hooks left as the base class no-ops are not worth an await.
+            if _overrides(plugin, "on_pre_action"):
+                pre.append(plugin.on_pre_action)
+            if _overrides(plugin, "on_post_action"):
+                post.append(plugin.on_post_action)
+        if not pre and not post:
+            return None
+        return HookPipeline(pre, post)
 
     async def execute_pre_action(
         self, service: str, action: str, params: Dict[str, Any]
     ) -> None:
         """Execute pre-action hooks."""
-        for name, plugin in self._plugins.items():
-            if self._enabled.get(name, False):
-                await plugin.on_pre_action(service, action, params)
+        pipeline = self.pipeline(service, action)
+        if pipeline is not None:
+            for hook in pipeline.pre:
+                await hook(service, action, params)
 
     async def execute_post_action(
         self, service: str, action: str, params: Dict[str, Any], result: Any
     ) -> None:
         """Execute post-action hooks."""
-        for name, plugin in self._plugins.items():
-            if self._enabled.get(name, False):
-                await plugin.on_post_action(service, action, params, result)
+        pipeline = self.pipeline(service, action)
+        if pipeline is not None:
+            for hook in pipeline.post:
+                await hook(service, action, params, result)
 
     def list_plugins(self) -> List[Dict[str, str]]:
         """List all registered plugins."""
@@ -154,3 +249,43 @@ class PluginManager:
             }
             for plugin in self._plugins.values()
         ]
+
+
+def _overrides(plugin: Plugin, hook: str) -> bool:
+    method = getattr(plugin, hook)
+    return getattr(method, "__func__", method) is not getattr(Plugin, hook)
+
+
+def hooked(method: Operation) -> Operation:
+    """Run plugin hooks around a service operation.
+
+    The service's ``plugins`` manager supplies the pipeline for
+    ``(service_name, method name)``. Without one, the wrapper returns the
+    operation's own coroutine, so an unhooked call costs one lookup and
+    no extra await. Hooks see the arguments by name, defaults included.
+    """
+    action = method.__name__
+    parameters = list(inspect.signature(method).parameters.values())[1:]
+    names = [parameter.name for parameter in parameters]
+    defaults = {
+        parameter.name: parameter.default
+        for parameter in parameters
+        if parameter.default is not inspect.Parameter.empty
+    }
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Awaitable[Any]:
+        plugins: Optional[PluginManager] = self.plugins
+        if plugins is None or not plugins.hooking:
+            return method(self, *args, **kwargs)
+        pipeline = plugins.pipeline(self.service_name, action)
+        if pipeline is None:
+            return method(self, *args, **kwargs)
+        if len(args) > len(names):
+            raise TypeError(f"{action}() takes {len(names)} arguments but {len(args)} were given")
+        params = dict(defaults)
+        params.update(zip(names, args))
+        params.update(kwargs)
+        return pipeline.run(self, method, action, params)
+
+    return cast(Operation, wrapper)
@@ -0,0 +1,96 @@
+"""Background writer for snapshot persistence."""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+
+class SnapshotWriter(Generic[T]):
+    """Runs snapshot disk I/O on a dedicated thread, off the event loop.
+
+    Persistence requests are queued and written in batches: everything
+    submitted while a batch is being written goes into the next one, so a
+    burst of snapshots costs one pass of fsyncs. A request for a key that is
+    still queued replaces the older one. All jobs share a single thread, so
+    they never race each other on disk.
+    """
+
+    def __init__(self, write_batch: Callable[[List[T]], None]) -> None:
+        self._write_batch = write_batch
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, T] = {}
+        self._futures: Dict[str, "asyncio.Future[None]"] = {}
+        self._drain: Optional["asyncio.Task[None]"] = None
+
+    def submit(self, key: str, item: T) -> "asyncio.Future[None]":
+        """Queue ``item`` for writing; the future resolves once it is durable."""
+        loop = asyncio.get_running_loop()
+        future = self._futures.get(key)
+        if key not in self._pending or future is None:
+            future = loop.create_future()
+            future.add_done_callback(_consume_exception)
+            self._futures[key] = future
+        self._pending[key] = item
+
+        if self._drain is None or self._drain.done():
+            self._drain = loop.create_task(self._drain_pending())
+        return future
+
+    def pending(self, key: str) -> Optional["asyncio.Future[None]"]:
+        """Future for the latest write of ``key`` while it is queued, or after it failed."""
+        return self._futures.get(key)
+
+    def forget(self, key: str) -> None:
+        """Drop the completion future of a finished (failed) write."""
+        future = self._futures.get(key)
+        if future is not None and future.done():
+            del self._futures[key]
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking I/O job on the writer thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread(), fn, *args)
+
+    async def flush(self) -> None:
+        """Wait until every queued write has finished."""
+        while self._drain is not None and not self._drain.done():
+            await asyncio.shield(self._drain)
+
+    async def close(self) -> None:
+        """Flush queued writes and stop the writer thread."""
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _thread(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="starward-snapshots")
+        return self._executor
+
+    async def _drain_pending(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            futures = {key: self._futures[key] for key in batch}
+            try:
+                await self.run(self._write_batch, list(batch.values()))
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for key, future in futures.items():
+                    if not future.done():
+                        future.set_result(None)
+                    # Only failures need to stay visible through pending().
+                    if self._futures.get(key) is future:
+                        del self._futures[key]
+
+
+def _consume_exception(future: "asyncio.Future[None]") -> None:
+    # Failures are reported through the snapshot status; don't warn when
+    # nobody awaited the write.
+    if not future.cancelled():
+        future.exception()
@@ -1,30 +1,63 @@
 """State engine for deterministic snapshots and replay."""
 
-import json
 import asyncio
-from typing import Any, Dict, Optional
-from datetime import datetime
+import functools
+import io
+import json
+import os
+import tarfile
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+from datetime import datetime, timezone
 from pathlib import Path
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 import random
+import time
+import uuid
+import weakref
+
+from starward.core.catalog import CatalogEntry, SnapshotCatalog
+from starward.core.chunk_store import ChunkStore, fsync_paths
+from starward.core.codec import DEFAULT_CODEC, SnapshotCodec, decode_json_value, get_codec
+from starward.core.journal import JournalRecord, OperationJournal
+from starward.core.locks import MutationGuard, ResourceLocks, SnapshotBarrier
+from starward.core.pages import PageRef, page_blobs, resolve_page
+from starward.core.snapshot_writer import SnapshotWriter
+
+MANIFEST_FORMAT = "starward.manifest/1"
+BUNDLE_MANIFEST = "manifest.json"
+# Tag of the snapshots taken automatically while journaling.
+CHECKPOINT_TAG = "checkpoint"
+DEFAULT_CHECKPOINT_INTERVAL = 10_000
+# Blob files written this recently survive garbage collection even when
+# unreferenced: their object may not be installed in the state yet.
+BLOB_GRACE_PERIOD = 60.0
 
 
 @dataclass
 class Snapshot:
-    """Represents a state snapshot."""
+    """Represents a state snapshot.
+
+    ``state`` is a read-only view that shares its pages with the engine
+    state it was taken from.
+    """
 
     id: str
     timestamp: datetime
-    state: Dict[str, Any]
+    state: Mapping[str, Any]
     metadata: Dict[str, str] = field(default_factory=dict)
+    parent: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert snapshot to dictionary."""
         return {
             "id": self.id,
             "timestamp": self.timestamp.isoformat(),
-            "state": self.state,
+            "state": {key: resolve_page(page) for key, page in self.state.items()},
             "metadata": self.metadata,
+            "parent": self.parent,
+            "tags": self.tags,
         }
 
     @classmethod
@@ -33,22 +66,85 @@ class Snapshot:
         return cls(
             id=data["id"],
             timestamp=datetime.fromisoformat(data["timestamp"]),
-            state=data["state"],
+            state=MappingProxyType(dict(data["state"])),
             metadata=data.get("metadata", {}),
+            parent=data.get("parent"),
+            tags=list(data.get("tags", [])),
         )
 
 
+@dataclass
+class RestorePoint:
+    """Result of moving the state to an earlier journal position."""
+
+    seq: int
+    checkpoint: Optional[str]
+    replayed: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert restore point to dictionary."""
+        return {"seq": self.seq, "checkpoint": self.checkpoint, "replayed": self.replayed}
+
+
 class StateEngine:
-    """Manages deterministic state with snapshot/replay capability."""
+    """Manages deterministic state with snapshot/replay capability.
+
+    State is a flat mapping of pages. Taking a snapshot freezes the current
+    mapping and shares it with the snapshot; writers obtain pages through
+    :meth:`mutable_state`, which copies a page the first time it is written
+    after a snapshot. Snapshot and restore are therefore O(1).
+    """
 
-    def __init__(self, snapshot_dir: str = "snapshots") -> None:
-        self._state: Dict[str, Any] = {}
+    def __init__(self, snapshot_dir: str = "snapshots", codec: str = DEFAULT_CODEC) -> None:
+        self._state: Mapping[str, Any] = {}
+        # Keys whose page belongs to the live state alone (not to a snapshot).
+        self._owned: Set[str] = set()
+        self._shared = False
         self._snapshots: Dict[str, Snapshot] = {}
+        # Forks read this engine's chunks and blobs, so garbage collection spares them.
+        self._forks: "weakref.WeakSet[StateEngine]" = weakref.WeakSet()
+        self._closed = False
         self._snapshot_dir = Path(snapshot_dir)
-        self._snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self._chunks = ChunkStore(self._snapshot_dir / "chunks")
+        # Blob files referenced from pages; only the first directory is written to.
+        self._blob_dirs = [self._snapshot_dir / "blobs"]
+        self._blobs = ChunkStore(self._blob_dirs[0])
+        self._codec = get_codec(codec)
+        self._catalog = SnapshotCatalog(self._snapshot_dir / "catalog.sqlite3", self._scan_manifests)
+        self._writer: SnapshotWriter[Snapshot] = SnapshotWriter(self._write_snapshots)
+        # Last persisted (page, digest) per key, to skip rewriting unchanged pages.
+        self._page_digests: Dict[str, Tuple[Any, str]] = {}
+        # Blob digests referenced by each persisted chunk.
+        self._chunk_blobs: Dict[str, List[str]] = {}
+        # Snapshot the current state descends from.
+        self._head: Optional[str] = None
         self._current_time = datetime.utcnow()
         self._time_frozen = False
         self._random_seed: Optional[int] = None
+        self._restore_listeners: List[Callable[[], None]] = []
+        self._appliers: Dict[str, Callable[[str, Dict[str, Any]], None]] = {}
+        self._journal: Optional[OperationJournal] = None
+        # Sequence number of the last journaled mutation reflected in the state.
+        self._journal_seq = 0
+        self._replaying = False
+        self._checkpoint_interval = 0
+        self._checkpoint_seq = 0
+        self._locks = ResourceLocks()
+        self._barrier = SnapshotBarrier(on_idle=self._checkpoint_if_due)
+
+    @property
+    def snapshot_dir(self) -> Path:
+        """Directory holding persisted snapshots."""
+        return self._snapshot_dir
+
+    @property
+    def blob_dirs(self) -> List[Path]:
+        """Directories holding the blob files pages refer to by digest.
+
+        New blobs go to the first one; the others belong to the engines
+        this one was forked from and are only read.
+        """
+        return list(self._blob_dirs)
 
     def set_seed(self, seed: int) -> None:
         """Set random seed for deterministic operations."""
@@ -73,85 +169,775 @@ class StateEngine:
 
     def set_state(self, key: str, value: Any) -> None:
         """Set a state value."""
-        self._state[key] = value
+        self._writable_root()[key] = value
+        self._owned.add(key)
 
     def get_state(self, key: str, default: Any = None) -> Any:
-        """Get a state value."""
-        return self._state.get(key, default)
+        """Get a state value.
+
+        Pages returned here may be shared with snapshots and must not be
+        mutated; use :meth:`mutable_state` to modify a page in place.
+        """
+        return resolve_page(self._state.get(key, default))
+
+    def mutable_state(self, key: str, factory: Optional[Callable[[], Any]] = None) -> Any:
+        """Get a page that may be mutated in place.
+
+        The page is copied first if a snapshot still shares it. A missing
+        page is created with ``factory``; without one, KeyError is raised.
+        """
+        if key in self._owned:
+            return self._state[key]
+
+        root = self._writable_root()
+        if key in root:
+            page = resolve_page(root[key])
+            copy = getattr(page, "copy", None)
+            if copy is not None:
+                page = copy()
+        elif factory is not None:
+            page = factory()
+        else:
+            raise KeyError(key)
+
+        root[key] = page
+        self._owned.add(key)
+        return page
+
+    def delete_state(self, key: str) -> None:
+        """Remove a state value if present."""
+        if key in self._state:
+            del self._writable_root()[key]
+            self._owned.discard(key)
+
+    def state_keys(self, prefix: str = "") -> List[str]:
+        """List state keys starting with ``prefix``."""
+        return [key for key in self._state if key.startswith(prefix)]
 
     def get_all_state(self) -> Dict[str, Any]:
         """Get all state."""
-        return self._state.copy()
+        return {key: resolve_page(page) for key, page in self._state.items()}
 
     def clear_state(self) -> None:
         """Clear all state."""
-        self._state.clear()
+        self._state = {}
+        self._owned = set()
+        self._shared = False
+        self.record("engine", "clear_state", {})
+
+    def on_restore(self, callback: Callable[[], None]) -> None:
+        """Register a callback invoked after state is replaced by a restore."""
+        self._restore_listeners.append(callback)
+
+    def mutation(self, *resources: str) -> MutationGuard:
+        """Guard one service mutation: ``async with engine.mutation(key): ...``.
+
+        Holds a lock per resource (services use the page key), so mutations
+        of one resource are linearizable while different resources proceed
+        concurrently, and keeps snapshots and restores from running until
+        the mutation is done. A mutation must not take a snapshot or start
+        another mutation of a resource it already holds.
+        """
+        keys = resources if len(resources) == 1 else tuple(sorted(set(resources)))
+        return MutationGuard(self._locks, self._barrier, keys)
+
+    def lock_stats(self) -> Dict[str, int]:
+        """Resource locks held and awaited, and mutations in flight."""
+        return {**self._locks.stats(), "mutations": self._barrier.active}
+
+    @property
+    def journal(self) -> Optional[OperationJournal]:
+        """Journal receiving service mutations, if one is attached."""
+        return self._journal
+
+    def attach_journal(
+        self,
+        journal: Optional[OperationJournal],
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    ) -> None:
+        """Record every subsequent service mutation to ``journal``.
+
+        Every ``checkpoint_interval`` records a checkpoint snapshot is taken,
+        so :meth:`restore_at` never replays more than that many records
+        (``0`` disables checkpoints). A read-only journal is only replayed.
+        """
+        if checkpoint_interval < 0:
+            raise ValueError("checkpoint_interval must not be negative")
+        self._journal = journal
+        self._journal_seq = journal.last_seq if journal is not None else 0
+        self._checkpoint_interval = checkpoint_interval
+        self._checkpoint_seq = self._journal_seq
+
+    def on_replay(self, service: str, apply: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Register the function that reapplies a service's journaled mutations."""
+        self._appliers[service] = apply
+
+    def record(self, service: str, action: str, params: Dict[str, Any]) -> None:
+        """Journal a mutation that has just been applied.
+
+        ``params`` must hold everything needed to redo the mutation exactly,
+        including generated ids and timestamps.
+        """
+        journal = self._journal
+        if journal is None or journal.read_only or self._replaying:
+            return
+        self._journal_seq = journal.append(service, action, params, _epoch(self.now()))
+        if not self._barrier.active:
+            self._checkpoint_if_due()
+
+    async def replay(self, records: Iterable[JournalRecord]) -> int:
+        """Reapply journaled mutations in order and return how many were applied."""
+        count = 0
+        replaying, self._replaying = self._replaying, True
+        try:
+            for record in records:
+                if record.service == "engine":
+                    await self._replay_engine(record.action, record.params)
+                else:
+                    apply = self._appliers.get(record.service)
+                    if apply is None:
+                        raise ValueError(f"No service registered to replay: {record.service}")
+                    apply(record.action, record.params)
+                self._journal_seq = record.seq
+                count += 1
+        finally:
+            self._replaying = replaying
+        return count
+
+    async def recover(self, snapshot_id: Optional[str] = None) -> int:
+        """Rebuild state from a snapshot plus the journal records written after it.
+
+        Without ``snapshot_id`` the persisted snapshot closest to the end of
+        the journal is used, or the whole journal is replayed if there is
+        none. Returns the number of records replayed.
+        """
+        if self._journal is None:
+            raise ValueError("No journal attached")
 
-    async def create_snapshot(self, snapshot_id: Optional[str] = None) -> Snapshot:
-        """Create a new snapshot of current state."""
         if snapshot_id is None:
-            snapshot_id = f"snapshot_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+            entry = self._catalog.nearest(self._journal.last_seq)
+            snapshot_id = entry.id if entry is not None else None
+
+        after = 0
+        if snapshot_id is not None:
+            await self._restore_quietly(snapshot_id)
+            after = int(self._snapshots[snapshot_id].metadata.get("journal_seq") or 0)
+        return await self.replay(self._journal.read(after))
+
+    async def restore_at(
+        self, seq: Optional[int] = None, timestamp: Optional[datetime] = None
+    ) -> RestorePoint:
+        """Restore the state as it was after journal record ``seq`` or at ``timestamp``.
 
+        Starts from the nearest checkpoint at or before that position and
+        replays forward only the records in between. The move is journaled
+        itself, so later mutations replay on top of the restored state.
+        """
+        if self._journal is None:
+            raise ValueError("No journal attached")
+        if (seq is None) == (timestamp is None):
+            raise ValueError("Pass exactly one of seq or timestamp")
+
+        async with self._barrier.exclusive():
+            if not self._journal.read_only:
+                await self._journal.flush()
+            await self._writer.flush()
+            if timestamp is not None:
+                seq = self._journal.seq_at(_epoch(timestamp))
+            assert seq is not None
+            if not 0 <= seq <= self._journal.last_seq:
+                raise ValueError(f"Journal position out of range: {seq}")
+
+            point = await self._seek(seq)
+            self.record("engine", "restore_at", {"seq": seq})
+        return point
+
+    async def _seek(self, seq: int) -> RestorePoint:
+        """Rebuild the state after journal record ``seq`` from the nearest checkpoint."""
+        assert self._journal is not None
+        entry = self._catalog.nearest(seq, tag=CHECKPOINT_TAG)
+        if entry is not None:
+            await self._restore_quietly(entry.id, lazy=True)
+            # Don't keep every visited checkpoint's pages alive.
+            self._snapshots.pop(entry.id, None)
+            after = entry.journal_seq or 0
+        else:
+            self._install({})
+            self._head = None
+            after = 0
+        replayed = await self.replay(self._journal.read(after, until_seq=seq))
+        self._journal_seq = seq
+        return RestorePoint(seq, entry.id if entry is not None else None, replayed)
+
+    async def _restore_quietly(self, snapshot_id: str, lazy: bool = False) -> None:
+        """Restore a snapshot without journaling it."""
+        replaying, self._replaying = self._replaying, True
+        try:
+            await self._restore(snapshot_id, lazy=lazy)
+        finally:
+            self._replaying = replaying
+
+    def _checkpoint_if_due(self) -> None:
+        """Take a checkpoint if enough records were journaled since the last one.
+
+        Called with no mutation in flight, so the checkpoint never captures
+        one half-applied.
+        """
+        if (
+            self._checkpoint_interval
+            and not self._replaying
+            and self._journal_seq - self._checkpoint_seq >= self._checkpoint_interval
+        ):
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        """Take and persist a checkpoint snapshot at the current journal position."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # retried on the next mutation made under the event loop
+        seq = self._journal_seq
+        snapshot_id = f"{CHECKPOINT_TAG}_{seq:012d}"
+        if snapshot_id == self._head:
+            return  # restored from this very checkpoint; nothing changed since
         snapshot = Snapshot(
             id=snapshot_id,
             timestamp=self.now(),
-            state=self._state.copy(),
-            metadata={"seed": str(self._random_seed) if self._random_seed else ""},
+            state=self._freeze(),
+            metadata={
+                "seed": str(self._random_seed) if self._random_seed else "",
+                "journal_seq": str(seq),
+            },
+            parent=self._head,
+            tags=[CHECKPOINT_TAG],
         )
-        self._snapshots[snapshot_id] = snapshot
+        self._writer.submit(snapshot.id, snapshot)
+        self._checkpoint_seq = seq
+
+    async def _replay_engine(self, action: str, params: Dict[str, Any]) -> None:
+        if action == "restore_snapshot":
+            await self._restore(params["snapshot_id"])
+        elif action == "clear_state":
+            self.clear_state()
+        elif action == "restore_at":
+            if self._journal is None:
+                raise ValueError("Replaying restore_at needs the journal attached")
+            await self._seek(params["seq"])
+        else:
+            raise ValueError(f"Unknown engine journal action: {action}")
 
-        # Persist to disk
-        snapshot_path = self._snapshot_dir / f"{snapshot_id}.json"
-        async with asyncio.Lock():
-            snapshot_path.write_text(json.dumps(snapshot.to_dict(), indent=2))
+    def _writable_root(self) -> Dict[str, Any]:
+        if self._shared:
+            self._state = dict(self._state)
+            self._shared = False
+        return self._state  # type: ignore[return-value]
+
+    def _freeze(self) -> Mapping[str, Any]:
+        """Share the current state with a snapshot and return a read-only view."""
+        self._shared = True
+        self._owned = set()
+        return MappingProxyType(self._state)  # type: ignore[arg-type]
+
+    def _install(self, state: Mapping[str, Any]) -> None:
+        """Replace the live state with a snapshot's pages."""
+        self._state = state
+        self._shared = True
+        self._owned = set()
+        for callback in self._restore_listeners:
+            callback()
+
+    async def create_snapshot(
+        self,
+        snapshot_id: Optional[str] = None,
+        persist: bool = True,
+        wait: bool = True,
+        tags: Optional[List[str]] = None,
+    ) -> Snapshot:
+        """Create a new snapshot of current state.
+
+        Capturing the snapshot is O(1). With ``persist`` the snapshot is also
+        written to the snapshot directory as a manifest of page chunks; only
+        pages that changed since they were last persisted are written. The
+        write happens off the event loop; with ``wait=False`` this returns
+        before it finishes (see :meth:`wait_persisted`). The capture waits
+        for mutations in flight and holds new ones back until it is taken.
+        Reusing the id of the snapshot the state descends from raises
+        ``ValueError``.
+        """
+        if snapshot_id is None:
+            snapshot_id = new_snapshot_id()
+
+        async with self._barrier.exclusive():
+            if snapshot_id == self._head:
+                raise ValueError(f"Snapshot cannot be its own parent: {snapshot_id}")
+            snapshot = Snapshot(
+                id=snapshot_id,
+                timestamp=self.now(),
+                state=self._freeze(),
+                metadata={
+                    "seed": str(self._random_seed) if self._random_seed else "",
+                    "journal_seq": str(self._journal_seq) if self._journal is not None else "",
+                },
+                parent=self._head,
+                tags=sorted(set(tags or [])),
+            )
+            self._snapshots[snapshot_id] = snapshot
+            self._head = snapshot_id
+
+        if persist:
+            future = self._writer.submit(snapshot_id, snapshot)
+            if wait:
+                await asyncio.shield(future)
 
         return snapshot
 
-    async def restore_snapshot(self, snapshot_id: str) -> None:
-        """Restore state from a snapshot."""
-        snapshot = self._snapshots.get(snapshot_id)
-        if not snapshot:
-            # Try loading from disk
-            snapshot_path = self._snapshot_dir / f"{snapshot_id}.json"
-            if snapshot_path.exists():
-                data = json.loads(snapshot_path.read_text())
-                snapshot = Snapshot.from_dict(data)
-                self._snapshots[snapshot_id] = snapshot
-            else:
-                raise ValueError(f"Snapshot not found: {snapshot_id}")
+    def snapshot_status(self, snapshot_id: str) -> str:
+        """Return ``pending``, ``failed``, ``persisted`` or ``memory`` for a snapshot."""
+        future = self._writer.pending(snapshot_id)
+        if future is not None and not future.done():
+            return "pending"
+        if future is not None and not future.cancelled() and future.exception() is not None:
+            return "failed"
+        if self._manifest_path(snapshot_id).exists():
+            return "persisted"
+        if snapshot_id in self._snapshots:
+            return "memory"
+        raise ValueError(f"Snapshot not found: {snapshot_id}")
+
+    async def wait_persisted(self, snapshot_id: str) -> None:
+        """Wait for a snapshot's pending write; raises if the write failed."""
+        future = self._writer.pending(snapshot_id)
+        if future is not None:
+            await asyncio.shield(future)
+
+    async def restore_snapshot(self, snapshot_id: str, lazy: bool = False) -> None:
+        """Restore state from a snapshot.
 
-        self._state = snapshot.state.copy()
+        A snapshot that is not in memory is read from disk. With ``lazy`` only
+        its manifest is read; each page is decoded from the memory-mapped
+        chunk the first time it is accessed. Waits for mutations in flight.
+        """
+        async with self._barrier.exclusive():
+            await self._restore(snapshot_id, lazy)
+
+    async def _restore(self, snapshot_id: str, lazy: bool = False) -> None:
+        snapshot = await self._get_snapshot(snapshot_id, lazy)
+        self._install(snapshot.state)
+        self._head = snapshot_id
         if snapshot.metadata.get("seed"):
             self.set_seed(int(snapshot.metadata["seed"]))
+        self.record("engine", "restore_snapshot", {"snapshot_id": snapshot_id})
+
+    async def fork(self, snapshot_id: str, snapshot_dir: str) -> "StateEngine":
+        """Create an independent engine whose state starts as a snapshot.
+
+        The fork shares every page with the snapshot and copies a page only
+        when it first writes to it, so forking is O(1) and a fork's memory
+        grows with the pages it writes to (a whole page, such as a bucket's
+        object index, on the first write to it). A persisted snapshot is
+        read lazily once and its decoded pages are shared by all forks. The
+        fork keeps the snapshot in memory, so restoring it there resets the
+        fork. While the fork is alive, this engine's garbage collection
+        keeps the chunks and blobs the fork still reads.
+        """
+        snapshot = await self._get_snapshot(snapshot_id, lazy=True)
+        fork = StateEngine(snapshot_dir, codec=self._codec.name)
+        fork._blob_dirs.extend(self._blob_dirs)
+        fork._snapshots[snapshot_id] = snapshot
+        fork._install(snapshot.state)
+        fork._head = snapshot_id
+        seed = snapshot.metadata.get("seed")
+        fork._random_seed = int(seed) if seed else None
+        fork._current_time = self._current_time
+        fork._time_frozen = self._time_frozen
+        self._forks.add(fork)
+        return fork
+
+    async def _get_snapshot(self, snapshot_id: str, lazy: bool) -> Snapshot:
+        """Get a snapshot from memory, or read it from disk."""
+        snapshot = self._snapshots.get(snapshot_id)
+        if not snapshot:
+            snapshot = await self._writer.run(self._load, snapshot_id, lazy)
+            self._snapshots[snapshot_id] = snapshot
+        return snapshot
 
     def list_snapshots(self) -> list[str]:
         """List all snapshot IDs."""
         # Include both in-memory and on-disk snapshots
-        disk_snapshots = {p.stem for p in self._snapshot_dir.glob("*.json")}
+        disk_snapshots = {entry.id for entry in self._catalog.query()[0]}
         memory_snapshots = set(self._snapshots.keys())
         return sorted(disk_snapshots | memory_snapshots)
 
+    def query_snapshots(
+        self,
+        tag: Optional[str] = None,
+        parent: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[CatalogEntry], int]:
+        """Page through persisted snapshots in timestamp order.
+
+        Returns the matching catalog entries and the total number of matches.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        return self._catalog.query(
+            tag=tag,
+            parent=parent,
+            since=_catalog_time(since),
+            until=_catalog_time(until),
+            limit=limit,
+            offset=offset,
+        )
+
+    async def delete_snapshot(self, snapshot_id: str) -> None:
+        """Delete a snapshot from memory and disk.
+
+        Its chunks stay on disk until :meth:`collect_garbage` runs.
+        """
+        manifest_path = self._manifest_path(snapshot_id)
+        future = self._writer.pending(snapshot_id)
+        if snapshot_id not in self._snapshots and future is None and not manifest_path.exists():
+            raise ValueError(f"Snapshot not found: {snapshot_id}")
+
+        self._snapshots.pop(snapshot_id, None)
+        if self._head == snapshot_id:
+            self._head = None
+        if future is not None:
+            # Let an in-progress write land before removing its manifest.
+            await asyncio.wait({future})
+            self._writer.forget(snapshot_id)
+        await self._writer.run(self._delete_manifest, snapshot_id)
+
+    async def collect_garbage(self, blob_grace: float = BLOB_GRACE_PERIOD) -> Dict[str, int]:
+        """Delete chunks and blobs nothing refers to; return the counts removed.
+
+        Chunks are kept while a persisted snapshot or a lazily restored page
+        needs them. Blobs are kept while a page of the live state or of any
+        snapshot, or a journaled operation, refers to them, and for
+        ``blob_grace`` seconds after they were written. Pages of live forks
+        (and their forks) count as this engine's own. Only this engine's
+        own blob directory is collected.
+        """
+        await self._writer.flush()
+        started = time.time()
+        # Lazily restored pages still need their chunks.
+        referenced = set()
+        blobs: Set[str] = set()
+        seen: Set[int] = set()
+        for state in self._live_states():
+            for key, page in state.items():
+                if id(page) in seen:
+                    continue
+                seen.add(id(page))
+                if type(page) is PageRef and not page.loaded:
+                    referenced.add(page.digest)
+                blobs.update(self._blobs_of(key, page))
+        removed: Dict[str, int] = await self._writer.run(
+            self._collect_garbage, referenced, blobs, started - blob_grace
+        )
+        return removed
+
+    def _live_states(self) -> Iterator[Mapping[str, Any]]:
+        """States of this engine, its snapshots and every fork descending from it."""
+        engines: List[StateEngine] = [self]
+        while engines:
+            engine = engines.pop()
+            if engine._closed:
+                continue
+            yield engine._state
+            yield from (snapshot.state for snapshot in engine._snapshots.values())
+            engines.extend(engine._forks)
+
+    def _blobs_of(self, key: str, page: Any) -> List[str]:
+        """Blob digests a page refers to, from the chunk it was persisted as if possible."""
+        digest = page.digest if type(page) is PageRef else None
+        cached = self._page_digests.get(key)
+        if digest is None and cached is not None and cached[0] is page:
+            digest = cached[1]
+        known = self._chunk_blobs.get(digest) if digest is not None else None
+        if known is not None:
+            return known
+        return sorted(page_blobs(resolve_page(page)))
+
     async def export_snapshot(self, snapshot_id: str, output_path: str) -> None:
-        """Export snapshot to a file."""
-        snapshot = self._snapshots.get(snapshot_id)
-        if not snapshot:
-            snapshot_path = self._snapshot_dir / f"{snapshot_id}.json"
-            if not snapshot_path.exists():
-                raise ValueError(f"Snapshot not found: {snapshot_id}")
-            # Copy file
-            Path(output_path).write_text(snapshot_path.read_text())
-            return
+        """Export a snapshot as a self-contained bundle.
 
-        Path(output_path).write_text(json.dumps(snapshot.to_dict(), indent=2))
+        The bundle is a tar archive holding the manifest and every chunk and
+        spooled blob it references.
+        """
+        snapshot = self._snapshots.get(snapshot_id)
+        if (
+            snapshot is not None
+            and self._writer.pending(snapshot_id) is None
+            and not self._manifest_path(snapshot_id).exists()
+        ):
+            self._writer.submit(snapshot_id, snapshot)
+        await self.wait_persisted(snapshot_id)
+        await self._writer.run(self._write_bundle, snapshot_id, output_path)
 
     async def import_snapshot(self, input_path: str) -> str:
-        """Import snapshot from a file."""
-        data = json.loads(Path(input_path).read_text())
-        snapshot = Snapshot.from_dict(data)
-        self._snapshots[snapshot.id] = snapshot
+        """Import a snapshot bundle (or a legacy JSON snapshot file)."""
+        snapshot_id: str = await self._writer.run(self._read_bundle, input_path)
+        self._snapshots.pop(snapshot_id, None)
+        return snapshot_id
+
+    async def close(self) -> None:
+        """Wait for pending snapshot writes and stop the writer thread."""
+        self._closed = True
+        await self._writer.close()
+        self._catalog.close()
+
+    # The methods below do blocking disk I/O and run on the writer thread.
+
+    def _manifest_path(self, snapshot_id: str) -> Path:
+        return self._snapshot_dir / f"{snapshot_id}.json"
+
+    def _write_snapshots(self, snapshots: List[Snapshot]) -> None:
+        """Persist a batch of snapshots with one fsync pass for all chunks."""
+        manifests = [self._write_chunks(snapshot) for snapshot in snapshots]
+        self._chunks.sync()
+        self._write_manifests(manifests)
+
+    def _write_chunks(self, snapshot: Snapshot) -> Dict[str, Any]:
+        """Store a snapshot's changed pages and return its manifest."""
+        pages: Dict[str, str] = {}
+        blobs: Dict[str, List[str]] = {}
+        digests: Dict[str, Tuple[Any, str]] = {}
+        for key, page in snapshot.state.items():
+            cached = self._page_digests.get(key)
+            # Persisted pages are frozen, so an identical object has identical content.
+            if cached is not None and cached[0] is page and self._chunks.has(cached[1]):
+                digest = cached[1]
+            elif type(page) is PageRef and page.codec == self._codec.name and self._chunks.has(page.digest):
+                digest = page.digest
+            else:
+                digest = self._chunks.put(self._codec.encode(resolve_page(page)))
+            pages[key] = digest
+            digests[key] = (page, digest)
+            if digest not in self._chunk_blobs:
+                self._chunk_blobs[digest] = sorted(page_blobs(resolve_page(page)))
+            if self._chunk_blobs[digest]:
+                blobs[key] = self._chunk_blobs[digest]
+        self._page_digests = digests
+
+        return {
+            "format": MANIFEST_FORMAT,
+            "id": snapshot.id,
+            "timestamp": snapshot.timestamp.isoformat(),
+            "parent": snapshot.parent,
+            "metadata": snapshot.metadata,
+            "codec": self._codec.name,
+            "tags": snapshot.tags,
+            "pages": pages,
+            "blobs": blobs,
+        }
+
+    def _write_manifests(self, manifests: List[Dict[str, Any]]) -> None:
+        """Atomically write manifests: temp file, fsync, rename, fsync directory."""
+        self._snapshot_dir.mkdir(parents=True, exist_ok=True)
+        renames = []
+        for manifest in manifests:
+            manifest_path = self._manifest_path(manifest["id"])
+            tmp_path = manifest_path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(manifest, indent=2))
+            renames.append((tmp_path, manifest_path))
+        fsync_paths(tmp_path for tmp_path, _ in renames)
+        for tmp_path, manifest_path in renames:
+            os.replace(tmp_path, manifest_path)
+        fsync_paths([self._snapshot_dir])
+        self._catalog.upsert(self._catalog_entry(manifest) for manifest in manifests)
+
+    def _delete_manifest(self, snapshot_id: str) -> None:
+        self._manifest_path(snapshot_id).unlink(missing_ok=True)
+        self._catalog.delete(snapshot_id)
+
+    def _catalog_entry(self, manifest: Dict[str, Any], size: Optional[int] = None) -> CatalogEntry:
+        if size is None:
+            size = sum(self._chunks.size(digest) for digest in set(manifest["pages"].values()))
+        journal_seq = manifest.get("metadata", {}).get("journal_seq")
+        return CatalogEntry(
+            id=manifest["id"],
+            timestamp=manifest["timestamp"],
+            size=size,
+            parent=manifest.get("parent"),
+            seed=manifest.get("metadata", {}).get("seed") or None,
+            tags=list(manifest.get("tags", [])),
+            journal_seq=int(journal_seq) if journal_seq else None,
+        )
+
+    def _scan_manifests(self) -> Iterator[CatalogEntry]:
+        """Index snapshots persisted before the catalog existed."""
+        for manifest_path in self._snapshot_dir.glob("*.json"):
+            manifest = json.loads(manifest_path.read_text())
+            if "state" in manifest:
+                yield self._catalog_entry({**manifest, "pages": {}}, manifest_path.stat().st_size)
+            else:
+                yield self._catalog_entry(manifest)
+
+    def _collect_garbage(
+        self, referenced: Set[str], blobs: Set[str], blobs_before: float
+    ) -> Dict[str, int]:
+        live = set(referenced)
+        live_blobs = set(blobs)
+        for manifest_path in self._snapshot_dir.glob("*.json"):
+            manifest = json.loads(manifest_path.read_text())
+            live.update(manifest.get("pages", {}).values())
+            live_blobs.update(self._manifest_blobs(manifest))
+        if self._journal is not None:
+            # Time travel replays journaled writes, which may name overwritten blobs.
+            for record in self._journal.read():
+                live_blobs.update(page_blobs(record.params))
+        # Forget cached digests so removed chunks are rewritten if needed.
+        self._page_digests.clear()
+        chunks_removed = self._chunks.collect_garbage(live)
+        for digest in [d for d in self._chunk_blobs if d not in live]:
+            del self._chunk_blobs[digest]
+        return {
+            "chunks_removed": chunks_removed,
+            "blobs_removed": self._blobs.collect_garbage(live_blobs, older_than=blobs_before),
+        }
+
+    def _manifest_blobs(self, manifest: Dict[str, Any]) -> Set[str]:
+        """Blob digests a persisted snapshot refers to."""
+        if "blobs" in manifest:
+            return {digest for digests in manifest["blobs"].values() for digest in digests}
+        # Written before manifests listed blobs: look inside the pages.
+        return page_blobs(dict(self._load(manifest["id"]).state))
+
+    def _write_bundle(self, snapshot_id: str, output_path: str) -> None:
+        manifest_path = self._manifest_path(snapshot_id)
+        if not manifest_path.exists():
+            raise ValueError(f"Snapshot not found: {snapshot_id}")
+
+        manifest = json.loads(manifest_path.read_text())
+        if "state" in manifest:
+            # Legacy full-state snapshot: persist it in chunked form first.
+            self._write_snapshots([self._load(snapshot_id)])
+            manifest = json.loads(manifest_path.read_text())
+
+        with tarfile.open(output_path, "w") as bundle:
+            _add_tar_member(bundle, BUNDLE_MANIFEST, json.dumps(manifest).encode())
+            for digest in sorted(set(manifest["pages"].values())):
+                _add_tar_member(bundle, f"chunks/{digest}", self._chunks.get(digest))
+            for digest in sorted(self._manifest_blobs(manifest)):
+                _add_tar_member(bundle, f"blobs/{digest}", self._read_blob(digest))
+
+    def _read_blob(self, digest: str) -> bytes:
+        for blob_dir in self._blob_dirs:
+            path = blob_dir / digest[:2] / digest
+            if path.exists():
+                return path.read_bytes()
+        raise ValueError(f"Blob not found: {digest}")
+
+    def _read_bundle(self, input_path: str) -> str:
+        if not tarfile.is_tarfile(input_path):
+            snapshot = _loads(Path(input_path).read_text())
+            self._write_snapshots([snapshot])
+            return snapshot.id
+
+        manifest: Optional[Dict[str, Any]] = None
+        with tarfile.open(input_path, "r") as bundle:
+            for member in bundle:
+                if not member.isfile():
+                    continue
+                f = bundle.extractfile(member)
+                if f is None:
+                    continue
+                data = f.read()
+                if member.name == BUNDLE_MANIFEST:
+                    manifest = json.loads(data)
+                elif member.name.startswith("chunks/"):
+                    self._chunks.put_verified(member.name[len("chunks/") :], data)
+                elif member.name.startswith("blobs/"):
+                    self._blobs.put_verified(member.name[len("blobs/") :], data)
+
+        if manifest is None:
+            raise ValueError(f"Bundle has no manifest: {input_path}")
+        for digest in manifest["pages"].values():
+            if not self._chunks.has(digest):
+                raise ValueError(f"Bundle is missing chunk: {digest}")
+        for digests in manifest.get("blobs", {}).values():
+            for digest in digests:
+                if not self._blobs.has(digest):
+                    raise ValueError(f"Bundle is missing blob: {digest}")
+
+        self._chunks.sync()
+        self._blobs.sync()
+        self._write_manifests([manifest])
+        return str(manifest["id"])
+
+    def _load(self, snapshot_id: str, lazy: bool = False) -> Snapshot:
+        """Read a persisted snapshot back into memory, or just its manifest if ``lazy``."""
+        manifest_path = self._manifest_path(snapshot_id)
+        if not manifest_path.exists():
+            raise ValueError(f"Snapshot not found: {snapshot_id}")
+
+        text = manifest_path.read_text()
+        manifest = json.loads(text)
+        if "state" in manifest:
+            return _loads(text)
+
+        # Manifests written before codecs existed hold JSON chunks.
+        codec = get_codec(manifest.get("codec", "json"))
+        load = functools.partial(self._read_page, codec)
+        if "blobs" in manifest:
+            for key, digest in manifest["pages"].items():
+                self._chunk_blobs[digest] = manifest["blobs"].get(key, [])
+        state: Dict[str, Any] = {
+            key: PageRef(digest, codec.name, load) for key, digest in manifest["pages"].items()
+        }
+        if not lazy:
+            state = {key: ref.resolve() for key, ref in state.items()}
+        return Snapshot(
+            id=manifest["id"],
+            timestamp=datetime.fromisoformat(manifest["timestamp"]),
+            state=MappingProxyType(state),
+            metadata=manifest.get("metadata", {}),
+            parent=manifest.get("parent"),
+            tags=list(manifest.get("tags", [])),
+        )
+
+    def _read_page(self, codec: SnapshotCodec, digest: str) -> Any:
+        view = self._chunks.open(digest)
+        try:
+            return codec.decode(view)
+        finally:
+            if not isinstance(view, bytes):
+                view.close()
+
+
+def new_snapshot_id() -> str:
+    """Default snapshot id: the UTC time plus a random suffix, unique within a second."""
+    return f"snapshot_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def _catalog_time(value: Optional[datetime]) -> Optional[str]:
+    """Format a filter bound like stored timestamps (naive UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+def _epoch(value: datetime) -> float:
+    """Seconds since the epoch for an aware or naive-UTC datetime."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _loads(text: str) -> Snapshot:
+    """Read a legacy snapshot file holding the full state inline."""
+    return Snapshot.from_dict(json.loads(text, object_hook=decode_json_value))
 
-        # Also save to snapshot directory
-        snapshot_path = self._snapshot_dir / f"{snapshot.id}.json"
-        snapshot_path.write_text(json.dumps(snapshot.to_dict(), indent=2))
 
-        return snapshot.id
+def _add_tar_member(bundle: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    bundle.addfile(info, io.BytesIO(data))
@@ -0,0 +1,312 @@
+"""Lean ASGI handlers for the hot S3 and SQS data-plane routes."""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+import json
+import re
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import Response, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from starward.aws.s3 import object_headers
+from starward.services.blob_store import READ_CHUNK_SIZE
+from starward.services.s3 import DEFAULT_CONTENT_TYPE, InvalidRangeError, MockS3Service
+from starward.services.sqs import MockSQSService
+
+Handler = Callable[[Scope, Receive, Send], Awaitable[None]]
+ObjectHandler = Callable[[Scope, Receive, Send, str, str], Awaitable[None]]
+
+_JSON_HEADER = (b"content-type", b"application/json")
+_OBJECTS_PREFIX = "/s3/buckets/"
+_META_PREFIX = b"x-amz-meta-"
+# Query values the native routes accept as numbers; anything else goes to FastAPI.
+_INT = re.compile(r"-?[0-9]+\Z")
+_FLOAT = re.compile(r"-?[0-9]+(\.[0-9]+)?\Z")
+
+
+class DataPlane:
+    """Serves the hot native routes without FastAPI routing or pydantic.
+
+    Object uploads, reads and message sends/receives are matched against
+    a route table built once, their bodies are checked by hand against the
+    shapes of the request models, and results are encoded with the same
+    JSON settings FastAPI uses. Any request it does not recognize or
+    cannot validate is passed on to the app with its body replayed, so
+    responses (including validation errors) are the same either way.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        s3: Callable[[], MockS3Service],
+        sqs: Callable[[], MockSQSService],
+    ) -> None:
+        self.app = app
+        self.s3 = s3
+        self.sqs = sqs
+        self._routes: Dict[Tuple[str, str], Handler] = {
+            ("POST", "/s3/objects"): self._put_object,
+            ("POST", "/sqs/messages"): self._send_message,
+            ("GET", "/sqs/messages"): self._receive_messages,
+            ("POST", "/sqs/messages/batch"): self._send_message_batch,
+            ("POST", "/sqs/messages/delete-batch"): self._delete_message_batch,
+        }
+        # Handlers for /s3/buckets/{bucket}/objects/{key}, by method.
+        self._object_routes: Dict[str, ObjectHandler] = {
+            "PUT": self._upload_object,
+            "GET": self._download_object,
+            "HEAD": self._head_object,
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path: str = scope["path"]
+            try:
+                handler = self._routes.get((scope["method"], path))
+                if handler is not None:
+                    await handler(scope, receive, send)
+                    return
+                if path.startswith(_OBJECTS_PREFIX):
+                    object_handler = self._object_routes.get(scope["method"])
+                    bucket, _, rest = path[len(_OBJECTS_PREFIX) :].partition("/")
+                    key = rest[len("objects/") :]
+                    if object_handler and bucket and key and rest.startswith("objects/"):
+                        await object_handler(scope, receive, send, bucket, key)
+                        return
+            except ClientDisconnect:
+                # The client left mid-body; like Starlette's routing, send nothing.
+                return
+        await self.app(scope, receive, send)
+
+    async def _fallback(self, scope: Scope, body: bytes, receive: Receive, send: Send) -> None:
+        """Hand a request whose body was already read to the app."""
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, replay, send)
+
+    async def _read_json(
+        self, scope: Scope, receive: Receive
+    ) -> Tuple[Optional[Dict[str, Any]], bytes]:
+        """Read a JSON object body; ``None`` when FastAPI has to judge it."""
+        body = await _read_body(receive)
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                if value.partition(b";")[0].strip().lower() != b"application/json":
+                    return None, body
+                break
+        try:
+            params = json.loads(body)
+        except ValueError:
+            return None, body
+        return (params if isinstance(params, dict) else None), body
+
+    async def _put_object(self, scope: Scope, receive: Receive, send: Send) -> None:
+        params, body = await self._read_json(scope, receive)
+        if params is None or not _strings(params, "bucket_name", "key", "data"):
+            await self._fallback(scope, body, receive, send)
+            return
+        try:
+            result = await self.s3().put_object(
+                params["bucket_name"], params["key"], params["data"].encode()
+            )
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 400)
+            return
+        await _send_json(send, result)
+
+    async def _upload_object(
+        self, scope: Scope, receive: Receive, send: Send, bucket: str, key: str
+    ) -> None:
+        metadata: Dict[str, str] = {}
+        content_type = DEFAULT_CONTENT_TYPE
+        for name, value in scope["headers"]:
+            if name.startswith(_META_PREFIX):
+                metadata[name[len(_META_PREFIX) :].decode("latin-1")] = value.decode("latin-1")
+            elif name == b"content-type":
+                content_type = value.decode("latin-1")
+        try:
+            result = await self.s3().put_object_stream(
+                bucket, key, _stream_body(receive), metadata, content_type
+            )
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 400)
+            return
+        await _send_json(send, result)
+
+    async def _download_object(
+        self, scope: Scope, receive: Receive, send: Send, bucket: str, key: str
+    ) -> None:
+        byte_range = _header(scope, b"range")
+        try:
+            info, chunks = await self.s3().open_object(bucket, key, byte_range)
+        except InvalidRangeError as e:
+            await _send_json(send, {"detail": str(e)}, 416)
+            return
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 404)
+            return
+
+        headers = object_headers(info)
+        headers["Content-Length"] = str(info["end"] - info["start"] + 1 if info["size"] else 0)
+        status_code = 200
+        if byte_range:
+            status_code = 206
+            headers["Content-Range"] = f"bytes {info['start']}-{info['end']}/{info['size']}"
+        response: Response
+        if info["end"] - info["start"] < READ_CHUNK_SIZE:
+            # Small payloads are sent inline instead of iterated in a worker thread.
+            response = Response(
+                b"".join(chunks), status_code, headers, media_type=info["content_type"]
+            )
+        else:
+            response = StreamingResponse(
+                chunks, status_code=status_code, headers=headers, media_type=info["content_type"]
+            )
+        await response(scope, receive, send)
+
+    async def _head_object(
+        self, scope: Scope, receive: Receive, send: Send, bucket: str, key: str
+    ) -> None:
+        try:
+            info = await self.s3().head_object(bucket, key)
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 404)
+            return
+        headers = object_headers(info)
+        headers["Content-Length"] = str(info["size"])
+        await Response(headers=headers, media_type=info["content_type"])(scope, receive, send)
+
+    async def _send_message(self, scope: Scope, receive: Receive, send: Send) -> None:
+        params, body = await self._read_json(scope, receive)
+        attributes = params.get("attributes") if params is not None else None
+        if (
+            params is None
+            or not _strings(params, "queue_name", "message_body")
+            or not (attributes is None or _string_map(attributes))
+        ):
+            await self._fallback(scope, body, receive, send)
+            return
+        try:
+            result = await self.sqs().send_message(
+                params["queue_name"], params["message_body"], attributes
+            )
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 400)
+            return
+        await _send_json(send, result)
+
+    async def _receive_messages(self, scope: Scope, receive: Receive, send: Send) -> None:
+        query = dict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        queue_name = query.get("queue_name")
+        max_messages = query.get("max_messages", "1")
+        wait_time = query.get("wait_time_seconds", "0")
+        visibility_timeout = query.get("visibility_timeout")
+        if (
+            queue_name is None
+            or not _INT.match(max_messages)
+            or not _FLOAT.match(wait_time)
+            or not (visibility_timeout is None or _INT.match(visibility_timeout))
+        ):
+            await self.app(scope, receive, send)
+            return
+        try:
+            messages = await self.sqs().receive_messages(
+                queue_name,
+                int(max_messages),
+                float(wait_time),
+                None if visibility_timeout is None else int(visibility_timeout),
+            )
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 400)
+            return
+        await _send_json(send, {"messages": messages})
+
+    async def _send_message_batch(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._batch(scope, receive, send, self.sqs().send_message_batch)
+
+    async def _delete_message_batch(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._batch(scope, receive, send, self.sqs().delete_message_batch)
+
+    async def _batch(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        action: Callable[[str, List[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+    ) -> None:
+        params, body = await self._read_json(scope, receive)
+        entries = params.get("entries") if params is not None else None
+        if (
+            params is None
+            or not _strings(params, "queue_name")
+            or not isinstance(entries, list)
+            or not all(isinstance(entry, dict) for entry in entries)
+        ):
+            await self._fallback(scope, body, receive, send)
+            return
+        try:
+            result = await action(params["queue_name"], entries)
+        except ValueError as e:
+            await _send_json(send, {"detail": str(e)}, 400)
+            return
+        await _send_json(send, result)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _stream_body(receive: Receive) -> AsyncIterator[bytes]:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+        yield message.get("body", b"")
+        if not message.get("more_body", False):
+            return
+
+
+async def _send_json(send: Send, content: Any, status: int = 200) -> None:
+    """Send ``content`` encoded exactly as FastAPI's JSONResponse would."""
+    body = json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-length", str(len(body)).encode()), _JSON_HEADER],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")  # type: ignore[no-any-return]
+    return None
+
+
+def _strings(params: Dict[str, Any], *names: str) -> bool:
+    """Whether every field is present and a string, as the request models require."""
+    return all(isinstance(params.get(name), str) for name in names)
+
+
+def _string_map(value: Any) -> bool:
+    return isinstance(value, dict) and all(isinstance(v, str) for v in value.values())
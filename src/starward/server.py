@@ -1,16 +1,44 @@
 """FastAPI server for cloud service emulation."""
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import uuid
 import uvicorn
 
+from starward.aws.gateway import AwsGateway
+from starward.aws.s3 import object_headers
+from starward.core.journal import OperationJournal
+from starward.core.namespaces import (
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_NAMESPACE,
+    Namespace,
+    NamespaceManager,
+    validate_name,
+)
 from starward.core.state_engine import StateEngine
 from starward.core.registry import ServiceRegistry
-from starward.core.event_bus import EventBus, Event
+from starward.core.event_bus import EventBus
+from starward.core.event_stream import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_INTERVAL,
+    EventFilter,
+    encode_batch,
+    tail,
+)
 from starward.core.plugins import PluginManager
-from starward.services.s3 import MockS3Service
-from starward.services.sqs import MockSQSService
+from starward.dataplane import DataPlane
+from starward.services.s3 import DEFAULT_CONTENT_TYPE, InvalidRangeError, MockS3Service
+from starward.services.s3_notifications import BucketNotifier
+from starward.services.sqs import MAX_BATCH_ENTRIES, MockSQSService
 
 
 class CreateBucketRequest(BaseModel):
@@ -23,6 +51,11 @@ class PutObjectRequest(BaseModel):
     data: str
 
 
+class BucketNotificationRequest(BaseModel):
+    # Configurations are validated by the service.
+    queue_configurations: List[Dict[str, Any]]
+
+
 class CreateQueueRequest(BaseModel):
     queue_name: str
     attributes: Optional[Dict[str, str]] = None
@@ -34,29 +67,166 @@ class SendMessageRequest(BaseModel):
     attributes: Optional[Dict[str, str]] = None
 
 
+class MessageBatchRequest(BaseModel):
+    queue_name: str
+    # Entries are validated by the service so failures are reported per entry.
+    entries: List[Dict[str, Any]]
+
+
+NAMESPACE_HEADER = "x-starward-namespace"
+NAMESPACE_PREFIX = "/ns/"
+
+# Namespace serving the current request; unset means the default namespace.
+_current_namespace: ContextVar[Optional[Namespace]] = ContextVar("namespace", default=None)
+
+
+class NamespaceMiddleware:
+    """Selects the namespace for each HTTP or WebSocket request.
+
+    The namespace comes from a ``/ns/<name>/...`` path prefix, which is
+    stripped before routing, or else from the ``X-Starward-Namespace``
+    header. Requests naming neither use the default namespace.
+    """
+
+    def __init__(self, app: ASGIApp, namespaces: NamespaceManager) -> None:
+        self.app = app
+        self.namespaces = namespaces
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        name: Optional[str] = None
+        path: str = scope["path"]
+        if path.startswith(NAMESPACE_PREFIX):
+            name, _, rest = path[len(NAMESPACE_PREFIX) :].partition("/")
+            raw_path = scope.get("raw_path") or path.encode()
+            raw_rest = raw_path[len(NAMESPACE_PREFIX) :].partition(b"/")[2]
+            scope = {**scope, "path": f"/{rest}", "raw_path": b"/" + raw_rest}
+        else:
+            for key, value in scope["headers"]:
+                if key == NAMESPACE_HEADER.encode():
+                    name = value.decode("latin-1")
+                    break
+
+        if name is None or name == DEFAULT_NAMESPACE:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            namespace = await self.namespaces.acquire(name)
+        except ValueError as e:
+            if scope["type"] == "websocket":
+                await WebSocketClose(code=1008, reason=str(e))(scope, receive, send)
+            else:
+                await JSONResponse({"detail": str(e)}, status_code=400)(scope, receive, send)
+            return
+        token = _current_namespace.set(namespace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_namespace.reset(token)
+            self.namespaces.release(namespace)
+
+
 class StarwardServer:
     """Main server for cloud service emulation."""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 4566) -> None:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 4566,
+        sqs_max_batch_entries: int = MAX_BATCH_ENTRIES,
+        journal_path: Optional[str] = None,
+        snapshot_dir: str = "snapshots",
+        namespace_dir: str = "namespaces",
+        namespace_idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        fast_path: bool = False,
+    ) -> None:
         self.host = host
         self.port = port
-        self.app = FastAPI(title="Starward", version="0.1.0")
-        self.state_engine = StateEngine()
-        self.registry = ServiceRegistry()
-        self.event_bus = EventBus()
+        self.sqs_max_batch_entries = sqs_max_batch_entries
+        self.namespace_dir = Path(namespace_dir)
+        self.app = FastAPI(title="Starward", version="0.1.0", lifespan=self._lifespan)
+        # Subscribers run in their own tasks so they never delay a response.
+        self.event_bus = EventBus(asynchronous=True)
         self.plugin_manager = PluginManager()
 
+        # The default namespace keeps the historical snapshot location and the journal.
+        default = self._create_namespace(DEFAULT_NAMESPACE, StateEngine(snapshot_dir))
+        if journal_path is not None:
+            default.state_engine.attach_journal(OperationJournal(journal_path))
+        self.namespaces = NamespaceManager(self._new_namespace, namespace_idle_timeout)
+        self.namespaces.add(default, pinned=True)
+        self._default_namespace = default
+        self._evictor: Optional["asyncio.Task[None]"] = None
+
         self._setup_routes()
-        self._setup_services()
+        if fast_path:
+            # Hot object and message routes skip FastAPI; everything else reaches it.
+            self.app.add_middleware(
+                DataPlane, s3=lambda: self.s3_service, sqs=lambda: self.sqs_service
+            )
+        # AWS SDK requests are answered inside the namespace chosen for them.
+        self.app.add_middleware(
+            AwsGateway, s3=lambda: self.s3_service, sqs=lambda: self.sqs_service
+        )
+        self.app.add_middleware(NamespaceMiddleware, namespaces=self.namespaces)
 
-    def _setup_services(self) -> None:
-        """Register and initialize services."""
-        self.registry.register_type("s3", MockS3Service)
-        self.registry.register_type("sqs", MockSQSService)
+    def _new_namespace(self, name: str) -> Namespace:
+        return self._create_namespace(name, StateEngine(str(self.namespace_dir / name)))
+
+    def _create_namespace(self, name: str, state_engine: StateEngine) -> Namespace:
+        """Register and initialize services on a namespace's state engine."""
+        registry = ServiceRegistry()
+        registry.register_type("s3", MockS3Service)
+        registry.register_type("sqs", MockSQSService)
 
         # Create service instances
-        self.s3_service = self.registry.create_service("s3", self.state_engine)
-        self.sqs_service = self.registry.create_service("sqs", self.state_engine)
+        s3 = registry.create_service(
+            "s3",
+            state_engine,
+            event_bus=self.event_bus,
+            plugins=self.plugin_manager,
+            namespace=name,
+        )
+        sqs = registry.create_service(
+            "sqs",
+            state_engine,
+            max_batch_entries=self.sqs_max_batch_entries,
+            event_bus=self.event_bus,
+            plugins=self.plugin_manager,
+            namespace=name,
+        )
+        # Bucket notifications go straight into the queues of the same namespace.
+        s3.notifier = BucketNotifier(sqs)
+        return Namespace(name, state_engine, registry)
+
+    @property
+    def namespace(self) -> Namespace:
+        """Namespace serving the current request."""
+        return _current_namespace.get() or self._default_namespace
+
+    @property
+    def state_engine(self) -> StateEngine:
+        """State engine of the current namespace."""
+        return self.namespace.state_engine
+
+    @property
+    def registry(self) -> ServiceRegistry:
+        """Service registry of the current namespace."""
+        return self.namespace.registry
+
+    @property
+    def s3_service(self) -> MockS3Service:
+        """S3 service of the current namespace."""
+        return self.namespace.service("s3")  # type: ignore[no-any-return]
+
+    @property
+    def sqs_service(self) -> MockSQSService:
+        """SQS service of the current namespace."""
+        return self.namespace.service("sqs")  # type: ignore[no-any-return]
 
     def _setup_routes(self) -> None:
         """Setup API routes."""
@@ -73,15 +243,7 @@ class StarwardServer:
         @self.app.post("/s3/buckets")
         async def create_bucket(req: CreateBucketRequest) -> Dict[str, Any]:
             try:
-                result = await self.s3_service.create_bucket(req.bucket_name)
-                await self.event_bus.publish(
-                    Event(
-                        type="bucket.created",
-                        service="s3",
-                        data={"bucket": req.bucket_name},
-                    )
-                )
-                return result
+                return await self.s3_service.create_bucket(req.bucket_name)
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
@@ -98,6 +260,26 @@ class StarwardServer:
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
+        @self.app.put("/s3/buckets/{bucket_name}/notification")
+        async def put_bucket_notification(
+            bucket_name: str, req: BucketNotificationRequest
+        ) -> Dict[str, Any]:
+            try:
+                rules = await self.s3_service.put_bucket_notification(
+                    bucket_name, req.queue_configurations
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"queue_configurations": rules}
+
+        @self.app.get("/s3/buckets/{bucket_name}/notification")
+        async def get_bucket_notification(bucket_name: str) -> Dict[str, Any]:
+            try:
+                rules = await self.s3_service.get_bucket_notification(bucket_name)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            return {"queue_configurations": rules}
+
         @self.app.post("/s3/objects")
         async def put_object(req: PutObjectRequest) -> Dict[str, Any]:
             try:
@@ -108,19 +290,79 @@ class StarwardServer:
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
+        @self.app.get("/s3/buckets/{bucket_name}/objects")
+        async def list_objects(
+            bucket_name: str,
+            prefix: str = "",
+            delimiter: Optional[str] = None,
+            max_keys: int = 1000,
+            start_after: Optional[str] = None,
+            continuation_token: Optional[str] = None,
+        ) -> Dict[str, Any]:
+            try:
+                return await self.s3_service.list_objects_v2(
+                    bucket_name, prefix, delimiter, max_keys, start_after, continuation_token
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.put("/s3/buckets/{bucket_name}/objects/{key:path}")
+        async def upload_object(bucket_name: str, key: str, request: Request) -> Dict[str, Any]:
+            metadata = {
+                name[len("x-amz-meta-") :]: value
+                for name, value in request.headers.items()
+                if name.startswith("x-amz-meta-")
+            }
+            try:
+                return await self.s3_service.put_object_stream(
+                    bucket_name,
+                    key,
+                    request.stream(),
+                    metadata,
+                    request.headers.get("content-type", DEFAULT_CONTENT_TYPE),
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.get("/s3/buckets/{bucket_name}/objects/{key:path}")
+        async def download_object(bucket_name: str, key: str, request: Request) -> StreamingResponse:
+            byte_range = request.headers.get("range")
+            try:
+                info, chunks = await self.s3_service.open_object(bucket_name, key, byte_range)
+            except InvalidRangeError as e:
+                raise HTTPException(status_code=416, detail=str(e))
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+
+            headers = object_headers(info)
+            headers["Content-Length"] = str(info["end"] - info["start"] + 1 if info["size"] else 0)
+            status_code = 200
+            if byte_range:
+                status_code = 206
+                headers["Content-Range"] = f"bytes {info['start']}-{info['end']}/{info['size']}"
+            return StreamingResponse(
+                chunks,
+                status_code=status_code,
+                headers=headers,
+                media_type=info["content_type"],
+            )
+
+        @self.app.head("/s3/buckets/{bucket_name}/objects/{key:path}")
+        async def head_object(bucket_name: str, key: str) -> Response:
+            try:
+                info = await self.s3_service.head_object(bucket_name, key)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+
+            headers = object_headers(info)
+            headers["Content-Length"] = str(info["size"])
+            return Response(headers=headers, media_type=info["content_type"])
+
         # SQS endpoints
         @self.app.post("/sqs/queues")
         async def create_queue(req: CreateQueueRequest) -> Dict[str, Any]:
             try:
-                result = await self.sqs_service.create_queue(req.queue_name, req.attributes)
-                await self.event_bus.publish(
-                    Event(
-                        type="queue.created",
-                        service="sqs",
-                        data={"queue": req.queue_name},
-                    )
-                )
-                return result
+                return await self.sqs_service.create_queue(req.queue_name, req.attributes)
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
@@ -139,24 +381,250 @@ class StarwardServer:
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
+        @self.app.get("/sqs/messages")
+        async def receive_messages(
+            queue_name: str,
+            max_messages: int = 1,
+            wait_time_seconds: float = 0,
+            visibility_timeout: Optional[int] = None,
+        ) -> Dict[str, Any]:
+            try:
+                messages = await self.sqs_service.receive_messages(
+                    queue_name, max_messages, wait_time_seconds, visibility_timeout
+                )
+                return {"messages": messages}
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.post("/sqs/messages/batch")
+        async def send_message_batch(req: MessageBatchRequest) -> Dict[str, Any]:
+            try:
+                return await self.sqs_service.send_message_batch(req.queue_name, req.entries)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.post("/sqs/messages/delete-batch")
+        async def delete_message_batch(req: MessageBatchRequest) -> Dict[str, Any]:
+            try:
+                return await self.sqs_service.delete_message_batch(req.queue_name, req.entries)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
         # Snapshot endpoints
         @self.app.post("/snapshots")
-        async def create_snapshot(snapshot_id: Optional[str] = None) -> Dict[str, Any]:
-            snapshot = await self.state_engine.create_snapshot(snapshot_id)
-            return {"id": snapshot.id, "timestamp": snapshot.timestamp.isoformat()}
+        async def create_snapshot(
+            snapshot_id: Optional[str] = None, tag: List[str] = Query(default=[])
+        ) -> Dict[str, Any]:
+            # Persisting runs in the background; poll GET /snapshots/{id} for completion.
+            try:
+                snapshot = await self.state_engine.create_snapshot(
+                    snapshot_id, wait=False, tags=tag
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {
+                "id": snapshot.id,
+                "timestamp": snapshot.timestamp.isoformat(),
+                "parent": snapshot.parent,
+                "tags": snapshot.tags,
+                "status": self.state_engine.snapshot_status(snapshot.id),
+            }
+
+        @self.app.get("/snapshots/{snapshot_id}")
+        async def get_snapshot(snapshot_id: str, wait: bool = False) -> Dict[str, Any]:
+            try:
+                if wait:
+                    await self.state_engine.wait_persisted(snapshot_id)
+                status = self.state_engine.snapshot_status(snapshot_id)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            except OSError as e:
+                raise HTTPException(status_code=500, detail=f"Snapshot write failed: {e}")
+            return {"id": snapshot_id, "status": status}
 
         @self.app.post("/snapshots/{snapshot_id}/restore")
-        async def restore_snapshot(snapshot_id: str) -> Dict[str, str]:
+        async def restore_snapshot(snapshot_id: str, lazy: bool = False) -> Dict[str, str]:
             try:
-                await self.state_engine.restore_snapshot(snapshot_id)
+                await self.state_engine.restore_snapshot(snapshot_id, lazy=lazy)
                 return {"status": "restored", "snapshot_id": snapshot_id}
             except ValueError as e:
                 raise HTTPException(status_code=404, detail=str(e))
 
+        @self.app.post("/snapshots/{snapshot_id}/fork")
+        async def fork_snapshot(snapshot_id: str, namespace: Optional[str] = None) -> Dict[str, Any]:
+            # Copy-on-write: the new namespace shares the snapshot's pages until it writes.
+            name = namespace or f"fork-{uuid.uuid4().hex[:12]}"
+            try:
+                validate_name(name)
+                if self.namespaces.get(name) is not None:
+                    raise ValueError(f"Namespace already exists: {name}")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            try:
+                engine = await self.state_engine.fork(snapshot_id, str(self.namespace_dir / name))
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            try:
+                await self.namespaces.register(self._create_namespace(name, engine))
+            except ValueError as e:
+                await engine.close()
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"status": "forked", "namespace": name, "snapshot_id": snapshot_id}
+
+        @self.app.post("/state/restore")
+        async def restore_at(
+            seq: Optional[int] = None, timestamp: Optional[datetime] = None
+        ) -> Dict[str, Any]:
+            # Time travel: rebuild the state as of a journal position or point in time.
+            try:
+                point = await self.state_engine.restore_at(seq, timestamp)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"status": "restored", **point.to_dict()}
+
         @self.app.get("/snapshots")
-        async def list_snapshots() -> Dict[str, Any]:
-            snapshots = self.state_engine.list_snapshots()
-            return {"snapshots": snapshots}
+        async def list_snapshots(
+            tag: Optional[str] = None,
+            parent: Optional[str] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            limit: int = 100,
+            offset: int = 0,
+        ) -> Dict[str, Any]:
+            try:
+                entries, total = self.state_engine.query_snapshots(tag, parent, since, until, limit, offset)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            next_offset = offset + len(entries)
+            return {
+                "snapshots": [entry.to_dict() for entry in entries],
+                "total": total,
+                "next_offset": next_offset if next_offset < total else None,
+            }
+
+        @self.app.delete("/snapshots/{snapshot_id}")
+        async def delete_snapshot(snapshot_id: str) -> Dict[str, Any]:
+            try:
+                await self.state_engine.delete_snapshot(snapshot_id)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            # Chunks of deleted snapshots stay on disk until POST /snapshots/gc.
+            return {"status": "deleted", "snapshot_id": snapshot_id}
+
+        @self.app.post("/snapshots/gc")
+        async def collect_garbage() -> Dict[str, Any]:
+            return await self.state_engine.collect_garbage()
+
+        # Namespace endpoints
+        @self.app.get("/namespaces")
+        async def list_namespaces() -> Dict[str, Any]:
+            return {"namespaces": self.namespaces.list_namespaces()}
+
+        @self.app.post("/namespaces/{name}")
+        async def create_namespace(name: str, seed: Optional[int] = None) -> Dict[str, Any]:
+            try:
+                namespace = await self.namespaces.acquire(name)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            try:
+                if seed is not None:
+                    namespace.state_engine.set_seed(seed)
+            finally:
+                self.namespaces.release(namespace)
+            return {"status": "ready", "name": name, "seed": seed}
+
+        @self.app.post("/namespaces/{name}/reset")
+        async def reset_namespace(name: str) -> Dict[str, str]:
+            namespace = self.namespaces.get(name)
+            if namespace is None:
+                raise HTTPException(status_code=404, detail=f"Namespace not found: {name}")
+            await namespace.registry.reset_all()
+            return {"status": "reset", "name": name}
+
+        @self.app.delete("/namespaces/{name}")
+        async def drop_namespace(name: str) -> Dict[str, str]:
+            try:
+                await self.namespaces.drop(name)
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            return {"status": "dropped", "name": name}
+
+        # Event endpoints
+        @self.app.get("/events")
+        async def list_events(
+            after: int = 0,
+            limit: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+            expression: str = Query("", alias="filter"),
+        ) -> Dict[str, Any]:
+            try:
+                event_filter = EventFilter(expression, self.namespace.name)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            events = self.event_bus.read(
+                after, limit, event_filter.event_type, event_filter.service, event_filter.namespace
+            )
+            head = self.event_bus.log.last_sequence
+            return {
+                "events": [event.to_dict() for event in events if event_filter(event)],
+                "cursor": events[-1].sequence if len(events) == limit else head,
+            }
+
+        @self.app.get("/events/stream")
+        async def stream_events(
+            request: Request,
+            after: Optional[int] = None,
+            batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1),
+            interval: float = Query(DEFAULT_INTERVAL, ge=0),
+            expression: str = Query("", alias="filter"),
+        ) -> StreamingResponse:
+            """Server-sent events; each message is a batch, resumable via Last-Event-ID."""
+            try:
+                event_filter = EventFilter(expression, self.namespace.name)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            last_event_id = request.headers.get("last-event-id")
+            if after is None and last_event_id is not None and last_event_id.isdigit():
+                after = int(last_event_id)
+
+            async def messages() -> AsyncIterator[str]:
+                async for batch in tail(self.event_bus, event_filter, after, batch_size, interval):
+                    if not batch.events and not batch.missed:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield f"id: {batch.cursor}\nevent: events\ndata: {encode_batch(batch)}\n\n"
+
+            return StreamingResponse(
+                messages(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.app.websocket("/events/stream")
+        async def stream_events_websocket(
+            websocket: WebSocket,
+            after: Optional[int] = None,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            interval: float = DEFAULT_INTERVAL,
+            expression: str = Query("", alias="filter"),
+        ) -> None:
+            if batch_size < 1 or interval < 0:
+                await websocket.close(code=1008, reason="Invalid batch_size or interval")
+                return
+            try:
+                event_filter = EventFilter(expression, self.namespace.name)
+            except ValueError as e:
+                await websocket.close(code=1008, reason=str(e))
+                return
+            await websocket.accept()
+            try:
+                async for batch in tail(self.event_bus, event_filter, after, batch_size, interval):
+                    await websocket.send_text(encode_batch(batch))
+            except WebSocketDisconnect:
+                pass
+
+        @self.app.get("/events/subscriptions")
+        async def list_subscriptions() -> Dict[str, Any]:
+            return {"subscriptions": self.event_bus.subscription_stats()}
 
         # Plugin endpoints
         @self.app.get("/plugins")
@@ -164,13 +632,39 @@ class StarwardServer:
             plugins = self.plugin_manager.list_plugins()
             return {"plugins": plugins}
 
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI) -> AsyncIterator[None]:
+        await self.startup()
+        try:
+            yield
+        finally:
+            await self.shutdown()
+
     async def startup(self) -> None:
         """Startup hook."""
+        if self.state_engine.journal is not None:
+            # Rebuild state from the newest snapshot plus the journal tail.
+            await self.state_engine.recover()
         await self.registry.start_all()
+        self._evictor = asyncio.create_task(self._evict_idle_namespaces())
 
     async def shutdown(self) -> None:
         """Shutdown hook."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        await self.namespaces.close()
+        await self.event_bus.close()
         await self.registry.stop_all()
+        await self.state_engine.close()
+        if self.state_engine.journal is not None:
+            await self.state_engine.journal.close()
+
+    async def _evict_idle_namespaces(self) -> None:
+        interval = min(max(self.namespaces.idle_timeout / 4, 1.0), 30.0)
+        while True:
+            await asyncio.sleep(interval)
+            await self.namespaces.evict_idle()
 
     def run(self) -> None:
         """Run the server."""
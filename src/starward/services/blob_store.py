@@ -0,0 +1,154 @@
+"""Content-addressed on-disk store for large object payloads."""
+
+from typing import Any, Dict, Iterable, Iterator, Optional
+from pathlib import Path
+import hashlib
+import mmap
+import os
+import uuid
+
+import aiofiles
+
+from starward.core.pages import register_page_type
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+@register_page_type
+class BlobRef:
+    """Reference to a payload held in a BlobStore.
+
+    Only the digest is stored, so a reference read back from a snapshot
+    or bundle resolves against the blob store of whoever reads it.
+    """
+
+    __slots__ = ("digest", "size", "etag")
+
+    page_type = "s3.blob"
+
+    def __init__(self, digest: str, size: int, etag: str) -> None:
+        self.digest = digest
+        self.size = size
+        self.etag = etag
+
+    def __len__(self) -> int:
+        return self.size
+
+    def blobs(self) -> Iterator[str]:
+        """Digests of the blob files this reference keeps alive."""
+        yield self.digest
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return a serializable representation."""
+        return {"digest": self.digest, "size": self.size, "etag": self.etag}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BlobRef":
+        """Rebuild from a serializable representation."""
+        # References persisted with an absolute "path" resolve by digest as well.
+        return cls(state["digest"], state["size"], state["etag"])
+
+
+class BlobWriter:
+    """Incrementally writes a payload and files it under its SHA-256 digest."""
+
+    def __init__(self, store: "BlobStore") -> None:
+        self._store = store
+        self._tmp_path = store.tmp_dir / uuid.uuid4().hex
+        self._file: Optional[Any] = None
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5()
+        self.size = 0
+
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk of payload."""
+        if self._file is None:
+            self._file = await aiofiles.open(self._tmp_path, "wb")
+        await self._file.write(chunk)
+        self._sha256.update(chunk)
+        self._md5.update(chunk)
+        self.size += len(chunk)
+
+    async def commit(self) -> BlobRef:
+        """Finish writing and move the payload to its content address."""
+        if self._file is None:
+            self._file = await aiofiles.open(self._tmp_path, "wb")
+        await self._file.close()
+
+        digest = self._sha256.hexdigest()
+        path = self._store.path_for(digest)
+        if path.exists():
+            # Identical content is already stored; keep the existing copy, but
+            # mark it as freshly written so garbage collection leaves it alone.
+            self._tmp_path.unlink()
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, path)
+        return BlobRef(digest, self.size, self._md5.hexdigest())
+
+    async def abort(self) -> None:
+        """Discard a partially written payload."""
+        if self._file is not None:
+            await self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class BlobStore:
+    """Stores payloads on disk keyed by content hash.
+
+    Payloads are written once and shared by every object (and snapshot)
+    referencing the same content. Payloads missing from ``root`` are
+    looked up in ``fallbacks`` (read-only), which is how a forked state
+    reads the blobs of the state it was forked from.
+    """
+
+    def __init__(self, root: str | Path, fallbacks: Iterable[str | Path] = ()) -> None:
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.fallbacks = [Path(fallback) for fallback in fallbacks]
+
+    def path_for(self, digest: str) -> Path:
+        """Return the on-disk location of a digest."""
+        return self.root / digest[:2] / digest
+
+    def locate(self, digest: str) -> Path:
+        """Return where a stored payload is, checking the fallbacks after ``root``."""
+        path = self.path_for(digest)
+        if not path.exists():
+            for fallback in self.fallbacks:
+                candidate = fallback / digest[:2] / digest
+                if candidate.exists():
+                    return candidate
+        return path
+
+    def read(self, ref: BlobRef) -> bytes:
+        """Read a whole payload into memory."""
+        return self.locate(ref.digest).read_bytes()
+
+    def iter_range(
+        self, ref: BlobRef, start: int, end: int, chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Yield the inclusive byte range ``start..end`` of a payload from a memory map."""
+        path = self.locate(ref.digest)
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            position = start
+            while position <= end:
+                stop = min(position + chunk_size, end + 1)
+                yield m[position:stop]
+                position = stop
+
+    def writer(self) -> BlobWriter:
+        """Start writing a new payload."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return BlobWriter(self)
+
+    async def put(self, data: bytes) -> BlobRef:
+        """Store an in-memory payload."""
+        writer = self.writer()
+        try:
+            await writer.write(data)
+            return await writer.commit()
+        except BaseException:
+            await writer.abort()
+            raise
@@ -1,8 +1,107 @@
 """Mock S3-like storage service."""
 
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterable, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+from pathlib import Path
+import base64
+import binascii
 import hashlib
+import tempfile
+
+from starward.core.event_bus import Event, EventBus
+from starward.core.namespaces import DEFAULT_NAMESPACE
+from starward.core.pages import register_page_type
+from starward.core.plugins import PluginManager, hooked
+from starward.core.state_engine import StateEngine
+from starward.services.blob_store import READ_CHUNK_SIZE, BlobRef, BlobStore
+from starward.services.s3_index import BucketObjects, prefix_successor
+from starward.services.s3_notifications import BucketNotifier, parse_rules
+
+# Payloads larger than this are spooled to the on-disk blob store.
+DEFAULT_SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+ObjectData = Union[bytes, BlobRef]
+DEFAULT_CONTENT_TYPE = "binary/octet-stream"
+MAX_LIST_KEYS = 1000
+
+# State engine pages owned by this service.
+BUCKETS_PAGE = "s3/buckets"
+NOTIFICATIONS_PAGE = "s3/notifications"
+OBJECTS_PAGE_PREFIX = "s3/objects/"
+
+
+@register_page_type
+class ObjectRecord:
+    """Stored object: payload plus metadata computed once at write time.
+
+    Records are never mutated after creation, so bucket pages can share
+    them between snapshots.
+    """
+
+    __slots__ = ("data", "size", "etag", "last_modified", "content_type", "metadata")
+
+    page_type = "s3.object"
+
+    def __init__(
+        self,
+        data: ObjectData,
+        etag: str,
+        last_modified: str,
+        content_type: str = DEFAULT_CONTENT_TYPE,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.data = data
+        self.size = len(data)
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.metadata = metadata or {}
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return a serializable representation."""
+        return {
+            "data": self.data,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_type": self.content_type,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ObjectRecord":
+        """Rebuild from a serializable representation."""
+        return cls(
+            state["data"],
+            state["etag"],
+            state["last_modified"],
+            state["content_type"],
+            state["metadata"],
+        )
+
+    def blobs(self) -> Iterator[str]:
+        """Digests of the blob files holding the payload."""
+        if isinstance(self.data, BlobRef):
+            yield self.data.digest
+
+    def read(self, blob_store: Optional[BlobStore] = None) -> bytes:
+        """Return the whole payload; spooled payloads are read from ``blob_store``."""
+        if isinstance(self.data, BlobRef):
+            if blob_store is None:
+                raise ValueError("Spooled payload needs a blob store")
+            return blob_store.read(self.data)
+        return self.data
+
+    def head(self, bucket_name: str, key: str) -> Dict[str, Any]:
+        """Describe the object without touching its payload."""
+        return {
+            "bucket": bucket_name,
+            "key": key,
+            "etag": self.etag,
+            "size": self.size,
+            "last_modified": self.last_modified,
+            "content_type": self.content_type,
+            "metadata": self.metadata,
+        }
 
 
 class MockS3Service:
@@ -10,106 +109,540 @@ class MockS3Service:
 
     service_name = "s3"
 
-    def __init__(self, state_engine: Any = None) -> None:
-        self.buckets: Dict[str, Dict[str, Any]] = {}
-        self.objects: Dict[str, Dict[str, bytes]] = {}
-        self.state_engine = state_engine
+    def __init__(
+        self,
+        state_engine: Any = None,
+        blob_dir: Optional[str] = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+        event_bus: Optional[EventBus] = None,
+        plugins: Optional[PluginManager] = None,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> None:
+        # Without a shared engine the service keeps its state in a private one.
+        self._private_state = state_engine is None
+        self.event_bus = event_bus
+        # Events are tagged with the namespace so readers see only their own.
+        self.namespace = namespace
+        # Plugin hooks run around every @hooked operation.
+        self.plugins = plugins
+        # Delivers bucket notifications; without one they are stored but not sent.
+        self.notifier: Optional[BucketNotifier] = None
+        self.state_engine = StateEngine() if state_engine is None else state_engine
+        self.spool_threshold = spool_threshold
+        self._blob_dir = blob_dir
+        self._blob_store: Optional[BlobStore] = None
+        self.state_engine.on_replay(self.service_name, self.apply)
+
+    @property
+    def blob_store(self) -> BlobStore:
+        """On-disk store for spooled payloads, created on first use."""
+        if self._blob_store is None:
+            fallbacks: List[Path] = []
+            if self._blob_dir is not None:
+                root = Path(self._blob_dir)
+            elif not self._private_state:
+                # The engine's blob directories, which its snapshots and bundles cover.
+                root, *fallbacks = self.state_engine.blob_dirs
+            else:
+                root = Path(tempfile.mkdtemp(prefix="starward-blobs-"))
+            self._blob_store = BlobStore(root, fallbacks)
+        return self._blob_store
+
+    @property
+    def buckets(self) -> Dict[str, Dict[str, Any]]:
+        """Bucket descriptions by name (read-only)."""
+        buckets: Dict[str, Dict[str, Any]] = self.state_engine.get_state(BUCKETS_PAGE, {})
+        return buckets
+
+    def _objects(self, bucket_name: str) -> BucketObjects:
+        """Objects of an existing bucket, for reading."""
+        objects = self.state_engine.get_state(OBJECTS_PAGE_PREFIX + bucket_name)
+        if bucket_name not in self.buckets or objects is None:
+            raise ValueError(f"Bucket not found: {bucket_name}")
+        return objects  # type: ignore[no-any-return]
+
+    def _mutable_objects(self, bucket_name: str) -> BucketObjects:
+        """Objects of an existing bucket, for writing."""
+        if bucket_name not in self.buckets:
+            raise ValueError(f"Bucket not found: {bucket_name}")
+        return self.state_engine.mutable_state(  # type: ignore[no-any-return]
+            OBJECTS_PAGE_PREFIX + bucket_name, BucketObjects
+        )
 
     async def start(self) -> None:
         """Start the service."""
-        if self.state_engine:
-            state = self.state_engine.get_state("s3", {})
-            self.buckets = state.get("buckets", {})
-            self.objects = state.get("objects", {})
+        # All service state lives in the state engine; nothing to load.
 
     async def stop(self) -> None:
         """Stop the service."""
-        if self.state_engine:
-            self.state_engine.set_state(
-                "s3", {"buckets": self.buckets, "objects": self.objects}
-            )
+        if self.notifier is not None:
+            await self.notifier.drain()
 
     async def reset(self) -> None:
         """Reset service state."""
-        self.buckets.clear()
-        self.objects.clear()
+        self._apply_reset()
+        self.state_engine.record(self.service_name, "reset", {})
+        self._emit("service.reset", {})
+
+    def apply(self, action: str, params: Dict[str, Any]) -> None:
+        """Reapply a journaled mutation."""
+        handler = getattr(self, f"_apply_{action}", None)
+        if handler is None:
+            raise ValueError(f"Unknown S3 journal action: {action}")
+        handler(**params)
 
+    def _apply_reset(self) -> None:
+        for key in self.state_engine.state_keys(OBJECTS_PAGE_PREFIX):
+            self.state_engine.delete_state(key)
+        self.state_engine.delete_state(BUCKETS_PAGE)
+        self.state_engine.delete_state(NOTIFICATIONS_PAGE)
+
+    @hooked
     async def create_bucket(self, bucket_name: str) -> Dict[str, Any]:
         """Create a new bucket."""
-        if bucket_name in self.buckets:
-            raise ValueError(f"Bucket already exists: {bucket_name}")
+        async with self.state_engine.mutation(OBJECTS_PAGE_PREFIX + bucket_name):
+            if bucket_name in self.buckets:
+                raise ValueError(f"Bucket already exists: {bucket_name}")
 
-        self.buckets[bucket_name] = {
-            "name": bucket_name,
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        self.objects[bucket_name] = {}
-        return self.buckets[bucket_name]
+            bucket = {
+                "name": bucket_name,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            self._apply_create_bucket(bucket)
+            self.state_engine.record(self.service_name, "create_bucket", {"bucket": bucket})
+            self._emit("bucket.created", {"bucket": bucket_name})
+        return bucket
+
+    def _apply_create_bucket(self, bucket: Dict[str, Any]) -> None:
+        self.state_engine.mutable_state(BUCKETS_PAGE, dict)[bucket["name"]] = bucket
+        self.state_engine.set_state(OBJECTS_PAGE_PREFIX + bucket["name"], BucketObjects())
 
+    @hooked
     async def delete_bucket(self, bucket_name: str) -> None:
         """Delete a bucket."""
-        if bucket_name not in self.buckets:
-            raise ValueError(f"Bucket not found: {bucket_name}")
+        async with self.state_engine.mutation(OBJECTS_PAGE_PREFIX + bucket_name):
+            if self._objects(bucket_name):
+                raise ValueError(f"Bucket not empty: {bucket_name}")
 
-        if self.objects[bucket_name]:
-            raise ValueError(f"Bucket not empty: {bucket_name}")
+            self._apply_delete_bucket(bucket_name)
+            self.state_engine.record(self.service_name, "delete_bucket", {"bucket_name": bucket_name})
+            self._emit("bucket.deleted", {"bucket": bucket_name})
 
-        del self.buckets[bucket_name]
-        del self.objects[bucket_name]
+    def _apply_delete_bucket(self, bucket_name: str) -> None:
+        del self.state_engine.mutable_state(BUCKETS_PAGE)[bucket_name]
+        self.state_engine.delete_state(OBJECTS_PAGE_PREFIX + bucket_name)
+        if bucket_name in self.state_engine.get_state(NOTIFICATIONS_PAGE, {}):
+            del self.state_engine.mutable_state(NOTIFICATIONS_PAGE)[bucket_name]
 
+    @hooked
     async def list_buckets(self) -> list[Dict[str, Any]]:
         """List all buckets."""
         return list(self.buckets.values())
 
+    @hooked
+    async def put_bucket_notification(
+        self, bucket_name: str, configurations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Replace the queue notification configurations of a bucket.
+
+        See :func:`~starward.services.s3_notifications.parse_rules` for the
+        configuration format.
+        """
+        rules = parse_rules(configurations)
+        if self.notifier is not None:
+            self.notifier.validate(rules)
+        async with self.state_engine.mutation(OBJECTS_PAGE_PREFIX + bucket_name):
+            if bucket_name not in self.buckets:
+                raise ValueError(f"Bucket not found: {bucket_name}")
+            self._apply_put_bucket_notification(bucket_name, rules)
+            self.state_engine.record(
+                self.service_name,
+                "put_bucket_notification",
+                {"bucket_name": bucket_name, "rules": rules},
+            )
+            self._emit(
+                "bucket.notification_updated",
+                {"bucket": bucket_name, "queues": sorted({rule["queue"] for rule in rules})},
+            )
+        return rules
+
+    def _apply_put_bucket_notification(self, bucket_name: str, rules: List[Dict[str, Any]]) -> None:
+        notifications = self.state_engine.mutable_state(NOTIFICATIONS_PAGE, dict)
+        if rules:
+            notifications[bucket_name] = rules
+        else:
+            notifications.pop(bucket_name, None)
+
+    @hooked
+    async def get_bucket_notification(self, bucket_name: str) -> List[Dict[str, Any]]:
+        """Queue notification configurations of a bucket."""
+        if bucket_name not in self.buckets:
+            raise ValueError(f"Bucket not found: {bucket_name}")
+        rules: List[Dict[str, Any]] = self.state_engine.get_state(NOTIFICATIONS_PAGE, {}).get(
+            bucket_name, []
+        )
+        return rules
+
+    @hooked
     async def put_object(
-        self, bucket_name: str, key: str, data: bytes, metadata: Optional[Dict[str, str]] = None
+        self,
+        bucket_name: str,
+        key: str,
+        data: bytes,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: str = DEFAULT_CONTENT_TYPE,
     ) -> Dict[str, Any]:
         """Put an object in a bucket."""
         if bucket_name not in self.buckets:
             raise ValueError(f"Bucket not found: {bucket_name}")
 
-        etag = hashlib.md5(data).hexdigest()
-        self.objects[bucket_name][key] = data
+        stored: ObjectData
+        if len(data) > self.spool_threshold:
+            stored = await self.blob_store.put(data)
+            etag = stored.etag
+        else:
+            stored = data
+            etag = hashlib.md5(data).hexdigest()
 
-        return {
-            "bucket": bucket_name,
-            "key": key,
-            "etag": etag,
-            "size": len(data),
-            "metadata": metadata or {},
-        }
+        return await self._store(bucket_name, key, stored, etag, content_type, metadata)
 
-    async def get_object(self, bucket_name: str, key: str) -> bytes:
-        """Get an object from a bucket."""
+    @hooked
+    async def put_object_stream(
+        self,
+        bucket_name: str,
+        key: str,
+        chunks: AsyncIterable[bytes],
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: str = DEFAULT_CONTENT_TYPE,
+    ) -> Dict[str, Any]:
+        """Put an object whose payload arrives as a stream of chunks.
+
+        Payloads are buffered in memory up to ``spool_threshold`` and spooled
+        to the blob store beyond that, so memory use stays bounded regardless
+        of object size.
+        """
         if bucket_name not in self.buckets:
             raise ValueError(f"Bucket not found: {bucket_name}")
 
-        if key not in self.objects[bucket_name]:
-            raise ValueError(f"Object not found: {key}")
+        buffer = bytearray()
+        writer = None
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if writer is None and len(buffer) + len(chunk) <= self.spool_threshold:
+                    buffer += chunk
+                    continue
+                if writer is None:
+                    writer = self.blob_store.writer()
+                    await writer.write(bytes(buffer))
+                    buffer.clear()
+                await writer.write(chunk)
+
+            stored: ObjectData
+            if writer is None:
+                stored = bytes(buffer)
+                etag = hashlib.md5(stored).hexdigest()
+            else:
+                stored = await writer.commit()
+                etag = stored.etag
+        except BaseException:
+            if writer is not None:
+                await writer.abort()
+            raise
+
+        return await self._store(bucket_name, key, stored, etag, content_type, metadata)
 
-        return self.objects[bucket_name][key]
+    async def _store(
+        self,
+        bucket_name: str,
+        key: str,
+        data: ObjectData,
+        etag: str,
+        content_type: str,
+        metadata: Optional[Dict[str, str]],
+    ) -> Dict[str, Any]:
+        """Install an uploaded payload; the payload itself is received outside the bucket lock."""
+        async with self.state_engine.mutation(OBJECTS_PAGE_PREFIX + bucket_name):
+            record = ObjectRecord(data, etag, self._now(), content_type, metadata)
+            self._apply_put_object(bucket_name, key, record)
+            self.state_engine.record(
+                self.service_name,
+                "put_object",
+                {"bucket_name": bucket_name, "key": key, "record": record},
+            )
+            self._emit_created(bucket_name, key, record, "put")
+            self._notify(bucket_name, key, "ObjectCreated:Put", record)
+        return record.head(bucket_name, key)
+
+    def _emit(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Publish an event for a mutation, if the service has an event bus."""
+        if self.event_bus is not None:
+            self.event_bus.emit(Event(event_type, self.service_name, data, namespace=self.namespace))
+
+    def _emit_created(self, bucket_name: str, key: str, record: ObjectRecord, operation: str) -> None:
+        if self.event_bus is not None:
+            data = {
+                "bucket": bucket_name,
+                "key": key,
+                "size": record.size,
+                "etag": record.etag,
+                "operation": operation,
+            }
+            self.event_bus.emit(Event("object.created", self.service_name, data, namespace=self.namespace))
+
+    def _notify(
+        self, bucket_name: str, key: str, event_name: str, record: Optional[ObjectRecord] = None
+    ) -> None:
+        """Hand a change to the notifier if the bucket has notifications configured."""
+        if self.notifier is None:
+            return
+        rules = self.state_engine.get_state(NOTIFICATIONS_PAGE, {}).get(bucket_name)
+        if not rules:
+            return
+        if record is None:
+            self.notifier.notify(bucket_name, rules, event_name, key, self._now())
+        else:
+            self.notifier.notify(
+                bucket_name, rules, event_name, key, record.last_modified, record.size, record.etag
+            )
+
+    def _apply_put_object(self, bucket_name: str, key: str, record: ObjectRecord) -> None:
+        self._mutable_objects(bucket_name)[key] = record
+
+    def _now(self) -> str:
+        return str(self.state_engine.now().isoformat())
+
+    @hooked
+    async def get_object(self, bucket_name: str, key: str) -> bytes:
+        """Get an object from a bucket."""
+        return self._lookup(bucket_name, key).read(self.blob_store)
+
+    @hooked
+    async def head_object(self, bucket_name: str, key: str) -> Dict[str, Any]:
+        """Get object metadata without reading its payload."""
+        return self._lookup(bucket_name, key).head(bucket_name, key)
+
+    @hooked
+    async def open_object(
+        self, bucket_name: str, key: str, byte_range: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Iterator[bytes]]:
+        """Open an object for streaming, optionally restricted to a Range header.
+
+        Returns the object info (including the served ``start``/``end`` and the
+        total ``size``) and an iterator over the payload chunks. Spooled
+        payloads are read through a memory map.
+        """
+        record = self._lookup(bucket_name, key)
+        size = record.size
+        start, end = parse_range(byte_range, size)
+        info = record.head(bucket_name, key)
+        info["start"] = start
+        info["end"] = end
 
+        data = record.data
+        if size == 0:
+            return info, iter(())
+        if isinstance(data, BlobRef):
+            return info, self.blob_store.iter_range(data, start, end)
+        return info, _iter_bytes(data, start, end)
+
+    @hooked
+    async def copy_object(
+        self, source_bucket: str, source_key: str, bucket_name: str, key: str
+    ) -> Dict[str, Any]:
+        """Copy an object, sharing the stored payload with the source."""
+        async with self.state_engine.mutation(
+            OBJECTS_PAGE_PREFIX + source_bucket, OBJECTS_PAGE_PREFIX + bucket_name
+        ):
+            last_modified = self._now()
+            record = self._apply_copy_object(
+                source_bucket, source_key, bucket_name, key, last_modified
+            )
+            # Journal the copy rather than the record, so the payload isn't logged again.
+            self.state_engine.record(
+                self.service_name,
+                "copy_object",
+                {
+                    "source_bucket": source_bucket,
+                    "source_key": source_key,
+                    "bucket_name": bucket_name,
+                    "key": key,
+                    "last_modified": last_modified,
+                },
+            )
+            self._emit_created(bucket_name, key, record, "copy")
+            self._notify(bucket_name, key, "ObjectCreated:Copy", record)
+        return record.head(bucket_name, key)
+
+    def _apply_copy_object(
+        self, source_bucket: str, source_key: str, bucket_name: str, key: str, last_modified: str
+    ) -> ObjectRecord:
+        source = self._lookup(source_bucket, source_key)
+        record = ObjectRecord(
+            source.data, source.etag, last_modified, source.content_type, dict(source.metadata)
+        )
+        self._mutable_objects(bucket_name)[key] = record
+        return record
+
+    @hooked
     async def delete_object(self, bucket_name: str, key: str) -> None:
         """Delete an object from a bucket."""
-        if bucket_name not in self.buckets:
-            raise ValueError(f"Bucket not found: {bucket_name}")
+        async with self.state_engine.mutation(OBJECTS_PAGE_PREFIX + bucket_name):
+            if key in self._objects(bucket_name):
+                self._apply_delete_object(bucket_name, key)
+                self.state_engine.record(
+                    self.service_name, "delete_object", {"bucket_name": bucket_name, "key": key}
+                )
+                self._emit("object.removed", {"bucket": bucket_name, "key": key})
+                self._notify(bucket_name, key, "ObjectRemoved:Delete")
 
-        if key in self.objects[bucket_name]:
-            del self.objects[bucket_name][key]
+    def _apply_delete_object(self, bucket_name: str, key: str) -> None:
+        del self._mutable_objects(bucket_name)[key]
 
+    @hooked
     async def list_objects(self, bucket_name: str, prefix: str = "") -> list[Dict[str, Any]]:
         """List objects in a bucket."""
-        if bucket_name not in self.buckets:
-            raise ValueError(f"Bucket not found: {bucket_name}")
-
+        bucket = self._objects(bucket_name)
         objects = []
-        for key, data in self.objects[bucket_name].items():
-            if key.startswith(prefix):
-                objects.append(
-                    {
-                        "key": key,
-                        "size": len(data),
-                        "etag": hashlib.md5(data).hexdigest(),
-                    }
-                )
+        for key in bucket.iter_from(prefix):
+            if not key.startswith(prefix):
+                break
+            objects.append(_list_entry(key, bucket[key]))
         return objects
+
+    @hooked
+    async def list_objects_v2(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: Optional[str] = None,
+        max_keys: int = MAX_LIST_KEYS,
+        start_after: Optional[str] = None,
+        continuation_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """List objects with ListObjectsV2 semantics.
+
+        Keys are returned in sorted order. With a ``delimiter``, keys sharing
+        the next path segment after ``prefix`` are rolled up into
+        ``common_prefixes``, each counting once towards ``max_keys``. Truncated
+        results carry an opaque ``next_continuation_token``.
+        """
+        bucket = self._objects(bucket_name)
+        if max_keys < 0:
+            raise ValueError(f"Invalid max keys: {max_keys}")
+        max_keys = min(max_keys, MAX_LIST_KEYS)
+
+        # Every scan resumes from an inclusive lower bound.
+        resume_from = prefix
+        if continuation_token is not None:
+            resume_from = max(resume_from, _decode_token(continuation_token))
+        elif start_after:
+            resume_from = max(resume_from, start_after + "\0")
+
+        contents: List[Dict[str, Any]] = []
+        common_prefixes: List[str] = []
+        is_truncated = False
+        keys = bucket.iter_from(resume_from)
+        while True:
+            key = next(keys, None)
+            if key is None or not key.startswith(prefix):
+                break
+            if len(contents) + len(common_prefixes) == max_keys:
+                is_truncated = True
+                break
+
+            if delimiter:
+                pos = key.find(delimiter, len(prefix))
+                if pos != -1:
+                    common_prefix = key[: pos + len(delimiter)]
+                    common_prefixes.append(common_prefix)
+                    # Skip the rest of the rolled-up keys in one seek.
+                    resume_from = prefix_successor(common_prefix)
+                    if not resume_from:
+                        break
+                    keys = bucket.iter_from(resume_from)
+                    continue
+
+            contents.append(_list_entry(key, bucket[key]))
+            resume_from = key + "\0"
+
+        result: Dict[str, Any] = {
+            "name": bucket_name,
+            "prefix": prefix,
+            "delimiter": delimiter,
+            "max_keys": max_keys,
+            "key_count": len(contents) + len(common_prefixes),
+            "is_truncated": is_truncated,
+            "contents": contents,
+            "common_prefixes": common_prefixes,
+            "continuation_token": continuation_token,
+            "start_after": start_after,
+        }
+        if is_truncated:
+            result["next_continuation_token"] = _encode_token(resume_from)
+        return result
+
+    def _lookup(self, bucket_name: str, key: str) -> ObjectRecord:
+        objects = self._objects(bucket_name)
+        if key not in objects:
+            raise ValueError(f"Object not found: {key}")
+
+        return objects[key]  # type: ignore[no-any-return]
+
+
+def _list_entry(key: str, record: ObjectRecord) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "size": record.size,
+        "etag": record.etag,
+        "last_modified": record.last_modified,
+    }
+
+
+def _encode_token(resume_from: str) -> str:
+    return base64.urlsafe_b64encode(resume_from.encode()).decode()
+
+
+def _decode_token(token: str) -> str:
+    try:
+        return base64.b64decode(token.encode(), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid continuation token: {token}") from None
+
+
+class InvalidRangeError(ValueError):
+    """Raised when a Range header cannot be satisfied."""
+
+
+def parse_range(byte_range: Optional[str], size: int) -> Tuple[int, int]:
+    """Resolve an HTTP ``bytes=`` Range header to an inclusive (start, end) pair."""
+    if not byte_range:
+        return 0, max(size - 1, 0)
+
+    unit, _, spec = byte_range.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise InvalidRangeError(f"Unsupported range: {byte_range}")
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes.
+            length = int(last)
+            start, end = max(size - length, 0), size - 1
+        else:
+            length = None
+            start = int(first)
+            end = int(last) if last else size - 1
+    except ValueError:
+        raise InvalidRangeError(f"Invalid range: {byte_range}") from None
+
+    if length == 0 or start >= size or end < start:
+        raise InvalidRangeError(f"Range not satisfiable: {byte_range}")
+    return start, min(end, size - 1)
+
+
+def _iter_bytes(data: bytes, start: int, end: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for position in range(start, end + 1, READ_CHUNK_SIZE):
+        yield bytes(view[position : min(position + READ_CHUNK_SIZE, end + 1)])
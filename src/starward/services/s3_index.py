@@ -0,0 +1,164 @@
+"""Sorted key index for S3 bucket listings."""
+
+from typing import Any, Dict, Iterator, List, MutableMapping
+from bisect import bisect_left, insort
+
+from starward.core.pages import register_page_type
+
+# Target chunk length; chunks split at twice this size.
+CHUNK_SIZE = 512
+
+
+class SortedKeyIndex:
+    """Sorted set of keys stored as a list of bounded, sorted chunks.
+
+    Inserts and deletes touch a single chunk, so they cost O(log N) to
+    locate plus O(CHUNK_SIZE) to shift, and ordered scans starting at any
+    key cost O(log N + k).
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[List[str]] = []
+        self._maxes: List[str] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key: str) -> None:
+        """Insert a key that is not yet present."""
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+        else:
+            pos = bisect_left(self._maxes, key)
+            if pos == len(self._chunks):
+                pos -= 1
+                self._chunks[pos].append(key)
+                self._maxes[pos] = key
+            else:
+                insort(self._chunks[pos], key)
+            if len(self._chunks[pos]) > 2 * CHUNK_SIZE:
+                self._split(pos)
+        self._len += 1
+
+    def discard(self, key: str) -> None:
+        """Remove a key if present."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._chunks):
+            return
+        chunk = self._chunks[pos]
+        index = bisect_left(chunk, key)
+        if index == len(chunk) or chunk[index] != key:
+            return
+
+        del chunk[index]
+        self._len -= 1
+        if not chunk:
+            del self._chunks[pos]
+            del self._maxes[pos]
+        elif index == len(chunk):
+            self._maxes[pos] = chunk[-1]
+
+    def iter_from(self, start: str) -> Iterator[str]:
+        """Yield keys greater than or equal to ``start`` in sorted order."""
+        pos = bisect_left(self._maxes, start)
+        if pos == len(self._chunks):
+            return
+        chunk = self._chunks[pos]
+        yield from chunk[bisect_left(chunk, start) :]
+        for i in range(pos + 1, len(self._chunks)):
+            yield from self._chunks[i]
+
+    def copy(self) -> "SortedKeyIndex":
+        """Return an independent copy."""
+        clone = SortedKeyIndex()
+        clone._chunks = [list(chunk) for chunk in self._chunks]
+        clone._maxes = list(self._maxes)
+        clone._len = self._len
+        return clone
+
+    def _split(self, pos: int) -> None:
+        chunk = self._chunks[pos]
+        half = len(chunk) // 2
+        self._chunks[pos : pos + 1] = [chunk[:half], chunk[half:]]
+        self._maxes[pos : pos + 1] = [chunk[half - 1], chunk[-1]]
+
+
+@register_page_type
+class BucketObjects(MutableMapping[str, Any]):
+    """Per-bucket object table that keeps a sorted key index in step.
+
+    Point lookups go through a dict; iteration is in key order. Each bucket
+    is one state engine page.
+    """
+
+    page_type = "s3.bucket_objects"
+
+    def __init__(self, records: Any = ()) -> None:
+        self._records: Dict[str, Any] = {}
+        self.index = SortedKeyIndex()
+        for key, record in dict(records).items():
+            self[key] = record
+
+    def __getitem__(self, key: str) -> Any:
+        return self._records[key]
+
+    def __setitem__(self, key: str, record: Any) -> None:
+        if key not in self._records:
+            self.index.add(key)
+        self._records[key] = record
+
+    def __delitem__(self, key: str) -> None:
+        del self._records[key]
+        self.index.discard(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def iter_from(self, start: str) -> Iterator[str]:
+        """Yield keys greater than or equal to ``start`` in sorted order."""
+        return self.index.iter_from(start)
+
+    def copy(self) -> "BucketObjects":
+        """Return an independent copy sharing the (immutable) records."""
+        clone = BucketObjects()
+        clone._records = dict(self._records)
+        clone.index = self.index.copy()
+        return clone
+
+    def blobs(self) -> Iterator[str]:
+        """Digests of the blob files holding the records' payloads."""
+        for record in self._records.values():
+            blobs = getattr(record, "blobs", None)
+            if blobs is not None:
+                yield from blobs()
+
+    def to_state(self) -> List[List[Any]]:
+        """Return key/record pairs in key order."""
+        return [[key, self._records[key]] for key in self.index]
+
+    @classmethod
+    def from_state(cls, state: List[List[Any]]) -> "BucketObjects":
+        """Rebuild from key/record pairs."""
+        return cls((key, record) for key, record in state)
+
+
+def prefix_successor(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with ``prefix``."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return ""
@@ -0,0 +1,198 @@
+"""S3 bucket notifications delivered into SQS queues in-process."""
+
+from typing import Any, Dict, List, Optional, Tuple
+from json.encoder import encode_basestring_ascii as _quote
+import asyncio
+import uuid
+
+from starward.services.sqs import MockSQSService
+
+AWS_REGION = "us-east-1"
+# Event names a queue configuration may subscribe to.
+EVENT_NAMES = (
+    "s3:ObjectCreated:*",
+    "s3:ObjectCreated:Put",
+    "s3:ObjectCreated:Copy",
+    "s3:ObjectRemoved:*",
+    "s3:ObjectRemoved:Delete",
+)
+# Messages enqueued per queue lock acquisition.
+DELIVERY_BATCH_SIZE = 1000
+
+
+def parse_rules(configurations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Validate queue configurations and return them as stored rules.
+
+    Each configuration names a ``queue`` (by name, URL or ARN), the
+    ``events`` it subscribes to and optional key ``prefix``/``suffix``
+    filters. An empty list removes a bucket's notifications.
+    """
+    rules = []
+    ids = set()
+    for configuration in configurations:
+        if not isinstance(configuration, dict):
+            raise ValueError("Invalid queue configuration")
+        rule_id = configuration.get("id") or uuid.uuid4().hex
+        queue = configuration.get("queue")
+        events = configuration.get("events")
+        prefix = configuration.get("prefix") or ""
+        suffix = configuration.get("suffix") or ""
+        if not isinstance(queue, str) or not queue:
+            raise ValueError("Queue configuration has no queue")
+        if not isinstance(events, list) or not events:
+            raise ValueError("Queue configuration has no events")
+        for event in events:
+            if event not in EVENT_NAMES:
+                raise ValueError(f"Unsupported notification event: {event}")
+        if not all(isinstance(value, str) for value in (rule_id, prefix, suffix)):
+            raise ValueError("Invalid queue configuration")
+        if rule_id in ids:
+            raise ValueError(f"Duplicate queue configuration id: {rule_id}")
+        ids.add(rule_id)
+        rules.append(
+            {
+                "id": rule_id,
+                "queue": queue_name(queue),
+                "events": list(events),
+                "prefix": prefix,
+                "suffix": suffix,
+            }
+        )
+    return rules
+
+
+def queue_name(target: str) -> str:
+    """Queue name of a queue name, URL or ARN."""
+    if target.startswith("arn:"):
+        return target.rsplit(":", 1)[-1]
+    return target.rsplit("/", 1)[-1]
+
+
+# configuration id, bucket, event name, key, event time, size, etag, sequence
+Notification = Tuple[str, str, str, str, str, Optional[int], Optional[str], int]
+
+# The message body is assembled from a template; only the strings are JSON-encoded.
+_RECORD = (
+    '{"Records":[{"eventVersion":"2.1","eventSource":"aws:s3","awsRegion":"%s",'
+    '"eventTime":"%sZ","eventName":"%s","s3":{"s3SchemaVersion":"1.0","configurationId":%s,'
+    '"bucket":{"name":%s,"arn":%s},"object":{"key":%s%s,"sequencer":"%016X"}}}]}'
+)
+
+
+def encode_record(
+    rule_id: str,
+    bucket_name: str,
+    event_name: str,
+    key: str,
+    event_time: str,
+    size: Optional[int],
+    etag: Optional[str],
+    sequence: int,
+) -> str:
+    """S3 event message body holding one record."""
+    # ISO timestamps to milliseconds: "2024-01-01T00:00:00.000".
+    event_time = event_time[:23] if len(event_time) > 19 else event_time + ".000"
+    payload = "" if size is None else f',"size":{size},"eTag":{_quote(etag)}'
+    return _RECORD % (
+        AWS_REGION,
+        event_time,
+        event_name,
+        _quote(rule_id),
+        _quote(bucket_name),
+        _quote("arn:aws:s3:::" + bucket_name),
+        _quote(key),
+        payload,
+        sequence,
+    )
+
+
+def _subscribes(rule: Dict[str, Any], event_name: str, key: str) -> bool:
+    if not key.startswith(rule["prefix"]) or not key.endswith(rule["suffix"]):
+        return False
+    for pattern in rule["events"]:
+        if pattern == event_name or (pattern[-1] == "*" and event_name.startswith(pattern[:-1])):
+            return True
+    return False
+
+
+class BucketNotifier:
+    """Delivers S3 event notifications into the queues of an SQS service.
+
+    The S3 service calls :meth:`notify` while it still holds the bucket
+    lock, so notifications are queued in the order the bucket changed.
+    One delivery task drains them, enqueuing up to ``batch_size``
+    messages per queue under a single queue lock, which keeps every
+    queue in per-bucket order.
+    """
+
+    def __init__(self, sqs: MockSQSService, batch_size: int = DELIVERY_BATCH_SIZE) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.sqs = sqs
+        self.batch_size = batch_size
+        self._pending: List[Tuple[str, Notification]] = []
+        self._delivery: Optional["asyncio.Task[None]"] = None
+        self._sequence = 0
+        self.delivered = 0
+        self.failed = 0
+
+    def validate(self, rules: List[Dict[str, Any]]) -> None:
+        """Raise ValueError if a rule names a queue that does not exist."""
+        for rule in rules:
+            if rule["queue"] not in self.sqs.queues:
+                raise ValueError(f"Queue not found: {rule['queue']}")
+
+    def notify(
+        self,
+        bucket_name: str,
+        rules: List[Dict[str, Any]],
+        event_name: str,
+        key: str,
+        event_time: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+    ) -> None:
+        """Queue a notification for every rule subscribed to the event.
+
+        Messages are encoded by the delivery task, off the write path.
+        """
+        name = "s3:" + event_name
+        sequence = 0
+        for rule in rules:
+            if _subscribes(rule, name, key):
+                if not sequence:
+                    self._sequence = sequence = self._sequence + 1
+                self._pending.append(
+                    (rule["queue"], (rule["id"], bucket_name, event_name, key, event_time, size, etag, sequence))
+                )
+        if sequence and self._delivery is None:
+            self._delivery = asyncio.get_running_loop().create_task(self._deliver())
+
+    async def drain(self) -> None:
+        """Wait until every queued notification has been delivered."""
+        while self._delivery is not None:
+            await asyncio.shield(self._delivery)
+
+    def stats(self) -> Dict[str, int]:
+        """Delivery counters."""
+        return {"pending": len(self._pending), "delivered": self.delivered, "failed": self.failed}
+
+    async def _deliver(self) -> None:
+        try:
+            while self._pending:
+                pending, self._pending = self._pending, []
+                batches: Dict[str, List[Notification]] = {}
+                for queue, notification in pending:
+                    batches.setdefault(queue, []).append(notification)
+                for queue, notifications in batches.items():
+                    for start in range(0, len(notifications), self.batch_size):
+                        batch = [encode_record(*n) for n in notifications[start : start + self.batch_size]]
+                        try:
+                            await self.sqs.send_messages(queue, batch)
+                        except ValueError:
+                            # The queue was deleted after the bucket was configured.
+                            self.failed += len(batch)
+                        else:
+                            self.delivered += len(batch)
+        finally:
+            self._delivery = None
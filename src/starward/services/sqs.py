@@ -1,20 +1,260 @@
 """Mock SQS-like queue service."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
 from datetime import datetime
+import asyncio
+import heapq
+import itertools
+import re
+import time
 import uuid
 
+from starward.core.event_bus import Event, EventBus
+from starward.core.namespaces import DEFAULT_NAMESPACE
+from starward.core.pages import register_page_type
+from starward.core.plugins import PluginManager, hooked
+from starward.core.state_engine import StateEngine
+
+DEFAULT_VISIBILITY_TIMEOUT = 30
+MAX_VISIBILITY_TIMEOUT = 43200
+MAX_WAIT_TIME = 20
+MAX_BATCH_ENTRIES = 10
+MAX_MESSAGE_SIZE = 262144
+
+_BATCH_ENTRY_ID = re.compile(r"^[A-Za-z0-9_-]{1,80}$")
+
+# State engine pages owned by this service.
+QUEUES_PAGE = "sqs/queues"
+MESSAGES_PAGE_PREFIX = "sqs/messages/"
+
 
 class Message:
     """Represents a queue message."""
 
+    __slots__ = (
+        "id",
+        "body",
+        "attributes",
+        "receipt_handle",
+        "sent_timestamp",
+        "receive_count",
+        "visible_at",
+    )
+
     def __init__(self, body: str, attributes: Optional[Dict[str, str]] = None):
         self.id = str(uuid.uuid4())
         self.body = body
         self.attributes = attributes or {}
-        self.receipt_handle = str(uuid.uuid4())
+        self.receipt_handle: Optional[str] = None
         self.sent_timestamp = datetime.utcnow().isoformat()
         self.receive_count = 0
+        self.visible_at = 0.0
+
+    def copy(self) -> "Message":
+        """Return an independent copy."""
+        clone = Message.__new__(Message)
+        for name in Message.__slots__:
+            setattr(clone, name, getattr(self, name))
+        return clone
+
+
+@register_page_type
+class MessageQueue:
+    """Message store for a single queue.
+
+    Visible messages wait in a FIFO deque. Received messages move to an
+    in-flight heap keyed by their visibility deadline and are indexed by
+    receipt handle, so send/delete are O(1) and receive is O(log n) per
+    message. Heap entries for deleted messages are discarded lazily.
+    Time is passed in by the owning service, so a queue rebuilt from a
+    snapshot runs on that service's clock.
+    """
+
+    page_type = "sqs.message_queue"
+
+    def __init__(self, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> None:
+        self.visibility_timeout = visibility_timeout
+        self._ready: Deque[Message] = deque()
+        self._inflight: List[Tuple[float, int, Message]] = []
+        self._handles: Dict[str, Message] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._ready) + len(self._handles)
+
+    def visible_count(self, now: float) -> int:
+        """Number of messages available for receipt at ``now``."""
+        return len(self._ready) + self._count_expired(now)
+
+    def in_flight_count(self, now: float) -> int:
+        """Number of received messages that are not yet visible again at ``now``."""
+        return len(self._handles) - self._count_expired(now)
+
+    def push(self, message: Message) -> None:
+        """Append a message to the tail of the queue."""
+        self._ready.append(message)
+
+    def pop(
+        self,
+        max_messages: int,
+        now: float,
+        visibility_timeout: Optional[float] = None,
+        receipt_handles: Optional[List[str]] = None,
+    ) -> List[Message]:
+        """Receive up to ``max_messages`` and hide them for the visibility timeout.
+
+        ``receipt_handles`` replaces the generated handles when replaying a
+        journaled receive.
+        """
+        self._release_expired(now)
+
+        timeout = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        received: List[Message] = []
+        while self._ready and len(received) < max_messages:
+            message = self._ready.popleft()
+            message.receive_count += 1
+            if receipt_handles is None:
+                message.receipt_handle = uuid.uuid4().hex
+            else:
+                message.receipt_handle = receipt_handles[len(received)]
+            if timeout > 0:
+                self._hide(message, now + timeout)
+            received.append(message)
+
+        if timeout <= 0:
+            # A zero visibility timeout leaves messages immediately receivable.
+            self._ready.extend(received)
+        return received
+
+    def delete(self, receipt_handle: str) -> bool:
+        """Delete an in-flight message by receipt handle."""
+        message = self._handles.pop(receipt_handle, None)
+        if message is None:
+            return False
+        message.receipt_handle = None
+        self._maybe_compact()
+        return True
+
+    def change_visibility(self, receipt_handle: str, visibility_timeout: float, now: float) -> bool:
+        """Reset the visibility deadline of an in-flight message."""
+        message = self._handles.get(receipt_handle)
+        if message is None:
+            return False
+
+        if visibility_timeout <= 0:
+            del self._handles[receipt_handle]
+            message.receipt_handle = None
+            self._ready.appendleft(message)
+        else:
+            self._hide(message, now + visibility_timeout)
+        self._maybe_compact()
+        return True
+
+    def next_deadline(self) -> Optional[float]:
+        """Return the earliest in-flight visibility deadline, if any.
+
+        Only stale heap entries are discarded, so this is safe to call on a
+        page that is still shared with a snapshot.
+        """
+        while self._inflight and not self._is_live(self._inflight[0]):
+            heapq.heappop(self._inflight)
+        return self._inflight[0][0] if self._inflight else None
+
+    def copy(self) -> "MessageQueue":
+        """Return an independent copy, including in-flight state."""
+        clone = MessageQueue(self.visibility_timeout)
+        copies = {id(m): m.copy() for m in self._ready}
+        copies.update((id(m), m.copy()) for m in self._handles.values())
+        clone._ready = deque(copies[id(m)] for m in self._ready)
+        clone._handles = {handle: copies[id(m)] for handle, m in self._handles.items()}
+        clone._inflight = [
+            (deadline, seq, copies[id(m)]) for deadline, seq, m in self._inflight if self._is_live((deadline, seq, m))
+        ]
+        heapq.heapify(clone._inflight)
+        clone._sequence = itertools.count(next(self._sequence))
+        return clone
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return a serializable representation.
+
+        In-flight deadlines are tied to the service's monotonic clock, so
+        persisted messages are all stored as visible.
+        """
+        messages = list(self._ready) + sorted(self._handles.values(), key=lambda m: m.visible_at)
+        return {
+            "visibility_timeout": self.visibility_timeout,
+            "messages": [
+                [m.id, m.body, m.attributes, m.sent_timestamp, m.receive_count] for m in messages
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "MessageQueue":
+        """Rebuild from a serializable representation."""
+        queue = cls(state["visibility_timeout"])
+        for message_id, body, attributes, sent_timestamp, receive_count in state["messages"]:
+            message = Message(body, attributes)
+            message.id = message_id
+            message.sent_timestamp = sent_timestamp
+            message.receive_count = receive_count
+            queue.push(message)
+        return queue
+
+    def clear(self) -> None:
+        """Drop all messages."""
+        self._ready.clear()
+        self._inflight.clear()
+        self._handles.clear()
+
+    def _hide(self, message: Message, deadline: float) -> None:
+        message.visible_at = deadline
+        self._handles[message.receipt_handle] = message  # type: ignore[index]
+        heapq.heappush(self._inflight, (deadline, next(self._sequence), message))
+
+    def _is_live(self, entry: Tuple[float, int, Message]) -> bool:
+        deadline, _, message = entry
+        return (
+            message.receipt_handle is not None
+            and message.visible_at == deadline
+            and self._handles.get(message.receipt_handle) is message
+        )
+
+    def _release_expired(self, now: float) -> None:
+        """Move in-flight messages whose deadline has passed back to the head."""
+        expired: List[Message] = []
+        while self._inflight and self._inflight[0][0] <= now:
+            entry = heapq.heappop(self._inflight)
+            if self._is_live(entry):
+                message = entry[2]
+                del self._handles[message.receipt_handle]  # type: ignore[arg-type]
+                message.receipt_handle = None
+                expired.append(message)
+        if expired:
+            self._ready.extendleft(reversed(expired))
+
+    def _count_expired(self, now: float) -> int:
+        """Count in-flight messages whose deadline has passed, without releasing them.
+
+        Reads must not move messages: the order in which expired messages
+        rejoin the queue would then depend on when state happened to be read.
+        """
+        heap = self._inflight
+        count = 0
+        stack = [0] if heap else []
+        while stack:
+            i = stack.pop()
+            if i < len(heap) and heap[i][0] <= now:
+                count += self._is_live(heap[i])
+                stack.append(2 * i + 1)
+                stack.append(2 * i + 2)
+        return count
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the heap once stale entries dominate it."""
+        if len(self._inflight) > 2 * len(self._handles) + 64:
+            self._inflight = [e for e in self._inflight if self._is_live(e)]
+            heapq.heapify(self._inflight)
 
 
 class MockSQSService:
@@ -22,82 +262,193 @@ class MockSQSService:
 
     service_name = "sqs"
 
-    def __init__(self, state_engine: Any = None) -> None:
-        self.queues: Dict[str, Dict[str, Any]] = {}
-        self.messages: Dict[str, List[Message]] = {}
-        self.state_engine = state_engine
+    def __init__(
+        self,
+        state_engine: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+        max_batch_entries: int = MAX_BATCH_ENTRIES,
+        event_bus: Optional[EventBus] = None,
+        plugins: Optional[PluginManager] = None,
+        wall_clock: Callable[[], float] = time.time,
+        namespace: str = DEFAULT_NAMESPACE,
+    ) -> None:
+        if max_batch_entries < 1:
+            raise ValueError(f"Invalid batch size limit: {max_batch_entries}")
+        self.event_bus = event_bus
+        # Events are tagged with the namespace so readers see only their own.
+        self.namespace = namespace
+        # Plugin hooks run around every @hooked operation.
+        self.plugins = plugins
+        # Without a shared engine the service keeps its state in a private one.
+        self.state_engine = StateEngine() if state_engine is None else state_engine
+        # SQS caps batches at 10 entries; larger limits are an emulator-only opt-in.
+        self.max_batch_entries = max_batch_entries
+        # Deadlines use the monotonic clock; the journal records wall-clock
+        # times, which replay rebases onto the monotonic clock.
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._waiters: Dict[str, Deque["asyncio.Future[bool]"]] = {}
+        self.state_engine.on_restore(self._on_restore)
+        self.state_engine.on_replay(self.service_name, self.apply)
+
+    @property
+    def queues(self) -> Dict[str, Dict[str, Any]]:
+        """Queue descriptions by name (read-only)."""
+        queues: Dict[str, Dict[str, Any]] = self.state_engine.get_state(QUEUES_PAGE, {})
+        return queues
+
+    def _queue(self, queue_name: str) -> MessageQueue:
+        """Message store of an existing queue, for reading."""
+        queue = self.state_engine.get_state(MESSAGES_PAGE_PREFIX + queue_name)
+        if queue_name not in self.queues or queue is None:
+            raise ValueError(f"Queue not found: {queue_name}")
+        return queue  # type: ignore[no-any-return]
+
+    def _mutable_queue(self, queue_name: str) -> MessageQueue:
+        """Message store of an existing queue, for writing."""
+        if queue_name not in self.queues:
+            raise ValueError(f"Queue not found: {queue_name}")
+        return self.state_engine.mutable_state(  # type: ignore[no-any-return]
+            MESSAGES_PAGE_PREFIX + queue_name
+        )
 
     async def start(self) -> None:
         """Start the service."""
-        if self.state_engine:
-            state = self.state_engine.get_state("sqs", {})
-            self.queues = state.get("queues", {})
-            # Messages are not persisted across restarts for simplicity
+        # All service state lives in the state engine; nothing to load.
 
     async def stop(self) -> None:
         """Stop the service."""
-        if self.state_engine:
-            self.state_engine.set_state("sqs", {"queues": self.queues})
 
     async def reset(self) -> None:
         """Reset service state."""
-        self.queues.clear()
-        self.messages.clear()
+        self._apply_reset()
+        self.state_engine.record(self.service_name, "reset", {})
+        self._emit("service.reset", {})
+
+    def apply(self, action: str, params: Dict[str, Any]) -> None:
+        """Reapply a journaled mutation."""
+        handler = getattr(self, f"_apply_{action}", None)
+        if handler is None:
+            raise ValueError(f"Unknown SQS journal action: {action}")
+        handler(**params)
+
+    def _apply_reset(self) -> None:
+        for key in self.state_engine.state_keys(MESSAGES_PAGE_PREFIX):
+            self.state_engine.delete_state(key)
+        self.state_engine.delete_state(QUEUES_PAGE)
+        for queue_name in list(self._waiters):
+            self._wake_all(queue_name)
 
+    def _on_restore(self) -> None:
+        # Let long pollers re-check queues whose contents were replaced.
+        for queue_name in list(self._waiters):
+            self._wake_all(queue_name)
+
+    def _new_queue(self, attributes: Dict[str, str]) -> MessageQueue:
+        visibility_timeout = _parse_visibility_timeout(
+            attributes.get("VisibilityTimeout", DEFAULT_VISIBILITY_TIMEOUT)
+        )
+        return MessageQueue(visibility_timeout)
+
+    @hooked
     async def create_queue(self, queue_name: str, attributes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Create a new queue."""
-        if queue_name in self.queues:
-            raise ValueError(f"Queue already exists: {queue_name}")
-
-        queue_url = f"http://localhost:4566/queue/{queue_name}"
-        self.queues[queue_name] = {
-            "name": queue_name,
-            "url": queue_url,
-            "attributes": attributes or {},
-            "created_at": datetime.utcnow().isoformat(),
-        }
-        self.messages[queue_name] = []
-        return self.queues[queue_name]
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            if queue_name in self.queues:
+                raise ValueError(f"Queue already exists: {queue_name}")
 
+            queue_url = f"http://localhost:4566/queue/{queue_name}"
+            # Validate attributes before anything is stored.
+            self._new_queue(attributes or {})
+            queue = {
+                "name": queue_name,
+                "url": queue_url,
+                "attributes": attributes or {},
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            self._apply_create_queue(queue)
+            self.state_engine.record(self.service_name, "create_queue", {"queue": queue})
+            self._emit("queue.created", {"queue": queue_name})
+        return queue
+
+    def _apply_create_queue(self, queue: Dict[str, Any]) -> None:
+        self.state_engine.mutable_state(QUEUES_PAGE, dict)[queue["name"]] = queue
+        self.state_engine.set_state(
+            MESSAGES_PAGE_PREFIX + queue["name"], self._new_queue(queue["attributes"])
+        )
+
+    @hooked
     async def delete_queue(self, queue_name: str) -> None:
         """Delete a queue."""
-        if queue_name not in self.queues:
-            raise ValueError(f"Queue not found: {queue_name}")
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            if queue_name not in self.queues:
+                raise ValueError(f"Queue not found: {queue_name}")
+
+            self._apply_delete_queue(queue_name)
+            self.state_engine.record(self.service_name, "delete_queue", {"queue_name": queue_name})
+            self._emit("queue.deleted", {"queue": queue_name})
 
-        del self.queues[queue_name]
-        del self.messages[queue_name]
+    def _apply_delete_queue(self, queue_name: str) -> None:
+        del self.state_engine.mutable_state(QUEUES_PAGE)[queue_name]
+        self.state_engine.delete_state(MESSAGES_PAGE_PREFIX + queue_name)
+        self._wake_all(queue_name)
 
+    @hooked
     async def list_queues(self) -> list[str]:
         """List all queue URLs."""
         return [q["url"] for q in self.queues.values()]
 
+    @hooked
     async def send_message(
         self, queue_name: str, message_body: str, attributes: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """Send a message to a queue."""
-        if queue_name not in self.queues:
-            raise ValueError(f"Queue not found: {queue_name}")
-
-        message = Message(message_body, attributes)
-        self.messages[queue_name].append(message)
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            message = Message(message_body, attributes)
+            self._push(queue_name, queue, message)
 
         return {
             "message_id": message.id,
             "md5_of_body": "mock_md5",
         }
 
+    @hooked
     async def receive_messages(
-        self, queue_name: str, max_messages: int = 1, wait_time: int = 0
+        self,
+        queue_name: str,
+        max_messages: int = 1,
+        wait_time: float = 0,
+        visibility_timeout: Optional[int] = None,
     ) -> list[Dict[str, Any]]:
-        """Receive messages from a queue."""
+        """Receive messages from a queue.
+
+        With a positive ``wait_time`` (capped at 20 seconds) the call long-polls:
+        it suspends until a message is sent or becomes visible again, or until
+        the wait time elapses, and then returns whatever is available.
+        """
         if queue_name not in self.queues:
             raise ValueError(f"Queue not found: {queue_name}")
 
-        messages = self.messages[queue_name][:max_messages]
+        if not 1 <= max_messages <= self.max_batch_entries:
+            raise ValueError(f"Max messages out of range: {max_messages}")
+        if not 0 <= wait_time <= MAX_WAIT_TIME:
+            raise ValueError(f"Wait time out of range: {wait_time}")
+        if visibility_timeout is not None:
+            visibility_timeout = _parse_visibility_timeout(visibility_timeout)
+
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            messages = self._pop(queue_name, queue, max_messages, visibility_timeout)
+            if messages and self._waiters.get(queue_name) and queue.visible_count(self._clock()):
+                self._wake(queue_name)
+        # Long polls wait without holding the queue.
+        if not messages and wait_time > 0:
+            messages = await self._long_poll(queue_name, max_messages, wait_time, visibility_timeout)
+
         result = []
 
         for msg in messages:
-            msg.receive_count += 1
             result.append(
                 {
                     "message_id": msg.id,
@@ -109,21 +460,315 @@ class MockSQSService:
 
         return result
 
+    @hooked
+    async def send_message_batch(
+        self, queue_name: str, entries: List[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Send up to ``max_batch_entries`` messages in one call.
+
+        Each entry carries an ``id``, a ``message_body`` and optional
+        ``attributes``. Malformed entries are reported in ``failed`` without
+        affecting the rest of the batch.
+        """
+        successful: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            self._check_batch(entries)
+
+            for entry in entries:
+                body = entry.get("message_body")
+                attributes = entry.get("attributes")
+                if not isinstance(body, str) or not body:
+                    failed.append(_batch_failure(entry["id"], "MissingParameter", "Message body is required"))
+                elif len(body) > MAX_MESSAGE_SIZE:
+                    failed.append(_batch_failure(entry["id"], "InvalidParameterValue", "Message body too long"))
+                elif attributes is not None and not isinstance(attributes, dict):
+                    failed.append(_batch_failure(entry["id"], "InvalidParameterValue", "Invalid attributes"))
+                else:
+                    message = Message(body, attributes)
+                    self._push(queue_name, queue, message)
+                    successful.append(
+                        {"id": entry["id"], "message_id": message.id, "md5_of_body": "mock_md5"}
+                    )
+        return {"successful": successful, "failed": failed}
+
+    @hooked
+    async def send_messages(self, queue_name: str, bodies: List[str]) -> List[str]:
+        """Enqueue messages from an in-process producer under one queue lock.
+
+        Unlike :meth:`send_message_batch` there is no entry limit and the
+        bodies are not validated. Returns the new message ids in order.
+        """
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            message_ids = []
+            for body in bodies:
+                message = Message(body)
+                self._push(queue_name, queue, message)
+                message_ids.append(message.id)
+        return message_ids
+
+    @hooked
+    async def delete_message_batch(
+        self, queue_name: str, entries: List[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Delete up to ``max_batch_entries`` messages by receipt handle."""
+        successful: List[Dict[str, Any]] = []
+        failed: List[Dict[str, Any]] = []
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            self._check_batch(entries)
+
+            for entry in entries:
+                receipt_handle = entry.get("receipt_handle")
+                if isinstance(receipt_handle, str) and self._delete(queue_name, queue, receipt_handle):
+                    successful.append({"id": entry["id"]})
+                else:
+                    failed.append(
+                        _batch_failure(entry["id"], "ReceiptHandleIsInvalid", "Receipt handle is not in flight")
+                    )
+        return {"successful": successful, "failed": failed}
+
+    def _check_batch(self, entries: List[Dict[str, Any]]) -> None:
+        """Validate batch-level constraints shared by all batch operations."""
+        if not entries:
+            raise ValueError("Batch request contains no entries")
+        if len(entries) > self.max_batch_entries:
+            raise ValueError(
+                f"Too many entries in batch request: {len(entries)} > {self.max_batch_entries}"
+            )
+        seen = set()
+        for entry in entries:
+            entry_id = entry.get("id") if isinstance(entry, dict) else None
+            if not isinstance(entry_id, str) or not _BATCH_ENTRY_ID.match(entry_id):
+                raise ValueError(f"Invalid batch entry id: {entry_id}")
+            if entry_id in seen:
+                raise ValueError(f"Batch entry ids not distinct: {entry_id}")
+            seen.add(entry_id)
+
+    async def _long_poll(
+        self,
+        queue_name: str,
+        max_messages: int,
+        wait_time: float,
+        visibility_timeout: Optional[int],
+    ) -> List[Message]:
+        """Wait for messages on a queue, serving waiters in arrival order."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait_time
+        waiters = self._waiters.setdefault(queue_name, deque())
+        requeue_at_front = False
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+
+            # Also wake up when an in-flight message becomes visible again.
+            next_visible = self._queue(queue_name).next_deadline()
+            if next_visible is not None:
+                remaining = min(remaining, max(next_visible - self._clock(), 0.0))
+
+            waiter: "asyncio.Future[bool]" = loop.create_future()
+            if requeue_at_front:
+                waiters.appendleft(waiter)
+            else:
+                waiters.append(waiter)
+            timer = loop.call_later(remaining, _expire_waiter, waiter)
+            try:
+                woken = await waiter
+            except asyncio.CancelledError:
+                # Hand a wakeup we already consumed on to the next waiter.
+                if waiter.done() and not waiter.cancelled() and waiter.result():
+                    self._wake(queue_name)
+                raise
+            finally:
+                timer.cancel()
+
+            if not woken and waiter in waiters:
+                waiters.remove(waiter)
+
+            async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+                queue = self._mutable_queue(queue_name)
+                messages = self._pop(queue_name, queue, max_messages, visibility_timeout)
+                if messages and waiters and queue.visible_count(self._clock()):
+                    self._wake(queue_name)
+            if messages:
+                return messages
+            # Another receiver got there first; keep our place in line.
+            requeue_at_front = woken
+
+    def _wake(self, queue_name: str) -> None:
+        """Wake the longest-waiting receiver on a queue."""
+        waiters = self._waiters.get(queue_name)
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+
+    def _wake_all(self, queue_name: str) -> None:
+        """Wake every receiver waiting on a queue."""
+        for waiter in self._waiters.pop(queue_name, ()):
+            if not waiter.done():
+                waiter.set_result(True)
+
+    @hooked
     async def delete_message(self, queue_name: str, receipt_handle: str) -> None:
         """Delete a message from a queue."""
-        if queue_name not in self.queues:
-            raise ValueError(f"Queue not found: {queue_name}")
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            self._delete(queue_name, self._mutable_queue(queue_name), receipt_handle)
 
-        self.messages[queue_name] = [
-            m for m in self.messages[queue_name] if m.receipt_handle != receipt_handle
-        ]
+    @hooked
+    async def change_message_visibility(
+        self, queue_name: str, receipt_handle: str, visibility_timeout: int
+    ) -> None:
+        """Change the visibility timeout of an in-flight message."""
+        timeout = _parse_visibility_timeout(visibility_timeout)
+        async with self.state_engine.mutation(MESSAGES_PAGE_PREFIX + queue_name):
+            queue = self._mutable_queue(queue_name)
+            if not queue.change_visibility(receipt_handle, timeout, self._clock()):
+                raise ValueError(f"Message not in flight: {receipt_handle}")
+            self.state_engine.record(
+                self.service_name,
+                "change_message_visibility",
+                {
+                    "queue_name": queue_name,
+                    "receipt_handle": receipt_handle,
+                    "visibility_timeout": timeout,
+                    "at": self._wall_clock(),
+                },
+            )
+            self._emit(
+                "message.visibility_changed",
+                {"queue": queue_name, "receipt_handle": receipt_handle, "visibility_timeout": timeout},
+            )
+
+    def _apply_change_message_visibility(
+        self, queue_name: str, receipt_handle: str, visibility_timeout: int, at: float
+    ) -> None:
+        queue = self._mutable_queue(queue_name)
+        queue.change_visibility(receipt_handle, visibility_timeout, self._rebase(at))
+
+    def _rebase(self, at: float) -> float:
+        """Reading of the monotonic clock at the journaled wall-clock time ``at``."""
+        return self._clock() - (self._wall_clock() - at)
+
+    def _emit(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Publish an event for a mutation, if the service has an event bus."""
+        if self.event_bus is not None:
+            self.event_bus.emit(Event(event_type, self.service_name, data, namespace=self.namespace))
+
+    def _push(self, queue_name: str, queue: MessageQueue, message: Message) -> None:
+        """Enqueue a new message, journal it and wake a receiver."""
+        queue.push(message)
+        self.state_engine.record(
+            self.service_name,
+            "send_message",
+            {
+                "queue_name": queue_name,
+                "message_id": message.id,
+                "body": message.body,
+                "attributes": message.attributes,
+                "sent_timestamp": message.sent_timestamp,
+            },
+        )
+        self._emit("message.sent", {"queue": queue_name, "message_id": message.id})
+        self._wake(queue_name)
+
+    def _apply_send_message(
+        self,
+        queue_name: str,
+        message_id: str,
+        body: str,
+        attributes: Dict[str, str],
+        sent_timestamp: str,
+    ) -> None:
+        message = Message(body, attributes)
+        message.id = message_id
+        message.sent_timestamp = sent_timestamp
+        self._mutable_queue(queue_name).push(message)
+        self._wake(queue_name)
+
+    def _pop(
+        self,
+        queue_name: str,
+        queue: MessageQueue,
+        max_messages: int,
+        visibility_timeout: Optional[int],
+    ) -> List[Message]:
+        """Receive messages and journal the receive if it returned any."""
+        messages = queue.pop(max_messages, self._clock(), visibility_timeout)
+        if messages:
+            self.state_engine.record(
+                self.service_name,
+                "receive_messages",
+                {
+                    "queue_name": queue_name,
+                    "visibility_timeout": visibility_timeout,
+                    "at": self._wall_clock(),
+                    "receipt_handles": [m.receipt_handle for m in messages],
+                },
+            )
+            self._emit(
+                "message.received", {"queue": queue_name, "message_ids": [m.id for m in messages]}
+            )
+        return messages
+
+    def _apply_receive_messages(
+        self,
+        queue_name: str,
+        visibility_timeout: Optional[int],
+        at: float,
+        receipt_handles: List[str],
+    ) -> None:
+        queue = self._mutable_queue(queue_name)
+        queue.pop(len(receipt_handles), self._rebase(at), visibility_timeout, receipt_handles)
+
+    def _delete(self, queue_name: str, queue: MessageQueue, receipt_handle: str) -> bool:
+        """Delete an in-flight message and journal it if it was deleted."""
+        if not queue.delete(receipt_handle):
+            return False
+        self.state_engine.record(
+            self.service_name,
+            "delete_message",
+            {"queue_name": queue_name, "receipt_handle": receipt_handle},
+        )
+        self._emit("message.deleted", {"queue": queue_name, "receipt_handle": receipt_handle})
+        return True
+
+    def _apply_delete_message(self, queue_name: str, receipt_handle: str) -> None:
+        self._mutable_queue(queue_name).delete(receipt_handle)
 
+    @hooked
     async def get_queue_attributes(self, queue_name: str) -> Dict[str, Any]:
         """Get queue attributes."""
-        if queue_name not in self.queues:
-            raise ValueError(f"Queue not found: {queue_name}")
-
+        queue = self._queue(queue_name)
+        now = self._clock()
         return {
-            "ApproximateNumberOfMessages": len(self.messages[queue_name]),
+            "ApproximateNumberOfMessages": queue.visible_count(now),
+            "ApproximateNumberOfMessagesNotVisible": queue.in_flight_count(now),
+            "VisibilityTimeout": queue.visibility_timeout,
             "CreatedTimestamp": self.queues[queue_name]["created_at"],
         }
+
+
+def _batch_failure(entry_id: str, code: str, message: str) -> Dict[str, Any]:
+    return {"id": entry_id, "code": code, "message": message, "sender_fault": True}
+
+
+def _expire_waiter(waiter: "asyncio.Future[bool]") -> None:
+    if not waiter.done():
+        waiter.set_result(False)
+
+
+def _parse_visibility_timeout(value: Any) -> int:
+    """Validate a visibility timeout given in seconds."""
+    try:
+        timeout = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid visibility timeout: {value}") from None
+    if not 0 <= timeout <= MAX_VISIBILITY_TIMEOUT:
+        raise ValueError(f"Visibility timeout out of range: {timeout}")
+    return timeout
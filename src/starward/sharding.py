@@ -0,0 +1,562 @@
+"""Sharded mode: worker processes each own a hash partition of buckets and queues."""
+
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode
+import asyncio
+import json
+import multiprocessing
+import tempfile
+import time
+import uuid
+import xml.etree.ElementTree as ElementTree
+import zlib
+
+import httpx
+import uvicorn
+from starlette.types import Message, Receive, Scope, Send
+
+from starward.aws.gateway import is_aws_request
+from starward.aws.s3 import XML_MEDIA_TYPE, S3Error, error_response
+from starward.aws.sqs import JSON_MEDIA_TYPE
+from starward.aws.xml import S3_NAMESPACE, XmlWriter, timestamp
+from starward.core.state_engine import new_snapshot_id
+
+# Request headers the router must not pass on verbatim.
+_HOP_HEADERS = {b"host", b"content-length", b"transfer-encoding", b"connection"}
+# Headers describing a CopyObject, dropped when it becomes a GET and a PUT.
+_COPY_HEADERS = (b"x-amz-copy-source", b"x-amz-metadata-directive", b"x-amz-content-sha256")
+_RESPONSE_HOP_HEADERS = {"transfer-encoding", "connection"}
+
+# Listing endpoints answered by merging every shard's list.
+_FAN_OUT = {("GET", "/s3/buckets"): "buckets", ("GET", "/sqs/queues"): "queues"}
+
+# Requests whose JSON body names the bucket or queue.
+_BODY_KEYS = {
+    ("POST", "/s3/buckets"): ("s3", "bucket_name"),
+    ("POST", "/s3/objects"): ("s3", "bucket_name"),
+    ("POST", "/sqs/queues"): ("sqs", "queue_name"),
+    ("POST", "/sqs/messages"): ("sqs", "queue_name"),
+    ("POST", "/sqs/messages/batch"): ("sqs", "queue_name"),
+    ("POST", "/sqs/messages/delete-batch"): ("sqs", "queue_name"),
+}
+
+READY_TIMEOUT = 30.0
+
+# A bucket and the queues it notifies may be owned by different workers.
+NOTIFICATIONS_UNSUPPORTED = "Bucket notifications are not supported with more than one worker"
+# Each shard numbers its events separately, so there is no single cursor to resume from.
+EVENTS_UNSUPPORTED = "Event routes are not supported with more than one worker"
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Shard owning ``key``; stable across processes and runs."""
+    return zlib.crc32(key.encode()) % shards
+
+
+def _route_path(path: str) -> str:
+    """Path with any ``/ns/<name>`` namespace prefix removed."""
+    if path.startswith("/ns/"):
+        return "/" + path[len("/ns/") :].partition("/")[2]
+    return path
+
+
+def _is_coordinated(method: str, path: str) -> bool:
+    """Whether a request changes or reads state on every shard at once."""
+    if path.startswith("/namespaces") or path == "/state/restore":
+        return method != "GET"
+    if path == "/snapshots" or path.startswith("/snapshots/"):
+        return method in ("POST", "DELETE")
+    return False
+
+
+class ShardRouter:
+    """ASGI app forwarding each request to the shard owning its bucket or queue.
+
+    Every bucket and queue lives on exactly one shard, chosen by a stable
+    hash of its name, so all operations on it are serialized by one
+    worker. Listings are merged from all shards. Snapshot, restore, fork
+    and namespace operations are broadcast to every shard behind a
+    barrier: new requests wait while the broadcast runs, so the shards'
+    snapshots form a consistent cut - a request is in them only if every
+    request that completed before it was sent is too. Bucket notification
+    configurations and the event routes are rejected with 501; WebSocket
+    connections, which only the event stream accepts, are closed.
+    """
+
+    def __init__(self, clients: List[httpx.AsyncClient]) -> None:
+        if not clients:
+            raise ValueError("At least one shard is required")
+        self.clients = clients
+        self._open = asyncio.Event()
+        self._open.set()
+        self._coordination = asyncio.Lock()
+
+    @classmethod
+    def for_sockets(cls, sockets: List[str]) -> "ShardRouter":
+        """Router for workers listening on Unix domain sockets."""
+        return cls(
+            [
+                httpx.AsyncClient(
+                    transport=httpx.AsyncHTTPTransport(uds=path),
+                    base_url="http://shard",
+                    timeout=None,
+                )
+                for path in sockets
+            ]
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "websocket":
+            await receive()
+            await send({"type": "websocket.close", "code": 1008, "reason": EVENTS_UNSUPPORTED})
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        method: str = scope["method"]
+        path = _route_path(scope["path"])
+        aws = is_aws_request(scope)
+        if path in ("/health", "/") and not aws:
+            # Answered by a worker, but without waiting on a barrier.
+            await self._forward(self.clients[0], scope, receive, send)
+            return
+        if (path == "/events" or path.startswith("/events/")) and not aws:
+            await _send_json(send, 501, {"detail": EVENTS_UNSUPPORTED})
+            return
+        if method == "PUT" and _configures_notifications(path, scope, aws):
+            if aws:
+                error = S3Error(501, "NotImplemented", NOTIFICATIONS_UNSUPPORTED)
+                await error_response(error, scope["path"])(scope, receive, send)
+            else:
+                await _send_json(send, 501, {"detail": NOTIFICATIONS_UNSUPPORTED})
+            return
+
+        if not aws and _is_coordinated(method, path):
+            await self._coordinated(scope, receive, send)
+            return
+        if not self._open.is_set():
+            await self._open.wait()
+
+        if aws:
+            await self._aws(scope, receive, send)
+            return
+
+        if (method, path) in _FAN_OUT or (method == "GET" and path == "/namespaces"):
+            await self._fan_out(scope, await _read_body(receive), send)
+            return
+        if method == "GET" and path.startswith("/snapshots/"):
+            await self._snapshot_status(scope, send)
+            return
+
+        body: Optional[bytes] = None
+        key = self._path_key(path, scope)
+        if key is None and (method, path) in _BODY_KEYS:
+            body = await _read_body(receive)
+            service, field = _BODY_KEYS[(method, path)]
+            try:
+                key = f"{service}:{json.loads(body)[field]}"
+            except (ValueError, KeyError, TypeError):
+                key = None  # let the shard report the malformed request
+        shard = shard_of(key, len(self.clients)) if key is not None else 0
+        await self._forward(self.clients[shard], scope, receive, send, body)
+
+    async def aclose(self) -> None:
+        """Close connections to the workers."""
+        for client in self.clients:
+            await client.aclose()
+
+    async def wait_ready(self, timeout: float = READY_TIMEOUT) -> None:
+        """Wait until every worker answers its health check."""
+        deadline = time.monotonic() + timeout
+        for client in self.clients:
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Shard workers did not start in time")
+                await asyncio.sleep(0.05)
+
+    @staticmethod
+    def _path_key(path: str, scope: Scope) -> Optional[str]:
+        if path.startswith("/s3/buckets/"):
+            return "s3:" + path[len("/s3/buckets/") :].partition("/")[0]
+        if path == "/sqs/messages" and scope["method"] == "GET":
+            names = parse_qs(scope["query_string"].decode()).get("queue_name")
+            return f"sqs:{names[0]}" if names else None
+        return None
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.wait_ready()
+                except RuntimeError as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _forward(
+        self,
+        client: httpx.AsyncClient,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        body: Optional[bytes] = None,
+    ) -> None:
+        if body is None and _has_body(scope):
+            content: Any = _stream_body(receive)
+        else:
+            content = body
+        request = client.build_request(
+            scope["method"], _target(scope), headers=_headers(scope), content=content
+        )
+        response = await client.send(request, stream=True)
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name, value)
+                        for name, value in response.headers.raw
+                        if name.decode("latin-1").lower() not in _RESPONSE_HOP_HEADERS
+                    ],
+                }
+            )
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def _broadcast(self, scope: Scope, body: bytes) -> List[httpx.Response]:
+        return list(
+            await asyncio.gather(
+                *(
+                    client.request(
+                        scope["method"], _target(scope), headers=_headers(scope), content=body
+                    )
+                    for client in self.clients
+                )
+            )
+        )
+
+    async def _coordinated(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Broadcast a request to every shard while new requests are held back."""
+        body = await _read_body(receive)
+        if _route_path(scope["path"]) == "/state/restore" and b"seq=" in scope["query_string"]:
+            detail = "Journal positions differ between shards; restore by timestamp"
+            await _send_json(send, 400, {"detail": detail})
+            return
+        scope = _with_shared_ids(scope)
+        async with self._coordination:
+            self._open.clear()
+            try:
+                responses = await self._broadcast(scope, body)
+            finally:
+                self._open.set()
+        failed = [r for r in responses if r.status_code >= 400]
+        if not failed and _route_path(scope["path"]) == "/snapshots/gc":
+            counts = [r.json() for r in responses]
+            totals = {field: sum(c[field] for c in counts) for field in counts[0]}
+            await _send_json(send, 200, totals)
+            return
+        response = failed[0] if failed else responses[0]
+        await _send_json(send, response.status_code, response.json())
+
+    async def _fan_out(self, scope: Scope, body: bytes, send: Send) -> None:
+        """Merge the lists returned by every shard."""
+        responses = await self._broadcast(scope, body)
+        for response in responses:
+            if response.status_code >= 400:
+                await _send_json(send, response.status_code, response.json())
+                return
+        field = _FAN_OUT.get((scope["method"], _route_path(scope["path"])), "namespaces")
+        merged: Dict[str, Any] = {}
+        for response in responses:
+            for item in response.json()[field]:
+                name = item["name"] if isinstance(item, dict) else item
+                merged.setdefault(name, item)
+        await _send_json(send, 200, {field: [merged[name] for name in sorted(merged)]})
+
+    async def _aws(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Route an AWS SDK request by the bucket in its path or the queue in its body."""
+        body: Optional[bytes] = None
+        key: Optional[str] = None
+        if any(name == b"x-amz-target" for name, _ in scope["headers"]):
+            body = await _read_body(receive)
+            try:
+                params = json.loads(body)
+            except ValueError:
+                params = None
+            if isinstance(params, dict):
+                if dict(scope["headers"]).get(b"x-amz-target") == b"AmazonSQS.ListQueues":
+                    await self._fan_out_queue_urls(scope, body, send)
+                    return
+                name = params.get("QueueName") or str(params.get("QueueUrl") or "")
+                name = name.rstrip("/").rsplit("/", 1)[-1]
+                key = f"sqs:{name}" if name else None
+        else:
+            bucket = _route_path(scope["path"]).lstrip("/").partition("/")[0]
+            if not bucket and scope["method"] == "GET":
+                await self._fan_out_buckets(scope, send)
+                return
+            key = f"s3:{bucket}" if bucket else None
+            source = _copy_source(scope)
+            if key is not None and source is not None:
+                source_shard = shard_of(f"s3:{source[0]}", len(self.clients))
+                shard = shard_of(key, len(self.clients))
+                if source_shard != shard:
+                    await _read_body(receive)
+                    await self._copy_across_shards(scope, send, source, source_shard, shard)
+                    return
+        shard = shard_of(key, len(self.clients)) if key is not None else 0
+        await self._forward(self.clients[shard], scope, receive, send, body)
+
+    async def _copy_across_shards(
+        self, scope: Scope, send: Send, source: Tuple[str, str], source_shard: int, shard: int
+    ) -> None:
+        """CopyObject between buckets on different shards: GET the source, PUT the copy."""
+        # Keep any /ns/<name> prefix, so both requests reach the same namespace.
+        prefix = scope["path"][: len(scope["path"]) - len(_route_path(scope["path"]))]
+        headers = [
+            (name, value) for name, value in _headers(scope) if not name.startswith(_COPY_HEADERS)
+        ]
+        source_client, target_client = self.clients[source_shard], self.clients[shard]
+
+        source_path = f"{prefix}/{quote(source[0])}/{quote(source[1])}"
+        request = source_client.build_request("GET", source_path, headers=headers)
+        response = await source_client.send(request, stream=True)
+        try:
+            if response.status_code >= 400:
+                await _send(send, response.status_code, await response.aread(), XML_MEDIA_TYPE)
+                return
+            put_headers = headers + [
+                (name.encode(), value.encode())
+                for name, value in response.headers.items()
+                if name == "content-type" or name.startswith("x-amz-meta-")
+            ]
+            stored = await target_client.put(
+                _target(scope), headers=put_headers, content=response.aiter_raw()
+            )
+        finally:
+            await response.aclose()
+        if stored.status_code >= 400:
+            await _send(send, stored.status_code, stored.content, XML_MEDIA_TYPE)
+            return
+
+        head = await target_client.head(_target(scope), headers=headers)
+        modified = parsedate_to_datetime(head.headers["last-modified"]).replace(tzinfo=None)
+        xml = XmlWriter("CopyObjectResult")
+        xml.element("LastModified", timestamp(modified.isoformat()))
+        xml.element("ETag", stored.headers["etag"])
+        await _send(send, 200, xml.finish("CopyObjectResult"), XML_MEDIA_TYPE)
+
+    async def _fan_out_buckets(self, scope: Scope, send: Send) -> None:
+        """Merge S3 ListBuckets results from every shard."""
+        responses = await self._broadcast(scope, b"")
+        buckets: Dict[str, str] = {}
+        for response in responses:
+            if response.status_code >= 400:
+                await _send(send, response.status_code, response.content, XML_MEDIA_TYPE)
+                return
+            root = ElementTree.fromstring(response.content)
+            for bucket in root.iter(f"{{{S3_NAMESPACE}}}Bucket"):
+                name = bucket.findtext(f"{{{S3_NAMESPACE}}}Name") or ""
+                buckets[name] = bucket.findtext(f"{{{S3_NAMESPACE}}}CreationDate") or ""
+        xml = XmlWriter("ListAllMyBucketsResult")
+        xml.start("Owner")
+        xml.element("ID", "starward")
+        xml.element("DisplayName", "starward")
+        xml.end("Owner")
+        xml.start("Buckets")
+        for name in sorted(buckets):
+            xml.start("Bucket")
+            xml.element("Name", name)
+            xml.element("CreationDate", buckets[name])
+            xml.end("Bucket")
+        xml.end("Buckets")
+        await _send(send, 200, xml.finish("ListAllMyBucketsResult"), XML_MEDIA_TYPE)
+
+    async def _fan_out_queue_urls(self, scope: Scope, body: bytes, send: Send) -> None:
+        """Merge SQS ListQueues results from every shard."""
+        responses = await self._broadcast(scope, body)
+        urls: List[str] = []
+        for response in responses:
+            if response.status_code >= 400:
+                await _send(send, response.status_code, response.content, JSON_MEDIA_TYPE)
+                return
+            urls += response.json().get("QueueUrls", [])
+        payload = json.dumps({"QueueUrls": sorted(urls)}).encode()
+        await _send(send, 200, payload, JSON_MEDIA_TYPE)
+
+    async def _snapshot_status(self, scope: Scope, send: Send) -> None:
+        """A sharded snapshot is only as complete as its least complete shard."""
+        responses = await self._broadcast(scope, b"")
+        ranks = {"failed": 0, "pending": 1, "memory": 2, "persisted": 3}
+        for response in responses:
+            if response.status_code >= 400:
+                await _send_json(send, response.status_code, response.json())
+                return
+        bodies = [response.json() for response in responses]
+        await _send_json(send, 200, min(bodies, key=lambda b: ranks.get(b.get("status"), 0)))
+
+
+def _configures_notifications(path: str, scope: Scope, aws: bool) -> bool:
+    """Whether a PUT sets a bucket's notification configuration."""
+    if aws:
+        bucket, _, key = path.lstrip("/").partition("/")
+        query = parse_qs(scope["query_string"].decode(), keep_blank_values=True)
+        return bool(bucket) and not key and "notification" in query
+    if not path.startswith("/s3/buckets/"):
+        return False
+    return path[len("/s3/buckets/") :].partition("/")[2] == "notification"
+
+
+def _copy_source(scope: Scope) -> Optional[Tuple[str, str]]:
+    """Source bucket and key of an S3 CopyObject request, if it is a valid one."""
+    header = dict(scope["headers"]).get(b"x-amz-copy-source")
+    if scope["method"] != "PUT" or header is None:
+        return None
+    bucket, _, key = unquote(header.decode()).lstrip("/").partition("/")
+    key = key.partition("?versionId=")[0]
+    # Invalid sources are reported by the destination shard.
+    return (bucket, key) if bucket and key else None
+
+
+def _with_shared_ids(scope: Scope) -> Scope:
+    """Pick generated names once, so every shard uses the same one."""
+    path = _route_path(scope["path"])
+    query = parse_qs(scope["query_string"].decode(), keep_blank_values=True)
+    if scope["method"] == "POST" and path == "/snapshots" and not query.get("snapshot_id"):
+        query["snapshot_id"] = [new_snapshot_id()]
+    elif scope["method"] == "POST" and path.endswith("/fork") and not query.get("namespace"):
+        query["namespace"] = [f"fork-{uuid.uuid4().hex[:12]}"]
+    else:
+        return scope
+    return {**scope, "query_string": urlencode(query, doseq=True).encode()}
+
+
+def _target(scope: Scope) -> str:
+    query = scope["query_string"].decode()
+    return scope["path"] + (f"?{query}" if query else "")
+
+
+def _headers(scope: Scope) -> List[Tuple[bytes, bytes]]:
+    return [(name, value) for name, value in scope["headers"] if name not in _HOP_HEADERS]
+
+
+def _has_body(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"transfer-encoding" or (name == b"content-length" and value != b"0"):
+            return True
+    return False
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message: Message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _stream_body(receive: Receive) -> AsyncIterator[bytes]:
+    while True:
+        message = await receive()
+        body = message.get("body", b"")
+        if body:
+            yield body
+        if not message.get("more_body"):
+            return
+
+
+async def _send_json(send: Send, status: int, payload: Any) -> None:
+    await _send(send, status, json.dumps(payload).encode(), "application/json")
+
+
+async def _send(send: Send, status: int, body: bytes, content_type: str) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _run_worker(shard: int, socket_path: str, options: Dict[str, Any]) -> None:
+    """Worker process entry point: serve one shard on a Unix socket."""
+    from starward.server import StarwardServer
+
+    journal = options.get("journal_path")
+    server = StarwardServer(
+        snapshot_dir=str(Path(options["snapshot_dir"]) / f"shard-{shard}"),
+        namespace_dir=str(Path(options["namespace_dir"]) / f"shard-{shard}"),
+        journal_path=f"{journal}.shard-{shard}" if journal else None,
+        namespace_idle_timeout=options["namespace_idle_timeout"],
+        fast_path=options["fast_path"],
+    )
+    uvicorn.run(server.app, uds=socket_path, log_level="warning")
+
+
+def run_sharded(
+    host: str,
+    port: int,
+    workers: int,
+    snapshot_dir: str = "snapshots",
+    namespace_dir: str = "namespaces",
+    journal_path: Optional[str] = None,
+    namespace_idle_timeout: float = 600.0,
+    fast_path: bool = False,
+) -> None:
+    """Start ``workers`` shard processes and serve the router on ``host:port``.
+
+    Each shard keeps its snapshots, namespaces and journal under a
+    ``shard-<n>`` suffix of the given locations. Bucket notifications are
+    not supported: a bucket's shard may not own the queues it notifies.
+    Neither are the ``/events`` routes, whose cursors are per shard.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    options = {
+        "snapshot_dir": snapshot_dir,
+        "namespace_dir": namespace_dir,
+        "journal_path": journal_path,
+        "namespace_idle_timeout": namespace_idle_timeout,
+        "fast_path": fast_path,
+    }
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="starward-shards-") as socket_dir:
+        sockets = [str(Path(socket_dir) / f"shard-{n}.sock") for n in range(workers)]
+        processes = [
+            context.Process(target=_run_worker, args=(n, sockets[n], options), daemon=True)
+            for n in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            uvicorn.run(ShardRouter.for_sockets(sockets), host=host, port=port, log_level="info")
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
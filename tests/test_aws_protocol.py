@@ -0,0 +1,138 @@
+"""Tests for the S3 REST and SQS JSON wire protocols."""
+
+import json
+import pytest
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+
+from starward.aws.xml import S3_NAMESPACE, XmlWriter
+from starward.server import StarwardServer
+
+# Any SigV4 header marks a request as coming from an AWS SDK.
+SIGNED = {"Authorization": "AWS4-HMAC-SHA256 Credential=test/20240101/us-east-1/s3/aws4_request"}
+NS = f"{{{S3_NAMESPACE}}}"
+
+
+def sqs(client: TestClient, action: str, params: Dict[str, Any]) -> Any:
+    return client.post(
+        "/",
+        content=json.dumps(params),
+        headers={
+            **SIGNED,
+            "X-Amz-Target": f"AmazonSQS.{action}",
+            "Content-Type": "application/x-amz-json-1.0",
+        },
+    )
+
+
+@pytest.mark.unit
+def test_xml_writer_escapes_and_drains() -> None:
+    """Test that text is escaped and drained output concatenates to the document."""
+    xml = XmlWriter("Root")
+    xml.element("Key", "a<b & c>")
+    first = xml.drain()
+    xml.element("Key", "plain")
+    document = first + xml.finish("Root")
+    root = ElementTree.fromstring(document)
+    assert [node.text for node in root] == ["a<b & c>", "plain"]
+
+
+@pytest.mark.integration
+def test_s3_rest_protocol(tmp_path: Path) -> None:
+    """Test path-style S3 requests with raw bodies and XML responses."""
+    server = StarwardServer(snapshot_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        assert client.put("/snapshots", headers=SIGNED).status_code == 200
+        client.put("/snapshots/dir/a.txt", content=b"hello", headers={
+            **SIGNED, "Content-Type": "text/plain", "x-amz-meta-owner": "me",
+        })
+        # aws-chunked framing with a trailing checksum, as sent by current SDKs.
+        framed = b"3;chunk-signature=x\r\nabc\r\n2\r\nde\r\n0\r\nx-amz-checksum-crc32:AAAA\r\n\r\n"
+        response = client.put("/snapshots/chunked", content=framed, headers={
+            **SIGNED, "Content-Encoding": "aws-chunked", "x-amz-decoded-content-length": "5",
+        })
+        assert response.headers["etag"] == '"ab56b4d92b40713acc5af89985d4b786"'
+
+        response = client.get("/snapshots/dir/a.txt", headers={**SIGNED, "Range": "bytes=1-3"})
+        assert response.status_code == 206
+        assert response.content == b"ell"
+        assert response.headers["content-type"] == "text/plain"
+        assert response.headers["x-amz-meta-owner"] == "me"
+        assert client.get("/snapshots/chunked", headers=SIGNED).content == b"abcde"
+
+        response = client.put(
+            "/snapshots/copy", headers={**SIGNED, "x-amz-copy-source": "/snapshots/dir%2Fa.txt"}
+        )
+        assert ElementTree.fromstring(response.content).tag == f"{NS}CopyObjectResult"
+
+        listing = ElementTree.fromstring(
+            client.get("/snapshots?list-type=2&delimiter=/", headers=SIGNED).content
+        )
+        assert [k.text for k in listing.iter(f"{NS}Key")] == ["chunked", "copy"]
+        assert [p.text for p in listing.iter(f"{NS}Prefix")][1:] == ["dir/"]
+        assert listing.findtext(f"{NS}KeyCount") == "3"
+
+        delete = b"<Delete><Object><Key>copy</Key></Object><Object><Key>chunked</Key></Object></Delete>"
+        response = client.post("/snapshots?delete", content=delete, headers=SIGNED)
+        assert len(ElementTree.fromstring(response.content)) == 2
+
+        response = client.get("/snapshots/missing", headers=SIGNED)
+        assert response.status_code == 404
+        assert ElementTree.fromstring(response.content).findtext("Code") == "NoSuchKey"
+        assert client.delete("/snapshots", headers=SIGNED).status_code == 409
+        assert client.get("/snapshots?acl", headers=SIGNED).status_code == 501
+
+        buckets = ElementTree.fromstring(client.get("/", headers=SIGNED).content)
+        assert [n.text for n in buckets.iter(f"{NS}Name")] == ["snapshots"]
+        # Unsigned requests still reach the native API.
+        assert client.get("/snapshots").json()["snapshots"] == []
+        assert client.get("/s3/buckets").json()["buckets"][0]["name"] == "snapshots"
+
+
+@pytest.mark.integration
+def test_sqs_json_protocol(tmp_path: Path) -> None:
+    """Test SQS JSON requests and error codes."""
+    server = StarwardServer(snapshot_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        url = sqs(client, "CreateQueue", {"QueueName": "jobs"}).json()["QueueUrl"]
+        assert sqs(client, "CreateQueue", {"QueueName": "jobs"}).json()["QueueUrl"] == url
+        assert sqs(client, "ListQueues", {}).json() == {"QueueUrls": [url]}
+
+        sent = sqs(client, "SendMessage", {
+            "QueueUrl": url,
+            "MessageBody": "hello",
+            "MessageAttributes": {"kind": {"DataType": "String", "StringValue": "greeting"}},
+        }).json()
+        assert sent["MD5OfMessageBody"] == "5d41402abc4b2a76b9719d911017c592"
+        batch = sqs(client, "SendMessageBatch", {
+            "QueueUrl": url, "Entries": [{"Id": "a", "MessageBody": "x"}, {"Id": "b"}],
+        }).json()
+        assert [s["Id"] for s in batch["Successful"]] == ["a"]
+        assert batch["Failed"][0]["Code"] == "MissingParameter"
+
+        received = sqs(client, "ReceiveMessage", {
+            "QueueUrl": url, "MaxNumberOfMessages": 10, "MessageAttributeNames": ["All"],
+        }).json()["Messages"]
+        assert [m["Body"] for m in received] == ["hello", "x"]
+        assert received[0]["MessageAttributes"]["kind"]["StringValue"] == "greeting"
+        deleted = sqs(client, "DeleteMessageBatch", {
+            "QueueUrl": url,
+            "Entries": [{"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]} for i, m in enumerate(received)],
+        }).json()
+        assert len(deleted["Successful"]) == 2
+        attributes = sqs(client, "GetQueueAttributes", {
+            "QueueUrl": url, "AttributeNames": ["ApproximateNumberOfMessages", "QueueArn"],
+        }).json()["Attributes"]
+        assert attributes == {
+            "ApproximateNumberOfMessages": "0",
+            "QueueArn": "arn:aws:sqs:us-east-1:000000000000:jobs",
+        }
+
+        response = sqs(client, "GetQueueUrl", {"QueueName": "missing"})
+        assert response.status_code == 400
+        assert response.json()["__type"] == "com.amazonaws.sqs#QueueDoesNotExist"
+        assert response.headers["x-amzn-query-error"].startswith("AWS.SimpleQueueService.NonExistentQueue")
+        assert sqs(client, "PurgeEverything", {}).json()["__type"].endswith("UnknownOperationException")
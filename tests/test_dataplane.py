@@ -0,0 +1,124 @@
+"""Tests for the fast-path data-plane handlers."""
+
+import pytest
+from pathlib import Path
+from typing import Any, List, Tuple
+
+from fastapi.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from starward.dataplane import DataPlane
+from starward.server import StarwardServer
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+# Values that differ between otherwise identical runs.
+_VOLATILE = {"message_id", "receipt_handle", "created_at", "last_modified", "last-modified", "date"}
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in _VOLATILE}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+
+def exercise(client: TestClient) -> List[Tuple[int, Any, Any]]:
+    """Drive the hot routes, including invalid requests, and collect the responses."""
+    responses = [
+        client.post("/s3/buckets", json={"bucket_name": "b"}),
+        client.post("/s3/objects", json={"bucket_name": "b", "key": "k", "data": "héllo"}),
+        client.post("/s3/objects", json={"bucket_name": "b", "key": "k"}),
+        client.post("/s3/objects", json={"bucket_name": "b", "key": 1, "data": "x"}),
+        client.post("/s3/objects", content=b"not json"),
+        client.post("/s3/objects", json={"bucket_name": "missing", "key": "k", "data": "x"}),
+        client.put("/s3/buckets/b/objects/dir/a.txt", content=b"abcdef", headers={
+            "Content-Type": "text/plain", "x-amz-meta-owner": "me",
+        }),
+        client.put("/s3/buckets/missing/objects/a", content=b"x"),
+        client.get("/s3/buckets/b/objects/dir/a.txt", headers={"Range": "bytes=1-2"}),
+        client.get("/s3/buckets/b/objects/dir/a.txt", headers={"Range": "bytes=10-20"}),
+        client.get("/s3/buckets/b/objects/missing"),
+        client.head("/s3/buckets/b/objects/k"),
+        client.get("/s3/buckets/b/objects"),
+        client.post("/sqs/queues", json={"queue_name": "q"}),
+        client.post("/sqs/messages", json={"queue_name": "q", "message_body": "m1", "attributes": {"a": "1"}}),
+        client.post("/sqs/messages", json={"queue_name": "q", "message_body": "m2", "attributes": {"a": 1}}),
+        client.post("/sqs/messages", json={"queue_name": "missing", "message_body": "m"}),
+        client.post("/sqs/messages/batch", json={"queue_name": "q", "entries": [{"id": "1", "message_body": "m3"}]}),
+        client.post("/sqs/messages/batch", json={"queue_name": "q", "entries": "nope"}),
+        client.get("/sqs/messages?queue_name=q&max_messages=10"),
+        client.get("/sqs/messages?queue_name=q&max_messages=ten"),
+        client.get("/sqs/messages?queue_name=q&max_messages=0"),
+        client.get("/sqs/messages"),
+    ]
+    results = []
+    for response in responses:
+        is_json = response.headers.get("content-type") == "application/json"
+        body = normalize(response.json()) if is_json else response.content
+        results.append((response.status_code, body, normalize(dict(response.headers))))
+    return results
+
+
+@pytest.mark.integration
+def test_fast_path_matches_fastapi_routes(tmp_path: Path) -> None:
+    """Test that every hot route answers exactly as the FastAPI route does."""
+    outcomes = []
+    for fast_path in (False, True):
+        server = StarwardServer(snapshot_dir=str(tmp_path / str(fast_path)), fast_path=fast_path)
+        with TestClient(server.app) as client:
+            outcomes.append(exercise(client))
+    assert outcomes[0] == outcomes[1]
+    statuses = [status for status, _, _ in outcomes[1]]
+    assert statuses == [
+        200, 200, 422, 422, 422, 400, 200, 400, 206, 416, 404, 200, 200,
+        200, 200, 422, 400, 200, 422, 200, 422, 400, 422,
+    ]
+    assert outcomes[1][8][1] == b"bc"
+
+
+@pytest.mark.integration
+def test_fast_path_serves_namespaces(tmp_path: Path) -> None:
+    """Test that fast-path requests act on the namespace selected for them."""
+    server = StarwardServer(
+        snapshot_dir=str(tmp_path), namespace_dir=str(tmp_path / "ns"), fast_path=True
+    )
+    with TestClient(server.app) as client:
+        client.post("/ns/team/sqs/queues", json={"queue_name": "q"})
+        assert client.post("/ns/team/sqs/messages", json={"queue_name": "q", "message_body": "hi"}).status_code == 200
+        assert client.post("/sqs/messages", json={"queue_name": "q", "message_body": "hi"}).status_code == 400
+        messages = client.get("/sqs/messages?queue_name=q", headers={"X-Starward-Namespace": "team"}).json()
+        assert [m["body"] for m in messages["messages"]] == ["hi"]
+
+
+@pytest.mark.unit
+async def test_fast_path_drops_requests_on_client_disconnect() -> None:
+    """Test that a client leaving mid-body gets no response rather than a 500."""
+    s3 = MockS3Service()
+    await s3.create_bucket("bucket")
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        raise AssertionError("request should not reach the app")
+
+    plane = DataPlane(app, lambda: s3, MockSQSService)
+    for path, method in (("/s3/buckets/bucket/objects/key", "PUT"), ("/s3/objects", "POST")):
+        messages: List[Message] = [
+            {"type": "http.request", "body": b"part", "more_body": True},
+            {"type": "http.disconnect"},
+        ]
+        sent: List[Message] = []
+
+        async def receive() -> Message:
+            return messages.pop(0)
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {
+            "type": "http", "method": method, "path": path, "query_string": b"",
+            "headers": [(b"content-type", b"application/json")],
+        }
+        await plane(scope, receive, send)
+        assert sent == []
+    assert await s3.list_objects("bucket") == []
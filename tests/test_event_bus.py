@@ -0,0 +1,160 @@
+"""Tests for the event bus and its bounded event log."""
+
+import asyncio
+import pytest
+from datetime import datetime
+
+from starward.core.event_bus import Event, EventBus, EventLog
+
+
+def event(type: str = "object.created", service: str = "s3", **data: str) -> Event:
+    return Event(type=type, service=service, data=data)
+
+
+@pytest.mark.unit
+def test_event_log_evicts_oldest_beyond_max_events() -> None:
+    """Test count retention, sequence numbers and index cleanup."""
+    log = EventLog(max_events=3)
+    for i in range(5):
+        log.append(event("a" if i % 2 else "b", key=str(i)))
+    assert (log.first_sequence, log.last_sequence, len(log)) == (3, 5, 3)
+    assert [e.data["key"] for e in log.read()] == ["2", "3", "4"]
+    assert [e.sequence for e in log.read(event_type="a")] == [4]
+    assert log.count(event_type="b") == 2
+    assert log.count(service="s3") == 3
+
+
+@pytest.mark.unit
+def test_event_log_cursor_reads() -> None:
+    """Test tailing with a cursor and combined filters."""
+    log = EventLog()
+    for i in range(100):
+        log.append(event("put" if i % 3 else "delete", "s3" if i % 2 else "sqs", n=str(i)))
+    page = log.read(after=0, limit=10)
+    assert [e.sequence for e in page] == list(range(1, 11))
+    assert [e.sequence for e in log.read(after=page[-1].sequence, limit=2)] == [11, 12]
+    assert log.read(after=100) == []
+
+    deletes = log.read(after=50, event_type="delete", service="s3")
+    assert [e.sequence for e in deletes] == [52, 58, 64, 70, 76, 82, 88, 94, 100]
+    assert all(e.type == "delete" and e.service == "s3" for e in deletes)
+    assert log.read(event_type="missing") == []
+    assert log.read(event_type="put", service="missing") == []
+
+
+@pytest.mark.unit
+def test_event_log_retention_by_bytes_and_age() -> None:
+    """Test byte and age limits evicting the oldest events."""
+    log = EventLog(max_bytes=3 * event(key="x" * 100).size())
+    for i in range(10):
+        log.append(event(key=str(i) * 100))
+    assert len(log) == 3
+    assert log.bytes <= log.max_bytes  # type: ignore[operator]
+
+    now = [1000.0]
+    log = EventLog(max_age=10, clock=lambda: now[0])
+    for t in (985, 992, 999):
+        log.append(Event("tick", "clock", {}, timestamp=datetime.utcfromtimestamp(t)))
+    assert [e.created for e in log.read()] == [992, 999]
+    now[0] = 1005.0
+    assert log.count() == 1
+    assert log.read()[0].timestamp == datetime.utcfromtimestamp(999)
+
+
+@pytest.mark.unit
+async def test_event_bus_keeps_sequence_across_clear() -> None:
+    """Test that published events get sequence numbers that survive clear()."""
+    bus = EventBus(max_events=10)
+    seen = []
+    bus.subscribe("bucket.created", seen.append)
+    await bus.publish(event("bucket.created"))
+    await bus.publish(event("queue.created", "sqs"))
+    assert [e.type for e in bus.get_events()] == ["bucket.created", "queue.created"]
+    assert bus.get_events(service="sqs")[0].sequence == 2
+    assert seen[0].sequence == 1
+
+    bus.clear()
+    assert bus.get_events() == []
+    await bus.publish(event())
+    assert [e.sequence for e in bus.read(after=0)] == [3]
+
+
+@pytest.mark.unit
+async def test_wildcard_and_prefix_subscriptions() -> None:
+    """Test exact, prefix and catch-all patterns."""
+    bus = EventBus()
+    seen: dict = {"exact": [], "prefix": [], "all": []}
+    bus.subscribe("bucket.created", lambda e: seen["exact"].append(e.type))
+    bus.subscribe("bucket.*", lambda e: seen["prefix"].append(e.type))
+    bus.subscribe("*", lambda e: seen["all"].append(e.type))
+    for type in ("bucket.created", "bucket.deleted", "queue.created"):
+        await bus.publish(event(type))
+    assert seen == {
+        "exact": ["bucket.created"],
+        "prefix": ["bucket.created", "bucket.deleted"],
+        "all": ["bucket.created", "bucket.deleted", "queue.created"],
+    }
+
+
+@pytest.mark.unit
+async def test_async_dispatch_does_not_wait_for_handlers() -> None:
+    """Test that publishing only queues events for a slow subscriber."""
+    bus = EventBus(asynchronous=True)
+    release = asyncio.Event()
+    handled = []
+
+    async def slow(e: Event) -> None:
+        await release.wait()
+        handled.append(e.data["key"])
+
+    subscription = bus.subscribe("*", slow)
+    for i in range(5):
+        await bus.publish(event(key=str(i)))
+    await asyncio.sleep(0)
+    assert handled == []
+    assert subscription.depth == 4  # the first event is being handled
+
+    release.set()
+    await bus.drain()
+    assert handled == ["0", "1", "2", "3", "4"]
+    stats = bus.subscription_stats()[0]
+    assert (stats["delivered"], stats["depth"], stats["max_depth"]) == (5, 0, 5)
+    assert stats["max_latency_ms"] > 0
+    await bus.close()
+
+
+@pytest.mark.unit
+async def test_overflow_policies() -> None:
+    """Test drop, coalesce and block on a full subscription queue."""
+    bus = EventBus(asynchronous=True, queue_size=2)
+    release = asyncio.Event()
+    handled: dict = {"drop": [], "coalesce": [], "block": []}
+
+    def handler(policy: str):  # type: ignore[no-untyped-def]
+        async def handle(e: Event) -> None:
+            await release.wait()
+            handled[policy].append(e.data["key"])
+        return handle
+
+    bus.subscribe("*", handler("drop"))
+    bus.subscribe("*", handler("coalesce"), overflow="coalesce", coalesce_key=lambda e: e.data["key"][0])
+    block = bus.subscribe("*", handler("block"), overflow="block")
+
+    await bus.publish(event(key="a1"))
+    await asyncio.sleep(0)  # every worker is now busy with "a1"
+    await bus.publish(event(key="b1"))
+    await bus.publish(event(key="b2"))
+    # The blocking subscriber holds the publisher back until there is room.
+    publisher = asyncio.create_task(bus.publish(event(key="c1")))
+    await asyncio.sleep(0)
+    assert not publisher.done() and block.depth == 2
+
+    release.set()
+    await publisher
+    await bus.drain()
+    assert handled["drop"] == ["a1", "b1", "b2"]
+    assert handled["coalesce"] == ["a1", "b2", "c1"]
+    assert handled["block"] == ["a1", "b1", "b2", "c1"]
+    stats = {s["overflow"]: s for s in bus.subscription_stats()}
+    assert (stats["drop"]["dropped"], stats["coalesce"]["coalesced"]) == (1, 1)
+    await bus.close()
@@ -0,0 +1,197 @@
+"""Tests for mutation events and the streaming event feed."""
+
+import asyncio
+import hashlib
+import json
+import pytest
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+
+from starward.core.event_bus import Event, EventBus
+from starward.core.event_stream import EventFilter, tail
+from starward.server import StarwardServer
+
+
+def event(type: str, service: str = "s3", **data: Any) -> Event:
+    return Event(type, service, data)
+
+
+@pytest.mark.unit
+def test_event_filter_expressions() -> None:
+    """Test terms, wildcards, negation, precedence and index hints."""
+    created = event("object.created", bucket="logs", key="a.txt")
+    removed = event("object.removed", bucket="data", key="b.txt")
+    queue = event("queue.deleted", "sqs", queue="jobs")
+
+    matches = EventFilter("type=object.* and data.bucket=logs or type=queue.deleted")
+    assert [matches(e) for e in (created, removed, queue)] == [True, False, True]
+    assert EventFilter("data.key=*.txt and data.bucket!=logs")(removed)
+    assert EventFilter("")(queue)
+
+    hinted = EventFilter("service=s3 and type=object.created and data.key!=x")
+    assert (hinted.event_type, hinted.service) == ("object.created", "s3")
+    assert EventFilter("type=a or type=b").event_type is None
+    for invalid in ("type", "type=", "size>3", "type=a and"):
+        with pytest.raises(ValueError):
+            EventFilter(invalid)
+
+
+@pytest.mark.unit
+async def test_tail_batches_and_resumes() -> None:
+    """Test batching, filtering, cursors and reporting evicted events."""
+    bus = EventBus(max_events=50)
+    batches = tail(bus, EventFilter("data.n!=3"), after=0, batch_size=4, interval=0)
+    for n in range(6):
+        bus.emit(event("object.created", n=n))
+
+    first = await batches.__anext__()
+    assert ([e.data["n"] for e in first.events], first.cursor) == ([0, 1, 2], 4)
+    second = await batches.__anext__()
+    assert ([e.data["n"] for e in second.events], second.cursor) == ([4, 5], 6)
+
+    waiting = asyncio.ensure_future(batches.__anext__())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    bus.emit(event("object.created", n=6))
+    assert [e.data["n"] for e in (await waiting).events] == [6]
+    await batches.aclose()
+
+    for n in range(100):
+        bus.emit(event("object.created", n=n))
+    behind = await tail(bus, EventFilter(), after=7, interval=0).__anext__()
+    assert (behind.missed, len(behind.events), behind.cursor) == (50, 50, 107)
+
+
+@pytest.mark.integration
+def test_every_mutation_emits_an_event(tmp_path: Path) -> None:
+    """Test that S3 and SQS mutations, on any route, publish events."""
+    server = StarwardServer(snapshot_dir=str(tmp_path), fast_path=True)
+    with TestClient(server.app) as client:
+        client.post("/s3/buckets", json={"bucket_name": "b"})
+        client.post("/s3/objects", json={"bucket_name": "b", "key": "k", "data": "x"})
+        client.put("/s3/buckets/b/objects/big", content=b"yy")
+        client.post("/sqs/queues", json={"queue_name": "q"})
+        client.post("/sqs/messages", json={"queue_name": "q", "message_body": "m"})
+        received = client.get("/sqs/messages?queue_name=q").json()["messages"]
+        client.post("/sqs/messages/delete-batch", json={
+            "queue_name": "q", "entries": [{"id": "1", "receipt_handle": received[0]["receipt_handle"]}],
+        })
+        client.delete("/s3/buckets/missing")
+
+        events = client.get("/events").json()["events"]
+        assert [(e["service"], e["type"]) for e in events] == [
+            ("s3", "bucket.created"),
+            ("s3", "object.created"),
+            ("s3", "object.created"),
+            ("sqs", "queue.created"),
+            ("sqs", "message.sent"),
+            ("sqs", "message.received"),
+            ("sqs", "message.deleted"),
+        ]
+        assert events[2]["data"] == {
+            "bucket": "b", "key": "big", "size": 2,
+            "etag": hashlib.md5(b"yy").hexdigest(),
+            "operation": "put",
+        }
+        page = client.get("/events?filter=service=sqs and type=message.*&after=5").json()
+        assert [e["sequence"] for e in page["events"]] == [6, 7]
+        assert page["cursor"] == 7
+        assert client.get("/events?filter=size>3").status_code == 400
+
+
+@pytest.mark.integration
+def test_websocket_stream_filters_events(tmp_path: Path) -> None:
+    """Test a filtered WebSocket feed receiving batches of live events."""
+    server = StarwardServer(snapshot_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        client.post("/s3/buckets", json={"bucket_name": "logs"})
+        client.post("/s3/buckets", json={"bucket_name": "data"})
+        url = "/events/stream?filter=type=object.created and data.bucket=logs&interval=0.05"
+        with client.websocket_connect(url) as websocket:
+            for i in range(3):
+                for bucket in ("data", "logs"):
+                    client.post("/s3/objects", json={"bucket_name": bucket, "key": f"k{i}", "data": "x"})
+            keys: List[str] = []
+            while len(keys) < 3:
+                message = json.loads(websocket.receive_text())
+                keys += [e["data"]["key"] for e in message["events"]]
+            assert keys == ["k0", "k1", "k2"]
+            assert message["cursor"] == 8
+
+
+@pytest.mark.integration
+def test_event_routes_are_scoped_to_the_namespace(tmp_path: Path) -> None:
+    """Test that each namespace reads and streams only its own events."""
+    server = StarwardServer(snapshot_dir=str(tmp_path), namespace_dir=str(tmp_path / "ns"))
+    with TestClient(server.app) as client:
+        with client.websocket_connect("/ns/tenant/events/stream?interval=0") as websocket:
+            client.post("/s3/buckets", json={"bucket_name": "shared"})
+            client.post("/ns/other/s3/buckets", json={"bucket_name": "other"})
+            client.post("/ns/tenant/s3/buckets", json={"bucket_name": "mine"})
+            message = json.loads(websocket.receive_text())
+            assert [e["data"]["bucket"] for e in message["events"]] == ["mine"]
+            assert message["events"][0]["namespace"] == "tenant"
+
+        assert [e["data"]["bucket"] for e in client.get("/events").json()["events"]] == ["shared"]
+        page = client.get("/ns/tenant/events?filter=service=s3").json()
+        assert [e["data"]["bucket"] for e in page["events"]] == ["mine"]
+        assert page["cursor"] == 3
+
+
+@pytest.mark.integration
+async def test_sse_stream_resumes_from_last_event_id(tmp_path: Path) -> None:
+    """Test server-sent event batches and resuming with Last-Event-ID."""
+    server = StarwardServer(snapshot_dir=str(tmp_path))
+    await server.s3_service.create_bucket("b")
+    for i in range(3):
+        await server.s3_service.put_object("b", f"k{i}", b"x")
+
+    messages = await read_sse(server, "filter=type=object.created", {"last-event-id": "3"})
+    assert messages[0]["id"] == "4"
+    assert [e["data"]["key"] for e in messages[0]["data"]["events"]] == ["k2"]
+
+    response = await read_sse(server, "filter=bad", {})
+    assert response == [{"status": 400}]
+
+
+async def read_sse(server: StarwardServer, query: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Call the SSE endpoint over ASGI and collect the first message."""
+    disconnect = asyncio.Event()
+    messages: List[Dict[str, Any]] = []
+    buffer = ""
+
+    async def receive() -> Dict[str, Any]:
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal buffer
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            messages.append({"status": message["status"]})
+        if message["type"] == "http.response.body" and message.get("body"):
+            buffer += message["body"].decode()
+            while "\n\n" in buffer and not messages:
+                raw, buffer = buffer.split("\n\n", 1)
+                fields = dict(line.split(": ", 1) for line in raw.splitlines())
+                messages.append({"id": fields["id"], "data": json.loads(fields["data"])})
+        if messages:
+            disconnect.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "method": "GET",
+        "path": "/events/stream",
+        "raw_path": b"/events/stream",
+        "root_path": "",
+        "query_string": query.replace(" ", "%20").encode(),
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+        "client": ("test", 1),
+        "server": ("test", 80),
+        "scheme": "http",
+        "http_version": "1.1",
+    }
+    await asyncio.wait_for(server.app(scope, receive, send), 5)
+    return messages
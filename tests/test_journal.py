@@ -0,0 +1,187 @@
+"""Tests for the operation journal and replay."""
+
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+from starward.core import journal as journal_module
+from starward.core.codec import get_codec
+from starward.core.journal import OperationJournal
+from starward.core.state_engine import StateEngine
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def encoded_state(engine: StateEngine) -> Dict[str, bytes]:
+    codec = get_codec("binary")
+    return {key: codec.encode(page) for key, page in engine.get_all_state().items()}
+
+
+async def run_workload(s3: MockS3Service, sqs: MockSQSService, clock: FakeClock) -> None:
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "a", b"alpha", metadata={"k": "v"})
+    await s3.copy_object("bucket", "a", "bucket", "b")
+    await s3.delete_object("bucket", "a")
+    await sqs.create_queue("queue", {"VisibilityTimeout": "10"})
+    for i in range(5):
+        await sqs.send_message("queue", f"m{i}")
+    received = await sqs.receive_messages("queue", max_messages=3)
+    await sqs.delete_message("queue", received[0]["receipt_handle"])
+    await sqs.change_message_visibility("queue", received[1]["receipt_handle"], 0)
+    clock.now += 11  # the third message becomes visible again
+    await sqs.receive_messages("queue", max_messages=2)
+    await sqs.send_message_batch("queue", [{"id": "x", "message_body": "batched"}])
+
+
+@pytest.mark.unit
+async def test_journal_replay_reproduces_state(tmp_path: Path) -> None:
+    """Test that replaying the journal rebuilds byte-identical state."""
+    clock = FakeClock()
+    engine = StateEngine(str(tmp_path / "a"))
+    journal = OperationJournal(tmp_path / "journal.log")
+    engine.attach_journal(journal)
+    await run_workload(MockS3Service(engine), MockSQSService(engine, clock=clock, wall_clock=clock), clock)
+    await journal.close()
+
+    replayed = StateEngine(str(tmp_path / "b"))
+    MockS3Service(replayed)
+    MockSQSService(replayed, clock=FakeClock())
+    count = await replayed.replay(OperationJournal(tmp_path / "journal.log").read())
+    assert count == journal.last_seq
+    assert encoded_state(replayed) == encoded_state(engine)
+
+
+@pytest.mark.unit
+async def test_replay_rebases_visibility_deadlines(tmp_path: Path) -> None:
+    """Test that journaled receives keep their wall-clock deadlines in a new process."""
+    engine = StateEngine()
+    journal = OperationJournal(tmp_path / "journal.log")
+    engine.attach_journal(journal)
+    wall = FakeClock()
+    sqs = MockSQSService(engine, clock=FakeClock(), wall_clock=wall)
+    await sqs.create_queue("queue", {"VisibilityTimeout": "10"})
+    await sqs.send_message("queue", "a")
+    await sqs.send_message("queue", "b")
+    await sqs.receive_messages("queue")
+    wall.now += 5
+    received = await sqs.receive_messages("queue")
+    await sqs.change_message_visibility("queue", received[0]["receipt_handle"], 20)
+    await journal.close()
+
+    # The restarted process's monotonic clock is unrelated to the old one.
+    for elapsed, visible in ((1, 0), (12, 1), (30, 2)):
+        replayed = StateEngine()
+        restarted = MockSQSService(replayed, clock=lambda: 0.0, wall_clock=lambda: wall.now + elapsed)
+        await replayed.replay(OperationJournal(tmp_path / "journal.log").read())
+        attributes = await restarted.get_queue_attributes("queue")
+        assert attributes["ApproximateNumberOfMessages"] == visible
+        assert attributes["ApproximateNumberOfMessagesNotVisible"] == 2 - visible
+
+
+@pytest.mark.unit
+async def test_journal_recovers_from_snapshot_and_tail(tmp_path: Path) -> None:
+    """Test recovery as latest snapshot plus the journal records after it."""
+    engine = StateEngine(str(tmp_path))
+    engine.attach_journal(OperationJournal(tmp_path / "journal.log"))
+    s3 = MockS3Service(engine)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "before", b"1")
+    await engine.create_snapshot("base")
+    await s3.put_object("bucket", "after", b"2")
+    await engine.close()
+    assert engine.journal is not None
+    await engine.journal.close()
+
+    fresh = StateEngine(str(tmp_path))
+    fresh.attach_journal(OperationJournal(tmp_path / "journal.log"))
+    recovered = MockS3Service(fresh)
+    assert await fresh.recover() == 1
+    assert [o["key"] for o in await recovered.list_objects("bucket")] == ["after", "before"]
+
+
+@pytest.mark.unit
+async def test_journal_drops_torn_tail(tmp_path: Path) -> None:
+    """Test that a partially written last record is discarded on open."""
+    path = tmp_path / "journal.log"
+    journal = OperationJournal(path)
+    journal.append("s3", "delete_bucket", {"bucket_name": "one"})
+    journal.append("s3", "delete_bucket", {"bucket_name": "two"})
+    journal.flush_sync()
+    size = path.stat().st_size
+    with path.open("ab") as f:
+        f.write(b"\x10\x00\x00\x00garbage")
+
+    reopened = OperationJournal(path)
+    assert reopened.last_seq == 2
+    assert path.stat().st_size == size
+    assert [r.params["bucket_name"] for r in reopened.read(after_seq=1)] == ["two"]
+
+
+@pytest.mark.unit
+async def test_restore_at_replays_from_nearest_checkpoint(tmp_path: Path) -> None:
+    """Test restoring by position and time, and that the move itself is journaled."""
+    engine = StateEngine(str(tmp_path / "snapshots"))
+    journal = OperationJournal(tmp_path / "journal.log")
+    engine.attach_journal(journal, checkpoint_interval=4)
+    s3 = MockS3Service(engine)
+    start = datetime(2024, 1, 1)
+    engine.freeze_time(start)
+    await s3.create_bucket("bucket")
+    for i in range(10):
+        engine.freeze_time(start + timedelta(minutes=i + 1))
+        await s3.put_object("bucket", f"key-{i}", b"x")
+
+    point = await engine.restore_at(seq=7)
+    assert point.checkpoint == "checkpoint_000000000004"
+    assert point.replayed == 3
+    assert len(await s3.list_objects("bucket")) == 6
+
+    point = await engine.restore_at(timestamp=start + timedelta(minutes=2, seconds=30))
+    assert point.seq == 3
+    assert sorted(o["key"] for o in await s3.list_objects("bucket")) == ["key-0", "key-1"]
+
+    with pytest.raises(ValueError):
+        await engine.restore_at(seq=100)
+    with pytest.raises(ValueError):
+        await engine.restore_at()
+
+    await s3.put_object("bucket", "after", b"y")
+    await engine.close()
+    await journal.close()
+
+    replayed = StateEngine(str(tmp_path / "snapshots"))
+    replayed.attach_journal(OperationJournal(tmp_path / "journal.log", read_only=True))
+    MockS3Service(replayed)
+    await replayed.replay(OperationJournal(tmp_path / "journal.log").read())
+    assert encoded_state(replayed) == encoded_state(engine)
+
+
+@pytest.mark.unit
+def test_journal_seeks_with_sparse_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test positional and timestamp lookups across index blocks."""
+    monkeypatch.setattr(journal_module, "INDEX_INTERVAL", 8)
+    path = tmp_path / "journal.log"
+    journal = OperationJournal(path)
+    for i in range(1, 51):
+        journal.append("s3", "delete_bucket", {"bucket_name": str(i)}, timestamp=float(i // 2))
+    journal.flush_sync()
+
+    reopened = OperationJournal(path, read_only=True)
+    assert [r.seq for r in reopened.read(after_seq=20, until_seq=23)] == [21, 22, 23]
+    assert reopened.seq_at(10.0) == 21
+    assert reopened.seq_at(0.5) == 1
+    assert reopened.seq_at(-1.0) == 0
+    assert reopened.seq_at(1000.0) == 50
+    with pytest.raises(ValueError):
+        reopened.append("s3", "delete_bucket", {"bucket_name": "x"})
@@ -0,0 +1,101 @@
+"""Tests for isolated state namespaces."""
+
+import pytest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from starward.core.namespaces import Namespace, NamespaceManager
+from starward.core.registry import ServiceRegistry
+from starward.core.state_engine import StateEngine
+from starward.server import StarwardServer
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_namespace(name: str) -> Namespace:
+    return Namespace(name, StateEngine(), ServiceRegistry())
+
+
+@pytest.mark.unit
+async def test_namespaces_created_lazily_and_evicted_when_idle() -> None:
+    """Test lazy creation, busy namespaces surviving eviction, and pinning."""
+    clock = FakeClock()
+    manager = NamespaceManager(make_namespace, idle_timeout=10, clock=clock)
+    manager.add(make_namespace("default"), pinned=True)
+
+    busy = await manager.acquire("busy")
+    idle = await manager.acquire("idle")
+    assert await manager.acquire("idle") is idle
+    manager.release(idle)
+    manager.release(idle)
+
+    clock.now = 11
+    assert await manager.evict_idle() == ["idle"]
+    assert manager.get("idle") is None
+    assert manager.get("busy") is busy
+
+    manager.release(busy)
+    clock.now = 30
+    assert await manager.evict_idle() == ["busy"]
+    assert [n["name"] for n in manager.list_namespaces()] == ["default"]
+
+    with pytest.raises(ValueError):
+        await manager.acquire("../escape")
+    with pytest.raises(ValueError):
+        await manager.drop("default")
+
+
+@pytest.mark.integration
+def test_server_isolates_namespaces_by_header_and_prefix(tmp_path: Path) -> None:
+    """Test that namespaces selected by header or path prefix do not share state."""
+    server = StarwardServer(namespace_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        bucket = {"bucket_name": "shared-name"}
+        headers = {"X-Starward-Namespace": "w1"}
+        assert client.post("/s3/buckets", json=bucket, headers=headers).status_code == 200
+        assert client.post("/ns/w2/s3/buckets", json=bucket).status_code == 200
+        # Same bucket name again in w1 collides only within w1.
+        assert client.post("/ns/w1/s3/buckets", json=bucket).status_code == 400
+
+        assert client.get("/s3/buckets").json() == {"buckets": []}
+        assert len(client.get("/ns/w2/s3/buckets").json()["buckets"]) == 1
+
+        assert client.post("/namespaces/w1/reset").json()["status"] == "reset"
+        assert client.get("/ns/w1/s3/buckets").json() == {"buckets": []}
+        assert len(client.get("/ns/w2/s3/buckets").json()["buckets"]) == 1
+
+        names = [n["name"] for n in client.get("/namespaces").json()["namespaces"]]
+        assert names == ["default", "w1", "w2"]
+        assert client.delete("/namespaces/w2").status_code == 200
+        assert client.get("/ns/w2/s3/buckets").json() == {"buckets": []}
+        assert client.get("/ns/bad name/s3/buckets").status_code == 400
+
+
+@pytest.mark.integration
+def test_server_forks_snapshot_into_namespace(tmp_path: Path) -> None:
+    """Test forking a snapshot of the default namespace into new namespaces."""
+    server = StarwardServer(namespace_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        client.post("/s3/buckets", json={"bucket_name": "baseline"})
+        client.post("/snapshots", params={"snapshot_id": "base"})
+
+        forked = client.post("/snapshots/base/fork", params={"namespace": "t1"}).json()
+        assert forked["namespace"] == "t1"
+        generated = client.post("/snapshots/base/fork").json()["namespace"]
+
+        client.post("/ns/t1/s3/buckets", json={"bucket_name": "t1-only"})
+        assert len(client.get("/ns/t1/s3/buckets").json()["buckets"]) == 2
+        assert len(client.get(f"/ns/{generated}/s3/buckets").json()["buckets"]) == 1
+        assert len(client.get("/s3/buckets").json()["buckets"]) == 1
+
+        assert client.post("/snapshots/base/fork", params={"namespace": "t1"}).status_code == 400
+        assert client.post("/snapshots/missing/fork").status_code == 404
@@ -0,0 +1,118 @@
+"""Tests for plugin hooks around service operations."""
+
+import inspect
+import pytest
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+
+from starward.core.plugins import Plugin, PluginManager
+from starward.server import StarwardServer
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MockSQSService
+
+
+class Recorder(Plugin):
+    """Records every hook call."""
+
+    def __init__(self, name: str, calls: List[str], actions: Any = None) -> None:
+        self.name = name
+        self.calls = calls
+        self.actions = actions
+
+    async def on_pre_action(self, service: str, action: str, params: Dict[str, Any]) -> None:
+        self.calls.append(f"{self.name}:pre:{service}.{action}")
+
+    async def on_post_action(self, service: str, action: str, params: Dict[str, Any], result: Any) -> None:
+        self.calls.append(f"{self.name}:post:{service}.{action}")
+
+
+class FaultInjector(Plugin):
+    """Fails writes to the "broken" bucket and prefixes every other key."""
+
+    name = "faults"
+    actions = ["s3.put_object"]
+
+    async def on_pre_action(self, service: str, action: str, params: Dict[str, Any]) -> None:
+        if params["bucket_name"] == "broken":
+            raise ValueError("Injected fault")
+        params["key"] = "renamed/" + params["key"]
+
+
+@pytest.mark.unit
+async def test_pipelines_follow_plugin_changes() -> None:
+    """Test compiled pipelines, action filters and invalidation."""
+    calls: List[str] = []
+    manager = PluginManager()
+    assert manager.pipeline("s3", "put_object") is None
+
+    await manager.register_plugin(Recorder("all", calls))
+    await manager.register_plugin(Recorder("sqs", calls, actions=["sqs.*"]))
+    await manager.register_plugin(Plugin())  # no hooks of its own
+    pipeline = manager.pipeline("s3", "put_object")
+    assert pipeline is not None and manager.pipeline("s3", "put_object") is pipeline
+    assert (len(pipeline.pre), len(pipeline.post)) == (1, 1)
+    assert len(manager.pipeline("sqs", "send_message").pre) == 2  # type: ignore[union-attr]
+
+    manager.disable_plugin("all")
+    assert manager.pipeline("s3", "put_object") is None
+    manager.enable_plugin("all")
+    await manager.execute_pre_action("s3", "put_object", {})
+    assert calls == ["all:pre:s3.put_object"]
+    await manager.unload_plugin("all")
+    assert manager.pipeline("s3", "put_object") is None
+
+
+@pytest.mark.unit
+async def test_hooks_wrap_service_operations() -> None:
+    """Test hook order, parameter changes and faults on real operations."""
+    calls: List[str] = []
+    manager = PluginManager()
+    s3 = MockS3Service(plugins=manager)
+    sqs = MockSQSService(plugins=manager)
+    # Unhooked calls hand back the operation's own coroutine.
+    call = s3.list_buckets()
+    assert inspect.iscoroutine(call) and call.__qualname__ == "MockS3Service.list_buckets"
+    await call
+
+    await manager.register_plugin(Recorder("first", calls))
+    await manager.register_plugin(Recorder("second", calls))
+    await s3.create_bucket("data")
+    await sqs.create_queue("jobs")
+    assert calls == [
+        "first:pre:s3.create_bucket",
+        "second:pre:s3.create_bucket",
+        "first:post:s3.create_bucket",
+        "second:post:s3.create_bucket",
+        "first:pre:sqs.create_queue",
+        "second:pre:sqs.create_queue",
+        "first:post:sqs.create_queue",
+        "second:post:sqs.create_queue",
+    ]
+
+    await manager.register_plugin(FaultInjector())
+    await s3.create_bucket("broken")
+    with pytest.raises(ValueError, match="Injected fault"):
+        await s3.put_object("broken", "k", b"x")
+    await s3.put_object("data", "k", b"x")
+    assert [o["key"] for o in await s3.list_objects("data")] == ["renamed/k"]
+
+
+@pytest.mark.integration
+def test_plugins_apply_to_every_route(tmp_path: Path) -> None:
+    """Test that REST, fast path and AWS protocol requests all run hooks."""
+    calls: List[str] = []
+    server = StarwardServer(snapshot_dir=str(tmp_path), fast_path=True)
+    with TestClient(server.app) as client:
+        client.portal.call(server.plugin_manager.register_plugin, Recorder("r", calls, ["s3.*"]))  # type: ignore[union-attr]
+        client.post("/s3/buckets", json={"bucket_name": "b"})
+        client.put("/s3/buckets/b/objects/k", content=b"x")
+        signed = {"Authorization": "AWS4-HMAC-SHA256 Credential=test/20240101/us-east-1/s3/aws4_request"}
+        client.get("/b/k", headers=signed)
+        client.post("/sqs/queues", json={"queue_name": "q"})
+    assert [c for c in calls if ":pre:" in c] == [
+        "r:pre:s3.create_bucket",
+        "r:pre:s3.put_object_stream",
+        "r:pre:s3.open_object",
+    ]
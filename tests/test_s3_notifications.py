@@ -0,0 +1,155 @@
+"""Tests for S3 bucket notifications delivered into SQS queues."""
+
+import asyncio
+import json
+import pytest
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+
+from starward.aws.xml import S3_NAMESPACE
+from starward.core.state_engine import StateEngine
+from starward.server import StarwardServer
+from starward.services.s3 import MockS3Service
+from starward.services.s3_notifications import BucketNotifier, parse_rules
+from starward.services.sqs import MockSQSService
+
+SIGNED = {"Authorization": "AWS4-HMAC-SHA256 Credential=test/20240101/us-east-1/s3/aws4_request"}
+NS = f"{{{S3_NAMESPACE}}}"
+
+
+async def drain_queue(sqs: MockSQSService, queue_name: str) -> List[Dict[str, Any]]:
+    """Receive and delete every visible message; return the S3 event records."""
+    records = []
+    while True:
+        messages = await sqs.receive_messages(queue_name, max_messages=10)
+        if not messages:
+            return records
+        for message in messages:
+            records += json.loads(message["body"])["Records"]
+            await sqs.delete_message(queue_name, message["receipt_handle"])
+
+
+@pytest.mark.unit
+def test_parse_rules() -> None:
+    """Test queue references, defaults and rejected configurations."""
+    [rule] = parse_rules([{
+        "id": "logs",
+        "queue": "arn:aws:sqs:us-east-1:000000000000:jobs",
+        "events": ["s3:ObjectCreated:*"],
+        "prefix": "logs/",
+    }])
+    assert rule == {
+        "id": "logs", "queue": "jobs", "events": ["s3:ObjectCreated:*"], "prefix": "logs/", "suffix": "",
+    }
+    assert parse_rules([{"queue": "http://localhost:4566/000000000000/q", "events": ["s3:ObjectRemoved:*"]}])[0]["queue"] == "q"
+    invalid: List[Any] = [
+        [{"queue": "q", "events": []}],
+        [{"queue": "q", "events": ["s3:ObjectRestore:*"]}],
+        [{"events": ["s3:ObjectCreated:*"]}],
+        [{"id": "a", "queue": "q", "events": ["s3:ObjectCreated:*"]}] * 2,
+    ]
+    for configurations in invalid:
+        with pytest.raises(ValueError):
+            parse_rules(configurations)
+
+
+@pytest.mark.unit
+async def test_notifications_are_delivered_in_bucket_order() -> None:
+    """Test filtering, event records and ordering under concurrent writers."""
+    engine = StateEngine()
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    s3.notifier = BucketNotifier(sqs, batch_size=7)
+    await s3.create_bucket("b")
+    for name in ("created", "removed"):
+        await sqs.create_queue(name)
+    with pytest.raises(ValueError, match="Queue not found"):
+        await s3.put_bucket_notification("b", [{"queue": "missing", "events": ["s3:ObjectCreated:*"]}])
+    await s3.put_bucket_notification("b", [
+        {"id": "new", "queue": "created", "events": ["s3:ObjectCreated:*"], "suffix": ".txt"},
+        {"id": "gone", "queue": "removed", "events": ["s3:ObjectRemoved:Delete"]},
+    ])
+
+    async def writer(n: int) -> None:
+        for i in range(10):
+            await s3.put_object("b", f"{n}-{i}.txt", b"x" * i)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(writer(n) for n in range(5)))
+    await s3.put_object("b", "skipped.bin", b"")
+    await s3.copy_object("b", "0-1.txt", "b", "copy.txt")
+    await s3.delete_object("b", "0-2.txt")
+    await s3.notifier.drain()
+
+    created = await drain_queue(sqs, "created")
+    assert len(created) == 51
+    sequencers = [r["s3"]["object"]["sequencer"] for r in created]
+    assert sequencers == sorted(sequencers)
+    for n in range(5):
+        assert [r["s3"]["object"]["key"] for r in created if r["s3"]["object"]["key"][0] == str(n)] == [
+            f"{n}-{i}.txt" for i in range(10)
+        ]
+    copy = created[-1]
+    assert copy["eventName"] == "ObjectCreated:Copy"
+    assert copy["s3"]["configurationId"] == "new"
+    assert copy["s3"]["bucket"] == {"name": "b", "arn": "arn:aws:s3:::b"}
+    assert (copy["s3"]["object"]["size"], copy["eventTime"][-1]) == (1, "Z")
+
+    [removed] = await drain_queue(sqs, "removed")
+    assert removed["eventName"] == "ObjectRemoved:Delete"
+    assert removed["s3"]["object"]["key"] == "0-2.txt"
+    assert s3.notifier.stats() == {"pending": 0, "delivered": 52, "failed": 0}
+
+    # An empty list removes the configuration.
+    await s3.put_bucket_notification("b", [])
+    assert await s3.get_bucket_notification("b") == []
+
+
+@pytest.mark.integration
+def test_notification_configuration_routes(tmp_path: Path) -> None:
+    """Test the REST and S3 XML configuration APIs and per-namespace delivery."""
+    server = StarwardServer(snapshot_dir=str(tmp_path))
+    with TestClient(server.app) as client:
+        client.post("/sqs/queues", json={"queue_name": "q"})
+        client.post("/s3/buckets", json={"bucket_name": "b"})
+        config = (
+            f'<NotificationConfiguration xmlns="{S3_NAMESPACE}"><QueueConfiguration>'
+            "<Id>logs</Id><Queue>arn:aws:sqs:us-east-1:000000000000:q</Queue>"
+            "<Event>s3:ObjectCreated:Put</Event><Filter><S3Key>"
+            "<FilterRule><Name>Prefix</Name><Value>logs/</Value></FilterRule>"
+            "</S3Key></Filter></QueueConfiguration></NotificationConfiguration>"
+        )
+        assert client.put("/b?notification", content=config, headers=SIGNED).status_code == 200
+        root = ElementTree.fromstring(client.get("/b?notification", headers=SIGNED).content)
+        assert root.findtext(f"{NS}QueueConfiguration/{NS}Queue") == "arn:aws:sqs:us-east-1:000000000000:q"
+        assert root.findtext(f".//{NS}FilterRule/{NS}Value") == "logs/"
+
+        topic = f'<NotificationConfiguration xmlns="{S3_NAMESPACE}"><TopicConfiguration/></NotificationConfiguration>'
+        assert client.put("/b?notification", content=topic, headers=SIGNED).status_code == 501
+        response = client.put("/s3/buckets/b/notification", json={
+            "queue_configurations": [{"queue": "other", "events": ["s3:ObjectCreated:*"]}],
+        })
+        assert response.status_code == 400
+        assert client.get("/s3/buckets/b/notification").json()["queue_configurations"][0]["prefix"] == "logs/"
+        [updated] = [e for e in client.get("/events").json()["events"] if e["type"] == "bucket.notification_updated"]
+        assert updated["data"] == {"bucket": "b", "queues": ["q"]}
+
+        client.post("/s3/objects", json={"bucket_name": "b", "key": "logs/1", "data": "x"})
+        client.post("/s3/objects", json={"bucket_name": "b", "key": "other", "data": "x"})
+        # A namespace has its own buckets, queues and notifications.
+        client.post("/ns/t/sqs/queues", json={"queue_name": "q"})
+        client.post("/ns/t/s3/buckets", json={"bucket_name": "b"})
+        client.put("/ns/t/s3/buckets/b/notification", json={
+            "queue_configurations": [{"queue": "q", "events": ["s3:ObjectCreated:*"]}],
+        })
+        client.post("/ns/t/s3/objects", json={"bucket_name": "b", "key": "tenant", "data": "x"})
+
+        def keys(prefix: str) -> List[str]:
+            messages = client.get(f"{prefix}/sqs/messages?queue_name=q&max_messages=10&wait_time_seconds=1").json()
+            return [json.loads(m["body"])["Records"][0]["s3"]["object"]["key"] for m in messages["messages"]]
+
+        assert keys("") == ["logs/1"]
+        assert keys("/ns/t") == ["tenant"]
@@ -1,8 +1,14 @@
 """Tests for S3 service."""
 
+import hashlib
+import random
+from pathlib import Path
+from typing import AsyncIterator
+
 import pytest
 
-from starward.services.s3 import MockS3Service
+from starward.services.s3 import InvalidRangeError, MockS3Service, parse_range
+from starward.services.s3_index import SortedKeyIndex
 
 
 @pytest.mark.unit
@@ -77,3 +83,160 @@ async def test_s3_bucket_not_found(s3_service: MockS3Service) -> None:
     """Test error handling for non-existent bucket."""
     with pytest.raises(ValueError, match="Bucket not found"):
         await s3_service.delete_bucket("nonexistent")
+
+
+@pytest.mark.unit
+async def test_s3_head_object(s3_service: MockS3Service) -> None:
+    """Test object metadata recorded at write time."""
+    await s3_service.create_bucket("test-bucket")
+    await s3_service.put_object(
+        "test-bucket", "doc.txt", b"hello", {"owner": "me"}, content_type="text/plain"
+    )
+
+    head = await s3_service.head_object("test-bucket", "doc.txt")
+    assert head["size"] == 5
+    assert head["etag"] == hashlib.md5(b"hello").hexdigest()
+    assert head["content_type"] == "text/plain"
+    assert head["metadata"] == {"owner": "me"}
+    assert "last_modified" in head
+
+    listed = await s3_service.list_objects("test-bucket")
+    assert listed[0]["etag"] == head["etag"]
+    assert listed[0]["last_modified"] == head["last_modified"]
+
+
+async def _chunks(*parts: bytes) -> AsyncIterator[bytes]:
+    for part in parts:
+        yield part
+
+
+@pytest.mark.unit
+async def test_s3_put_object_stream_spools_to_disk(tmp_path: Path) -> None:
+    """Test that large streamed objects are spooled to the blob store."""
+    service = MockS3Service(blob_dir=str(tmp_path), spool_threshold=8)
+    await service.create_bucket("test-bucket")
+
+    small = await service.put_object_stream("test-bucket", "small", _chunks(b"abc", b"de"))
+    assert small["size"] == 5
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
+
+    payload = [b"0123456789", b"abcdefghij", b"xyz"]
+    large = await service.put_object_stream("test-bucket", "large", _chunks(*payload))
+    assert large["size"] == 23
+    assert large["etag"] == hashlib.md5(b"".join(payload)).hexdigest()
+    assert any(p.is_file() for p in tmp_path.rglob("*"))
+    assert await service.get_object("test-bucket", "large") == b"".join(payload)
+
+    # Identical content is stored once.
+    await service.put_object_stream("test-bucket", "copy", _chunks(b"".join(payload)))
+    blobs = [p for p in tmp_path.rglob("*") if p.is_file() and p.parent.name != "tmp"]
+    assert len(blobs) == 1
+
+
+@pytest.mark.unit
+async def test_s3_open_object_range(tmp_path: Path) -> None:
+    """Test ranged reads from memory and from spooled blobs."""
+    service = MockS3Service(blob_dir=str(tmp_path), spool_threshold=16)
+    await service.create_bucket("test-bucket")
+    await service.put_object("test-bucket", "small", b"0123456789")
+    await service.put_object("test-bucket", "large", bytes(range(64)))
+
+    info, chunks = await service.open_object("test-bucket", "small", "bytes=2-5")
+    assert (info["start"], info["end"], info["size"]) == (2, 5, 10)
+    assert b"".join(chunks) == b"2345"
+
+    info, chunks = await service.open_object("test-bucket", "large", "bytes=-4")
+    assert b"".join(chunks) == bytes(range(60, 64))
+
+    info, chunks = await service.open_object("test-bucket", "large", "bytes=10-")
+    assert b"".join(chunks) == bytes(range(10, 64))
+
+    with pytest.raises(InvalidRangeError):
+        await service.open_object("test-bucket", "small", "bytes=20-30")
+
+
+@pytest.mark.unit
+def test_parse_range() -> None:
+    """Test Range header parsing."""
+    assert parse_range(None, 100) == (0, 99)
+    assert parse_range("bytes=0-0", 100) == (0, 0)
+    assert parse_range("bytes=90-200", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    for invalid in ("bytes=5-2", "items=0-1", "bytes=0-1,4-5", "bytes=-0", "bytes=a-b"):
+        with pytest.raises(InvalidRangeError):
+            parse_range(invalid, 100)
+
+
+@pytest.mark.unit
+def test_sorted_key_index_matches_sorted_set() -> None:
+    """Test the chunked key index against a plain sorted set."""
+    rng = random.Random(7)
+    index = SortedKeyIndex()
+    expected: set[str] = set()
+    for _ in range(5000):
+        key = f"k{rng.randrange(3000):05d}"
+        if key in expected and rng.random() < 0.5:
+            index.discard(key)
+            expected.discard(key)
+        elif key not in expected:
+            index.add(key)
+            expected.add(key)
+
+    assert list(index) == sorted(expected)
+    assert len(index) == len(expected)
+    assert list(index.iter_from("k01500")) == sorted(k for k in expected if k >= "k01500")
+
+
+@pytest.mark.unit
+async def test_s3_list_objects_v2_pagination(s3_service: MockS3Service) -> None:
+    """Test paging through a listing with continuation tokens."""
+    await s3_service.create_bucket("test-bucket")
+    keys = [f"logs/{i:03d}" for i in range(25)]
+    for key in reversed(keys):
+        await s3_service.put_object("test-bucket", key, b"x")
+    await s3_service.put_object("test-bucket", "other", b"x")
+
+    listed = []
+    token = None
+    while True:
+        page = await s3_service.list_objects_v2(
+            "test-bucket", prefix="logs/", max_keys=10, continuation_token=token
+        )
+        listed.extend(o["key"] for o in page["contents"])
+        if not page["is_truncated"]:
+            break
+        token = page["next_continuation_token"]
+    assert listed == keys
+
+    page = await s3_service.list_objects_v2("test-bucket", prefix="logs/", start_after="logs/020")
+    assert [o["key"] for o in page["contents"]] == keys[21:]
+
+    with pytest.raises(ValueError, match="continuation token"):
+        await s3_service.list_objects_v2("test-bucket", continuation_token="!!")
+
+
+@pytest.mark.unit
+async def test_s3_list_objects_v2_delimiter(s3_service: MockS3Service) -> None:
+    """Test rolling keys up into common prefixes."""
+    await s3_service.create_bucket("test-bucket")
+    for key in ["a/1", "a/2", "b/1", "b/c/1", "c", "d/1"]:
+        await s3_service.put_object("test-bucket", key, b"x")
+
+    page = await s3_service.list_objects_v2("test-bucket", delimiter="/")
+    assert page["common_prefixes"] == ["a/", "b/", "d/"]
+    assert [o["key"] for o in page["contents"]] == ["c"]
+
+    page = await s3_service.list_objects_v2("test-bucket", prefix="b/", delimiter="/")
+    assert page["common_prefixes"] == ["b/c/"]
+    assert [o["key"] for o in page["contents"]] == ["b/1"]
+
+    first = await s3_service.list_objects_v2("test-bucket", delimiter="/", max_keys=2)
+    assert first["common_prefixes"] == ["a/", "b/"]
+    assert first["is_truncated"]
+    rest = await s3_service.list_objects_v2(
+        "test-bucket",
+        delimiter="/",
+        continuation_token=first["next_continuation_token"],
+    )
+    assert rest["common_prefixes"] == ["d/"]
+    assert [o["key"] for o in rest["contents"]] == ["c"]
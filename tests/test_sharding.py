@@ -0,0 +1,217 @@
+"""Tests for the sharded router."""
+
+import pytest
+from pathlib import Path
+from typing import List
+
+import httpx
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from starward.server import StarwardServer
+from starward.sharding import ShardRouter, shard_of
+
+
+def make_router(tmp_path: Path, shards: int) -> tuple[ShardRouter, List[StarwardServer]]:
+    servers = [
+        StarwardServer(
+            snapshot_dir=str(tmp_path / f"shard-{n}" / "snapshots"),
+            namespace_dir=str(tmp_path / f"shard-{n}" / "namespaces"),
+        )
+        for n in range(shards)
+    ]
+    clients = [
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://shard")
+        for server in servers
+    ]
+    return ShardRouter(clients), servers
+
+
+@pytest.mark.unit
+def test_shard_of_is_stable() -> None:
+    """Test that shard assignment does not depend on the process."""
+    assert shard_of("s3:bucket", 4) == shard_of("s3:bucket", 4)
+    assert {shard_of(f"s3:bucket-{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+@pytest.mark.integration
+async def test_router_partitions_buckets_and_queues(tmp_path: Path) -> None:
+    """Test that each bucket/queue lives on one shard and listings are merged."""
+    router, servers = make_router(tmp_path, 3)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        names = [f"bucket-{i}" for i in range(12)]
+        for name in names:
+            assert (await client.post("/s3/buckets", json={"bucket_name": name})).status_code == 200
+            response = await client.put(f"/s3/buckets/{name}/objects/key", content=b"data")
+            assert response.status_code == 200
+        assert (await client.get("/s3/buckets/bucket-3/objects/key")).content == b"data"
+
+        await client.post("/sqs/queues", json={"queue_name": "jobs"})
+        await client.post("/sqs/messages", json={"queue_name": "jobs", "message_body": "hi"})
+        received = (await client.get("/sqs/messages", params={"queue_name": "jobs"})).json()
+        assert [m["body"] for m in received["messages"]] == ["hi"]
+
+        listed = (await client.get("/s3/buckets")).json()["buckets"]
+        assert sorted(b["name"] for b in listed) == sorted(names)
+        for n, server in enumerate(servers):
+            owned = [b["name"] for b in await server.s3_service.list_buckets()]
+            assert owned == [name for name in names if shard_of(f"s3:{name}", 3) == n]
+    await router.aclose()
+
+
+@pytest.mark.integration
+async def test_router_snapshots_every_shard(tmp_path: Path) -> None:
+    """Test that snapshot and restore are applied to all shards with one id."""
+    router, servers = make_router(tmp_path, 2)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        for i in range(6):
+            await client.post("/s3/buckets", json={"bucket_name": f"before-{i}"})
+        snapshot = (await client.post("/snapshots")).json()
+        for i in range(6):
+            await client.post("/s3/buckets", json={"bucket_name": f"after-{i}"})
+
+        status = await client.get(f"/snapshots/{snapshot['id']}", params={"wait": True})
+        assert status.json()["status"] == "persisted"
+        restored = await client.post(f"/snapshots/{snapshot['id']}/restore")
+        assert restored.status_code == 200
+        listed = (await client.get("/s3/buckets")).json()["buckets"]
+        assert sorted(b["name"] for b in listed) == [f"before-{i}" for i in range(6)]
+        for server in servers:
+            assert snapshot["id"] in server.state_engine.list_snapshots()
+
+        # Deleting keeps the chunks until an explicit collection on every shard.
+        assert (await client.delete(f"/snapshots/{snapshot['id']}")).json() == {
+            "status": "deleted", "snapshot_id": snapshot["id"],
+        }
+        collected = (await client.post("/snapshots/gc")).json()
+        assert collected["chunks_removed"] >= len(servers)
+        assert (await client.post("/snapshots/gc")).json() == {
+            "chunks_removed": 0,
+            "blobs_removed": 0,
+        }
+
+        response = await client.post("/state/restore", params={"seq": 1})
+        assert response.status_code == 400
+    await router.aclose()
+    for server in servers:
+        await server.state_engine.close()
+
+
+@pytest.mark.integration
+async def test_router_routes_aws_requests(tmp_path: Path) -> None:
+    """Test that SDK requests reach the owning shard and AWS listings are merged."""
+    router, servers = make_router(tmp_path, 3)
+    signed = {"Authorization": "AWS4-HMAC-SHA256 Credential=test"}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        names = [f"bucket-{i}" for i in range(9)]
+        for name in names:
+            assert (await client.put(f"/{name}", headers=signed)).status_code == 200
+            await client.put(f"/{name}/key", content=name.encode(), headers=signed)
+        # Native and AWS requests agree on where a bucket lives.
+        assert (await client.get("/s3/buckets/bucket-4/objects/key")).content == b"bucket-4"
+        listing = (await client.get("/", headers=signed)).text
+        assert all(f"<Name>{name}</Name>" in listing for name in names)
+
+        for name in ("a", "b", "c"):
+            await client.post(
+                "/",
+                json={"QueueName": name},
+                headers={**signed, "X-Amz-Target": "AmazonSQS.CreateQueue"},
+            )
+        response = await client.post(
+            "/", json={}, headers={**signed, "X-Amz-Target": "AmazonSQS.ListQueues"}
+        )
+        assert [url.rsplit("/", 1)[-1] for url in response.json()["QueueUrls"]] == ["a", "b", "c"]
+        for n, server in enumerate(servers):
+            assert sorted(server.sqs_service.queues) == [
+                name for name in ("a", "b", "c") if shard_of(f"sqs:{name}", 3) == n
+            ]
+    await router.aclose()
+
+
+@pytest.mark.integration
+async def test_router_rejects_bucket_notifications(tmp_path: Path) -> None:
+    """Test that notification configurations fail clearly instead of per shard."""
+    router, _ = make_router(tmp_path, 2)
+    signed = {"Authorization": "AWS4-HMAC-SHA256 Credential=test"}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        await client.post("/s3/buckets", json={"bucket_name": "bucket"})
+        response = await client.put(
+            "/s3/buckets/bucket/notification",
+            json={"queue_configurations": [{"queue": "jobs", "events": ["s3:ObjectCreated:*"]}]},
+        )
+        assert response.status_code == 501
+        assert "notifications" in response.json()["detail"]
+
+        response = await client.put("/bucket?notification", content=b"<x/>", headers=signed)
+        assert response.status_code == 501
+        assert "<Code>NotImplemented</Code>" in response.text
+        # Nothing was stored, and reading the configuration still works.
+        response = await client.get("/s3/buckets/bucket/notification")
+        assert response.json() == {"queue_configurations": []}
+    await router.aclose()
+
+
+@pytest.mark.integration
+async def test_router_copies_objects_across_shards(tmp_path: Path) -> None:
+    """Test that CopyObject works when source and destination buckets are on different shards."""
+    router, servers = make_router(tmp_path, 2)
+    signed = {"Authorization": "AWS4-HMAC-SHA256 Credential=test"}
+    names = [f"bucket-{i}" for i in range(10)]
+    source = next(name for name in names if shard_of(f"s3:{name}", 2) == 0)
+    target = next(name for name in names if shard_of(f"s3:{name}", 2) == 1)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        for name in (source, target):
+            assert (await client.put(f"/{name}", headers=signed)).status_code == 200
+        await client.put(
+            f"/{source}/dir/key",
+            content=b"payload",
+            headers={**signed, "Content-Type": "text/plain", "x-amz-meta-owner": "me"},
+        )
+
+        response = await client.put(
+            f"/{target}/copy", headers={**signed, "x-amz-copy-source": f"/{source}/dir/key"}
+        )
+        assert response.status_code == 200
+        assert "<CopyObjectResult" in response.text and "<LastModified>" in response.text
+        copied = await client.get(f"/{target}/copy", headers=signed)
+        assert copied.content == b"payload"
+        assert copied.headers["content-type"] == "text/plain"
+        assert copied.headers["x-amz-meta-owner"] == "me"
+        assert f"<ETag>{copied.headers['etag']}</ETag>" in response.text
+        assert await servers[1].s3_service.get_object(target, "copy") == b"payload"
+
+        response = await client.put(
+            f"/{target}/missing", headers={**signed, "x-amz-copy-source": f"/{source}/nope"}
+        )
+        assert response.status_code == 404
+    await router.aclose()
+
+
+@pytest.mark.integration
+async def test_router_rejects_event_routes(tmp_path: Path) -> None:
+    """Test that event reads and streams fail clearly instead of showing one shard."""
+    router, _ = make_router(tmp_path, 2)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=router), base_url="http://router"
+    ) as client:
+        for path in ("/events", "/events/stream", "/ns/team/events"):
+            response = await client.get(path)
+            assert response.status_code == 501
+            assert "Event routes" in response.json()["detail"]
+
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with TestClient(router).websocket_connect("/events/stream"):
+            pass
+    assert closed.value.code == 1008
+    await router.aclose()
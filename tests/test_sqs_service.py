@@ -1,5 +1,7 @@
 """Tests for SQS service."""
 
+import asyncio
+
 import pytest
 
 from starward.services.sqs import MockSQSService
@@ -69,3 +71,166 @@ async def test_sqs_queue_attributes(sqs_service: MockSQSService) -> None:
     
     attrs = await sqs_service.get_queue_attributes("test-queue")
     assert attrs["ApproximateNumberOfMessages"] == 1
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+async def test_sqs_visibility_timeout_hides_and_restores() -> None:
+    """Test that received messages reappear once their visibility timeout expires."""
+    clock = FakeClock()
+    service = MockSQSService(clock=clock)
+    await service.create_queue("test-queue", {"VisibilityTimeout": "10"})
+    await service.send_message("test-queue", "message")
+
+    first = await service.receive_messages("test-queue")
+    assert len(first) == 1
+    assert await service.receive_messages("test-queue") == []
+
+    attrs = await service.get_queue_attributes("test-queue")
+    assert attrs["ApproximateNumberOfMessages"] == 0
+    assert attrs["ApproximateNumberOfMessagesNotVisible"] == 1
+
+    clock.now += 10
+    second = await service.receive_messages("test-queue")
+    assert len(second) == 1
+    assert second[0]["message_id"] == first[0]["message_id"]
+    assert second[0]["receipt_handle"] != first[0]["receipt_handle"]
+
+    # The stale receipt handle no longer deletes the message.
+    await service.delete_message("test-queue", first[0]["receipt_handle"])
+    attrs = await service.get_queue_attributes("test-queue")
+    assert attrs["ApproximateNumberOfMessagesNotVisible"] == 1
+
+
+@pytest.mark.unit
+async def test_sqs_change_message_visibility() -> None:
+    """Test making an in-flight message visible again."""
+    clock = FakeClock()
+    service = MockSQSService(clock=clock)
+    await service.create_queue("test-queue")
+    await service.send_message("test-queue", "message1")
+    await service.send_message("test-queue", "message2")
+
+    messages = await service.receive_messages("test-queue", visibility_timeout=60)
+    await service.change_message_visibility("test-queue", messages[0]["receipt_handle"], 0)
+
+    again = await service.receive_messages("test-queue", max_messages=2)
+    assert [m["body"] for m in again] == ["message1", "message2"]
+
+    with pytest.raises(ValueError, match="not in flight"):
+        await service.change_message_visibility("test-queue", "bogus", 5)
+
+
+@pytest.mark.unit
+async def test_sqs_long_poll_wakes_on_send(sqs_service: MockSQSService) -> None:
+    """Test that a long-polling receive returns as soon as a message arrives."""
+    await sqs_service.create_queue("test-queue")
+
+    receiver = asyncio.create_task(sqs_service.receive_messages("test-queue", wait_time=5))
+    await asyncio.sleep(0.01)
+    assert not receiver.done()
+
+    await sqs_service.send_message("test-queue", "wake up")
+    messages = await asyncio.wait_for(receiver, 1)
+    assert [m["body"] for m in messages] == ["wake up"]
+
+
+@pytest.mark.unit
+async def test_sqs_long_poll_times_out(sqs_service: MockSQSService) -> None:
+    """Test that a long-polling receive returns empty after the wait time."""
+    await sqs_service.create_queue("test-queue")
+    messages = await sqs_service.receive_messages("test-queue", wait_time=0.05)
+    assert messages == []
+
+    with pytest.raises(ValueError, match="Wait time"):
+        await sqs_service.receive_messages("test-queue", wait_time=21)
+
+
+@pytest.mark.unit
+async def test_sqs_long_poll_fair_ordering(sqs_service: MockSQSService) -> None:
+    """Test that waiters are served in arrival order."""
+    await sqs_service.create_queue("test-queue")
+
+    receivers = []
+    for _ in range(3):
+        receivers.append(
+            asyncio.create_task(sqs_service.receive_messages("test-queue", wait_time=5))
+        )
+        await asyncio.sleep(0)
+
+    for i in range(3):
+        await sqs_service.send_message("test-queue", f"message{i}")
+    results = await asyncio.wait_for(asyncio.gather(*receivers), 1)
+    assert [r[0]["body"] for r in results] == ["message0", "message1", "message2"]
+
+
+@pytest.mark.unit
+async def test_sqs_send_message_batch(sqs_service: MockSQSService) -> None:
+    """Test batch send with per-entry failures."""
+    await sqs_service.create_queue("test-queue")
+    result = await sqs_service.send_message_batch(
+        "test-queue",
+        [
+            {"id": "a", "message_body": "message1"},
+            {"id": "b", "message_body": ""},
+            {"id": "c", "message_body": "message2", "attributes": {"k": "v"}},
+        ],
+    )
+    assert [e["id"] for e in result["successful"]] == ["a", "c"]
+    assert [(e["id"], e["code"]) for e in result["failed"]] == [("b", "MissingParameter")]
+
+    messages = await sqs_service.receive_messages("test-queue", max_messages=10)
+    assert [m["body"] for m in messages] == ["message1", "message2"]
+
+
+@pytest.mark.unit
+async def test_sqs_batch_limits(sqs_service: MockSQSService) -> None:
+    """Test batch-level validation."""
+    await sqs_service.create_queue("test-queue")
+    entries = [{"id": str(i), "message_body": "m"} for i in range(11)]
+
+    with pytest.raises(ValueError, match="Too many entries"):
+        await sqs_service.send_message_batch("test-queue", entries)
+    with pytest.raises(ValueError, match="not distinct"):
+        await sqs_service.send_message_batch("test-queue", [entries[0], entries[0]])
+    with pytest.raises(ValueError, match="no entries"):
+        await sqs_service.send_message_batch("test-queue", [])
+    with pytest.raises(ValueError, match="Max messages"):
+        await sqs_service.receive_messages("test-queue", max_messages=11)
+
+    service = MockSQSService(max_batch_entries=100)
+    await service.create_queue("test-queue")
+    result = await service.send_message_batch("test-queue", entries)
+    assert len(result["successful"]) == 11
+
+
+@pytest.mark.unit
+async def test_sqs_delete_message_batch(sqs_service: MockSQSService) -> None:
+    """Test batch delete reports unknown receipt handles."""
+    await sqs_service.create_queue("test-queue")
+    await sqs_service.send_message("test-queue", "message1")
+    await sqs_service.send_message("test-queue", "message2")
+    messages = await sqs_service.receive_messages("test-queue", max_messages=2)
+
+    result = await sqs_service.delete_message_batch(
+        "test-queue",
+        [
+            {"id": "a", "receipt_handle": messages[0]["receipt_handle"]},
+            {"id": "b", "receipt_handle": "bogus"},
+            {"id": "c", "receipt_handle": messages[1]["receipt_handle"]},
+        ],
+    )
+    assert [e["id"] for e in result["successful"]] == ["a", "c"]
+    assert [e["code"] for e in result["failed"]] == ["ReceiptHandleIsInvalid"]
+
+    attrs = await sqs_service.get_queue_attributes("test-queue")
+    assert attrs["ApproximateNumberOfMessagesNotVisible"] == 0
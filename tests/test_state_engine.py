@@ -1,9 +1,17 @@
 """Tests for state engine."""
 
+import asyncio
+import shutil
+import threading
 import pytest
 from datetime import datetime
+from pathlib import Path
 
+from starward.core.codec import get_codec, list_codecs
+from starward.core.snapshot_writer import SnapshotWriter
 from starward.core.state_engine import StateEngine, Snapshot
+from starward.services.s3 import MockS3Service
+from starward.services.sqs import MESSAGES_PAGE_PREFIX, MockSQSService
 
 
 @pytest.mark.unit
@@ -36,6 +44,19 @@ async def test_snapshot_create(state_engine: StateEngine) -> None:
     assert isinstance(snapshot.timestamp, datetime)
 
 
+@pytest.mark.unit
+async def test_default_snapshot_ids_are_unique() -> None:
+    """Test that snapshots taken in the same second get distinct ids and parents."""
+    engine = StateEngine()
+    engine.freeze_time(datetime(2025, 1, 1))
+    first = await engine.create_snapshot(persist=False)
+    second = await engine.create_snapshot(persist=False)
+    assert first.id != second.id
+    assert second.parent == first.id
+    with pytest.raises(ValueError, match="own parent"):
+        await engine.create_snapshot(second.id, persist=False)
+
+
 @pytest.mark.unit
 async def test_snapshot_restore(state_engine: StateEngine) -> None:
     """Test snapshot restoration."""
@@ -67,3 +88,392 @@ def test_random_seed(state_engine: StateEngine) -> None:
     state_engine.set_seed(42)
     # Random operations would be deterministic here
     assert state_engine._random_seed == 42
+
+
+@pytest.mark.unit
+async def test_snapshot_isolated_from_later_writes(state_engine: StateEngine) -> None:
+    """Test that pages shared with a snapshot are copied on write."""
+    state_engine.set_state("page", {"a": 1})
+    snapshot = await state_engine.create_snapshot("isolated", persist=False)
+
+    state_engine.mutable_state("page")["a"] = 2
+    state_engine.mutable_state("new", dict)["b"] = 3
+
+    assert snapshot.state["page"] == {"a": 1}
+    assert "new" not in snapshot.state
+    assert state_engine.get_state("page") == {"a": 2}
+
+    await state_engine.restore_snapshot("isolated")
+    assert state_engine.get_state("page") == {"a": 1}
+    assert state_engine.get_state("new") is None
+
+    # Writing after a restore must not leak back into the snapshot either.
+    state_engine.mutable_state("page")["a"] = 4
+    assert snapshot.state["page"] == {"a": 1}
+
+
+@pytest.mark.unit
+async def test_snapshot_restores_service_state(tmp_path: Path) -> None:
+    """Test snapshotting live S3/SQS state in memory and from disk."""
+    engine = StateEngine(str(tmp_path))
+    s3 = MockS3Service(engine)
+    sqs = MockSQSService(engine)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "key", b"before")
+    await sqs.create_queue("queue")
+    await sqs.send_message("queue", "message")
+    await engine.create_snapshot("services")
+
+    await s3.put_object("bucket", "key", b"after")
+    await s3.create_bucket("other")
+    await sqs.receive_messages("queue")
+
+    await engine.restore_snapshot("services")
+    assert await s3.get_object("bucket", "key") == b"before"
+    assert [b["name"] for b in await s3.list_buckets()] == ["bucket"]
+    assert (await sqs.get_queue_attributes("queue"))["ApproximateNumberOfMessages"] == 1
+
+    # A fresh engine reads the persisted snapshot back from disk.
+    fresh = StateEngine(str(tmp_path))
+    await fresh.restore_snapshot("services")
+    assert await MockS3Service(fresh).get_object("bucket", "key") == b"before"
+    messages = await MockSQSService(fresh).receive_messages("queue")
+    assert [m["body"] for m in messages] == ["message"]
+
+
+@pytest.mark.unit
+async def test_reads_do_not_copy_snapshotted_pages() -> None:
+    """Test that SQS reads share pages with a snapshot until the first write."""
+    engine = StateEngine()
+    sqs = MockSQSService(engine)
+    await sqs.create_queue("queue")
+    await sqs.send_message("queue", "message")
+    await engine.create_snapshot("shared", persist=False)
+
+    page = engine.get_state(MESSAGES_PAGE_PREFIX + "queue")
+    assert (await sqs.get_queue_attributes("queue"))["ApproximateNumberOfMessages"] == 1
+    assert engine.get_state(MESSAGES_PAGE_PREFIX + "queue") is page
+    await sqs.receive_messages("queue")
+    assert engine.get_state(MESSAGES_PAGE_PREFIX + "queue") is not page
+
+
+@pytest.mark.unit
+async def test_snapshot_writes_only_changed_chunks(tmp_path: Path) -> None:
+    """Test that consecutive snapshots share chunks for unchanged pages."""
+    engine = StateEngine(str(tmp_path))
+    for i in range(10):
+        engine.set_state(f"page{i}", {"value": i})
+    await engine.create_snapshot("first")
+    chunks = set(engine._chunks.digests())
+    assert len(chunks) == 10
+
+    engine.mutable_state("page3")["value"] = 30
+    second = await engine.create_snapshot("second")
+    assert second.parent == "first"
+    assert len(set(engine._chunks.digests()) - chunks) == 1
+
+
+@pytest.mark.unit
+async def test_snapshot_bundle_roundtrip(tmp_path: Path) -> None:
+    """Test exporting a bundle and importing it into another engine."""
+    engine = StateEngine(str(tmp_path / "a"))
+    sqs = MockSQSService(engine)
+    await sqs.create_queue("queue")
+    await sqs.send_message("queue", "hello")
+    engine.set_state("page", {"blob": b"\x00\xff"})
+    await engine.create_snapshot("bundle", persist=False)
+
+    bundle = tmp_path / "bundle.tar"
+    await engine.export_snapshot("bundle", str(bundle))
+
+    other = StateEngine(str(tmp_path / "b"))
+    assert await other.import_snapshot(str(bundle)) == "bundle"
+    await other.restore_snapshot("bundle")
+    assert other.get_state("page") == {"blob": b"\x00\xff"}
+    messages = await MockSQSService(other).receive_messages("queue")
+    assert [m["body"] for m in messages] == ["hello"]
+
+
+@pytest.mark.unit
+async def test_snapshot_bundle_carries_spooled_blobs(tmp_path: Path) -> None:
+    """Test that a bundle restores spooled payloads after the source is gone."""
+    engine = StateEngine(str(tmp_path / "a"))
+    s3 = MockS3Service(engine, spool_threshold=4)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "key", b"0123456789")
+    await engine.create_snapshot("spooled")
+    bundle = tmp_path / "bundle.tar"
+    await engine.export_snapshot("spooled", str(bundle))
+    await engine.close()
+    shutil.rmtree(tmp_path / "a")
+
+    other = StateEngine(str(tmp_path / "b"))
+    await other.import_snapshot(str(bundle))
+    await other.restore_snapshot("spooled")
+    assert await MockS3Service(other).get_object("bucket", "key") == b"0123456789"
+
+
+@pytest.mark.unit
+async def test_snapshot_garbage_collection(tmp_path: Path) -> None:
+    """Test that deleting a snapshot frees only its unshared chunks."""
+    engine = StateEngine(str(tmp_path))
+    engine.set_state("shared", {"a": 1})
+    engine.set_state("page", {"b": 1})
+    await engine.create_snapshot("old")
+    engine.mutable_state("page")["b"] = 2
+    await engine.create_snapshot("new")
+
+    await engine.delete_snapshot("old")
+    assert engine.list_snapshots() == ["new"]
+    assert await engine.collect_garbage() == {"chunks_removed": 1, "blobs_removed": 0}
+
+    fresh = StateEngine(str(tmp_path))
+    await fresh.restore_snapshot("new")
+    assert fresh.get_state("shared") == {"a": 1}
+    assert fresh.get_state("page") == {"b": 2}
+    with pytest.raises(ValueError):
+        await engine.delete_snapshot("old")
+
+
+@pytest.mark.unit
+async def test_garbage_collection_removes_unreferenced_blobs(tmp_path: Path) -> None:
+    """Test that blobs are freed once no state or snapshot refers to them."""
+    engine = StateEngine(str(tmp_path))
+    s3 = MockS3Service(engine, spool_threshold=4)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "key", b"old payload")
+    await engine.create_snapshot("old")
+    await s3.put_object("bucket", "key", b"new payload")
+
+    # Recent blobs survive, in case their object is still being installed.
+    await engine.delete_snapshot("old")
+    assert (await engine.collect_garbage())["blobs_removed"] == 0
+    assert (await engine.collect_garbage(blob_grace=0))["blobs_removed"] == 1
+    assert (await engine.collect_garbage(blob_grace=0))["blobs_removed"] == 0
+    assert await s3.get_object("bucket", "key") == b"new payload"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", list_codecs())
+async def test_codec_roundtrip(name: str) -> None:
+    """Test that every codec round-trips service pages and raw bytes."""
+    engine = StateEngine()
+    s3 = MockS3Service(engine)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "key", b"\x00payload\xff", metadata={"k": "v"})
+    value = {
+        "objects": engine.get_state("s3/objects/bucket"),
+        "scalars": [None, True, False, -1, 2**70, 1.5, "\u00e9", b""],
+    }
+
+    codec = get_codec(name)
+    decoded = codec.decode(codec.encode(value))
+    assert decoded["scalars"] == value["scalars"]
+    record = decoded["objects"]["key"]
+    assert record.read() == b"\x00payload\xff"
+    assert record.metadata == {"k": "v"}
+
+
+@pytest.mark.unit
+def test_binary_codec_rejects_corrupt_data() -> None:
+    """Test that truncated or unknown binary data raises ValueError."""
+    codec = get_codec("binary")
+    with pytest.raises(ValueError):
+        codec.decode(b"?")
+    with pytest.raises(ValueError):
+        codec.decode(codec.encode("value") + b"N")
+    with pytest.raises(ValueError):
+        codec.decode(codec.encode(["a", "b"])[:-3])
+    with pytest.raises(ValueError):
+        get_codec("missing")
+
+
+@pytest.mark.unit
+async def test_snapshot_reads_chunks_with_recorded_codec(tmp_path: Path) -> None:
+    """Test that a snapshot written with one codec restores on another engine."""
+    engine = StateEngine(str(tmp_path), codec="json")
+    engine.set_state("page", {"blob": b"\x01"})
+    await engine.create_snapshot("debug")
+
+    fresh = StateEngine(str(tmp_path), codec="binary+zlib")
+    await fresh.restore_snapshot("debug")
+    assert fresh.get_state("page") == {"blob": b"\x01"}
+
+
+@pytest.mark.unit
+async def test_snapshot_persists_in_background(tmp_path: Path) -> None:
+    """Test that create_snapshot can return before its write completes."""
+    engine = StateEngine(str(tmp_path))
+    engine.set_state("page", {"a": 1})
+    await engine.create_snapshot("background", wait=False)
+    assert engine.snapshot_status("background") in ("pending", "persisted")
+
+    await engine.wait_persisted("background")
+    assert engine.snapshot_status("background") == "persisted"
+    await engine.close()
+
+    fresh = StateEngine(str(tmp_path))
+    await fresh.restore_snapshot("background")
+    assert fresh.get_state("page") == {"a": 1}
+    with pytest.raises(ValueError):
+        fresh.snapshot_status("missing")
+
+
+@pytest.mark.unit
+async def test_snapshot_writer_coalesces_requests() -> None:
+    """Test that writes queued during a batch are merged into the next one."""
+    batches = []
+    release = threading.Event()
+
+    def write_batch(items: list) -> None:
+        release.wait(timeout=5)
+        batches.append(items)
+
+    writer: SnapshotWriter[str] = SnapshotWriter(write_batch)
+    first = writer.submit("a", "a1")
+    await asyncio.sleep(0.01)  # let the first batch start
+    second = writer.submit("b", "b1")
+    third = writer.submit("c", "c1")
+    replaced = writer.submit("b", "b2")
+    assert replaced is second
+
+    release.set()
+    await asyncio.gather(first, second, third)
+    await writer.close()
+    assert batches == [["a1"], ["b2", "c1"]]
+    # Finished writes are not remembered; failed ones stay visible.
+    assert [writer.pending(key) for key in "abc"] == [None, None, None]
+
+    def fail(items: list) -> None:
+        raise OSError("disk full")
+
+    failing: SnapshotWriter[str] = SnapshotWriter(fail)
+    with pytest.raises(OSError):
+        await failing.submit("d", "d1")
+    assert failing.pending("d") is not None
+    await failing.close()
+
+
+@pytest.mark.unit
+async def test_lazy_restore_loads_pages_on_access(tmp_path: Path) -> None:
+    """Test that a lazy restore decodes pages only when they are used."""
+    engine = StateEngine(str(tmp_path))
+    s3 = MockS3Service(engine)
+    for name in ("used", "untouched"):
+        await s3.create_bucket(name)
+        await s3.put_object(name, "key", name.encode())
+    await engine.create_snapshot("lazy")
+
+    fresh = StateEngine(str(tmp_path))
+    await fresh.restore_snapshot("lazy", lazy=True)
+    assert await MockS3Service(fresh).get_object("used", "key") == b"used"
+
+    # A new snapshot reuses the untouched page's chunk without decoding it.
+    await fresh.create_snapshot("child")
+    await fresh.delete_snapshot("lazy")
+    await fresh.delete_snapshot("child")
+    await fresh.collect_garbage()
+    assert await MockS3Service(fresh).get_object("untouched", "key") == b"untouched"
+    assert sorted(fresh.get_all_state()) == sorted(engine.get_all_state())
+
+
+@pytest.mark.unit
+async def test_snapshot_catalog_filters_and_pages(tmp_path: Path) -> None:
+    """Test catalog queries by tag, parent and time, with pagination."""
+    engine = StateEngine(str(tmp_path))
+    engine.freeze_time(datetime(2025, 1, 1))
+    for i in range(5):
+        engine.freeze_time(datetime(2025, 1, 1 + i))
+        engine.set_state("page", {"i": i})
+        await engine.create_snapshot(f"snap{i}", tags=["ci"] if i % 2 == 0 else [])
+
+    entries, total = engine.query_snapshots(limit=2, offset=2)
+    assert total == 5
+    assert [e.id for e in entries] == ["snap2", "snap3"]
+    assert entries[1].parent == "snap2"
+    assert entries[0].size > 0
+
+    entries, total = engine.query_snapshots(tag="ci")
+    assert [e.id for e in entries] == ["snap0", "snap2", "snap4"]
+    assert entries[0].tags == ["ci"]
+    entries, _ = engine.query_snapshots(since=datetime(2025, 1, 4))
+    assert [e.id for e in entries] == ["snap3", "snap4"]
+    entries, _ = engine.query_snapshots(parent="snap0")
+    assert [e.id for e in entries] == ["snap1"]
+
+    await engine.delete_snapshot("snap4")
+    assert engine.query_snapshots()[1] == 4
+    with pytest.raises(ValueError):
+        engine.query_snapshots(limit=0)
+    await engine.close()
+
+
+@pytest.mark.unit
+async def test_snapshot_catalog_indexes_existing_manifests(tmp_path: Path) -> None:
+    """Test that a missing catalog is rebuilt from manifests on disk."""
+    engine = StateEngine(str(tmp_path))
+    engine.set_state("page", {"a": 1})
+    await engine.create_snapshot("existing", tags=["keep"])
+    await engine.close()
+    (tmp_path / "catalog.sqlite3").unlink()
+
+    fresh = StateEngine(str(tmp_path))
+    entries, _ = fresh.query_snapshots()
+    assert [(e.id, e.tags) for e in entries] == [("existing", ["keep"])]
+    assert fresh.list_snapshots() == ["existing"]
+    # A snapshot read back from its manifest keeps its tags when written again.
+    fork = await fresh.fork("existing", str(tmp_path / "fork"))
+    await fork.export_snapshot("existing", str(tmp_path / "bundle.tar"))
+    assert [e.tags for e in fork.query_snapshots()[0]] == [["keep"]]
+
+
+@pytest.mark.unit
+async def test_fork_shares_pages_until_written(tmp_path: Path) -> None:
+    """Test that forks start from a snapshot and stay isolated from each other."""
+    engine = StateEngine(str(tmp_path / "base"))
+    s3 = MockS3Service(engine)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "baseline", b"data")
+    await engine.create_snapshot("baseline")
+
+    first = await engine.fork("baseline", str(tmp_path / "first"))
+    second = await engine.fork("baseline", str(tmp_path / "second"))
+    assert first.get_state("s3/objects/bucket") is engine.get_state("s3/objects/bucket")
+
+    await MockS3Service(first).put_object("bucket", "mine", b"x")
+    assert first.get_state("s3/objects/bucket") is not second.get_state("s3/objects/bucket")
+    assert [o["key"] for o in await MockS3Service(second).list_objects("bucket")] == ["baseline"]
+    assert [o["key"] for o in await s3.list_objects("bucket")] == ["baseline"]
+
+    # Restoring the snapshot inside a fork resets just that fork.
+    await first.restore_snapshot("baseline")
+    assert [o["key"] for o in await MockS3Service(first).list_objects("bucket")] == ["baseline"]
+    with pytest.raises(ValueError):
+        await engine.fork("missing", str(tmp_path / "missing"))
+    await engine.close()
+
+
+@pytest.mark.unit
+async def test_garbage_collection_keeps_what_live_forks_read(tmp_path: Path) -> None:
+    """Test that a fork still reads its pages and blobs after the parent collects garbage."""
+    engine = StateEngine(str(tmp_path / "base"))
+    s3 = MockS3Service(engine, spool_threshold=4)
+    await s3.create_bucket("bucket")
+    await s3.put_object("bucket", "small", b"abc")
+    await s3.put_object("bucket", "spooled", b"0123456789")
+    await engine.create_snapshot("s1")
+    await engine.close()
+
+    parent = StateEngine(str(tmp_path / "base"))
+    fork = await parent.fork("s1", str(tmp_path / "fork"))
+    await parent.delete_snapshot("s1")
+    removed = await parent.collect_garbage(blob_grace=0)
+    assert removed == {"chunks_removed": 0, "blobs_removed": 0}
+    forked = MockS3Service(fork)
+    assert await forked.get_object("bucket", "small") == b"abc"
+    assert await forked.get_object("bucket", "spooled") == b"0123456789"
+
+    # Once the fork is closed its pages are no longer kept.
+    await fork.close()
+    assert (await parent.collect_garbage(blob_grace=0))["blobs_removed"] == 1
+    await parent.close()